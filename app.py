@@ -1,20 +1,26 @@
-from typing import Union, List, Dict, Any
+from typing import List, Dict, Any, Optional
 import uvicorn
-from fastapi import FastAPI, HTTPException, Form, File, UploadFile, BackgroundTasks
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel
+from fastapi import FastAPI, HTTPException, Form, File, UploadFile, Query, Request, Header, Depends
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel, Field
 import logging
 import asyncio
-import threading
-import queue
-import uuid
-import time
 import json
+import time
 from datetime import datetime
-from pathlib import Path
-from contextlib import asynccontextmanager
-from multi import MultiCosfimManager, Forwarder, CosfimHandler
-import requests
+from contextlib import asynccontextmanager, suppress
+from multi import MultiCosfimManager, create_call_back_message, LEASE_SECONDS
+from callback_dispatcher import get_dispatcher, shutdown_dispatcher
+from upload_client import get_upload_client, shutdown_upload_client
+from result_archive import get_archiver, shutdown_archiver
+from task_store import TaskStore, FINISHED_STATUSES
+from result_cache import ResultCache
+from opt_document import validate_opt, OptValidationError
+from task_scheduler import PRIORITY_CLASSES, DEFAULT_PRIORITY, AdmissionError
+from result_table import check_result_format, DEFAULT_RESULT_FORMAT
+from workspace import SLOT_WORKSPACE_ROOT, BASE_WORKSPACE_DIR
+from metrics import REGISTRY, OPENMETRICS_CONTENT_TYPE, QUEUE_DEPTH, CALLBACK_QUEUE_DEPTH, OUTBOX_DEPTH
 
 
 
@@ -29,27 +35,63 @@ API_END_POINT = "http://223.130.139.28/api/v1/widget/upload/cosfim"
 USER_ID = "20052970"
 USER_PW = "20052970"
 
+# 로그인된 COSFIM 세션 하나로 처리할 최대 작업 수 (이후 재시작)
+SESSION_MAX_TASKS = 20
+
+# 동시에 실행할 COSFIM 인스턴스 수 (2 이상이면 WORKSPACE_ROOT/slot_<n> 작업 폴더를 하나씩 씀)
+# GUI 드라이버는 COSFIM이 작업 디렉토리의 OPT를 읽는지 확인하고 COSFIM_SLOT_WORKSPACES=1로 켜기 전까지 1만 가능
+# 0이면 이 노드는 COSFIM을 실행하지 않고 원격 워커(worker_agent.py)에게만 작업을 임대
+WORKER_SLOTS = 1
+WORKSPACE_ROOT = SLOT_WORKSPACE_ROOT
+WORKSPACE_TEMPLATE = BASE_WORKSPACE_DIR
+
+# 결과 포워딩 전달 스레드 수 (COSFIM 워커는 CSV 저장 후 바로 다음 작업으로, 0이면 워커가 직접 포워딩)
+DELIVERY_CONCURRENCY = 4
+# 결과 CSV를 작업 폴더에 비동기로 보관할지 (업로드는 항상 메모리에서, DELIVERY_CONCURRENCY > 0이면 재전달용으로 항상 기록)
+ARCHIVE_RESULTS = True
+
+# 원격 워커 인증 토큰 (X-Agent-Token 헤더, None이면 임대 API를 열지 않음 - 503)
+AGENT_TOKEN = None
+
+# 작업 1건 전체 제한 시간 (초) - 단계별 예산을 넘기면 워치독이 COSFIM을 강제 종료
+TASK_TIMEOUT = 900
+
+# 입장 제어: 대기열 용량과 채팅 세션별 대기+처리 중 작업 수 (초과 시 429)
+MAX_QUEUE_SIZE = 50
+MAX_PENDING_PER_SESSION = 3
+
+# 작업 저장소 (재시작 시 대기 작업 복구)
+TASK_DB_PATH = "cosfim_tasks.db"
+# 시작 시 메모리에 올릴 끝난 작업 수 (나머지는 조회할 때 저장소에서 읽음)
+TASK_HISTORY_LOAD_LIMIT = 1000
+
+# 결과 캐시 (같은 수계/댐/OPT 재요청 시 COSFIM 실행 생략)
+RESULT_CACHE_DIR = "result_cache"
+RESULT_CACHE_MAX_BYTES = 512 * 1024 * 1024
+RESULT_CACHE_TTL = 3600
+
 # 전역 관리자 인스턴스
 manager = None
+task_store = None
 
-def create_call_back_message(callback_type:str,process: str,session_id : str, message : str):
-    callback_message = {
-        "type" : callback_type,
-        "process" : process,
-        "summary" : message,
-        "reference" : None,
-        "data" : None
-    }
-    
-    print("this is callback message :" , callback_message)
-    headers = {'Content-Type' : 'application/json; charset=utf-8'}
-    response = requests.post(
-                            f'http://223.130.139.28/api/v1/chat/callback/cosfim?sessionId={session_id}', 
-                            json=callback_message,
-                            headers = headers
-                        )
+# 이 API가 결과 로그(ResultLog)를 읽는 소비자 이름과 새 결과를 기다리는 최대 시간 (초, 종료 시 응답성)
+RESULT_CONSUMER = "api"
+RESULT_POLL_SECONDS = 1
+# 결과를 기다리는 소비자 (task_id -> Future)
+result_waiters: Dict[str, asyncio.Future] = {}
+# 단계 이벤트 구독자 (task_id -> SSE 연결별 Queue)
+stage_subscribers: Dict[str, List[asyncio.Queue]] = {}
+# 상태별 작업 수 (task_storage를 순회하지 않도록 상태 변경 시 갱신)
+status_counts: Dict[str, int] = {}
 
-    print(response)
+# SSE 연결 유지용 주석 전송 간격 (초)
+SSE_KEEPALIVE_SECONDS = 15
+# 상태 조회 long-poll 최대 대기 (초)
+MAX_WAIT_SECONDS = 300
+# 임대 long-poll: 새 작업 알림을 놓쳐도 이 간격마다 대기열을 다시 확인 (초)
+LEASE_POLL_SECONDS = 1
+# 대기열에 작업이 들어오면 set 후 새 Event로 교체 (임대 요청은 스레드 없이 이벤트 루프에서 기다림, lifespan에서 생성)
+lease_wakeup: asyncio.Event = None
 
 class CosfimInputDto(BaseModel):
     waterSystemName: str
@@ -62,26 +104,85 @@ class CosfimInputDto(BaseModel):
 
 class TaskStatusResponse(BaseModel):
     task_id: str
-    status: str  # "queued", "processing", "completed", "failed"
+    status: str  # "queued", "processing", "completed", "failed", "cancelled"
+    stage: Optional[str] = None  # "queued", "launching", "preparing", "computing", "extracting", "forwarding", "done"
     created_at: str
-    completed_at: str = None
-    error_message: str = None
-    result: Dict[str, Any] = None
+    completed_at: Optional[str] = None
+    water_system: Optional[str] = None
+    dam_name: Optional[str] = None
+    error_message: Optional[str] = None
+    result: Optional[Dict[str, Any]] = None
 
 class QueueStatusResponse(BaseModel):
     queue_size: int
     is_processing: bool
     total_completed: int
-    current_task: str = None
+    current_task: Optional[str] = None
+    running_tasks: List[str] = []
+    workers: int = 1
+    agents: List[str] = []
+    eta_seconds: Optional[float] = None
+    capacity: Optional[int] = None
+    queue_by_priority: Dict[str, int] = None
+
+class SubmitResponse(BaseModel):
+    task_id: str
+    status: str
+    message: str
+    eta_seconds: float
+
+class LeaseRequest(BaseModel):
+    agent_id: str
+    lease_seconds: int = Field(LEASE_SECONDS, ge=1, le=3600)
+
+class LeaseResponse(BaseModel):
+    lease_id: str
+    task_id: str
+    lease_seconds: int
+    water_system_name: str
+    dam_name: str
+    session_id: str
+    opt_data: str
+    result_format: str = DEFAULT_RESULT_FORMAT
+
+class HeartbeatRequest(BaseModel):
+    stage: Optional[str] = None
+
+class HeartbeatResponse(BaseModel):
+    cancel: bool
+    lease_seconds: int
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """앱 시작/종료 시 실행되는 컨텍스트 매니저"""
-    global manager
+    global manager, task_store, lease_wakeup
     
     # 시작 시
     logger.info("COSFIM Queue Manager 초기화 중...")
-    manager = MultiCosfimManager()
+    get_dispatcher()
+    task_store = TaskStore(TASK_DB_PATH, credentials={"user_id": USER_ID, "user_pw": USER_PW})
+    result_cache = ResultCache(RESULT_CACHE_DIR, max_bytes=RESULT_CACHE_MAX_BYTES, ttl_seconds=RESULT_CACHE_TTL)
+    manager = MultiCosfimManager(max_tasks_per_session=SESSION_MAX_TASKS, store=task_store, result_cache=result_cache,
+                                 max_queue_size=MAX_QUEUE_SIZE, max_pending_per_session=MAX_PENDING_PER_SESSION,
+                                 task_timeout=TASK_TIMEOUT, workers=WORKER_SLOTS,
+                                 workspace_root=WORKSPACE_ROOT if WORKER_SLOTS > 1 else None,
+                                 workspace_template=WORKSPACE_TEMPLATE, delivery_concurrency=DELIVERY_CONCURRENCY,
+                                 archive_results=ARCHIVE_RESULTS)
+    TaskTracker.load_from_store(task_store, TASK_HISTORY_LOAD_LIMIT)
+
+    # 결과는 이 API의 결과 로그 커서로 읽고, 단계 변경은 워커 스레드가 이벤트 루프로 전달
+    loop = asyncio.get_running_loop()
+    lease_wakeup = asyncio.Event()
+    manager.task_queue.result_log.register(RESULT_CONSUMER)
+
+    def on_stage(task_id, stage):
+        loop.call_soon_threadsafe(TaskTracker.update_stage, task_id, stage)
+        if stage == "queued":
+            loop.call_soon_threadsafe(wake_lease_waiters)
+
+    manager.task_queue.add_stage_listener(on_stage)
+    consumer = asyncio.create_task(result_log_reader(manager.task_queue))
+
     manager.start_processing()
     logger.info("COSFIM Queue Manager 시작 완료")
     
@@ -91,6 +192,14 @@ async def lifespan(app: FastAPI):
     logger.info("COSFIM Queue Manager 종료 중...")
     if manager:
         manager.stop_processing()
+    consumer.cancel()
+    with suppress(asyncio.CancelledError):
+        await consumer
+    if task_store:
+        task_store.close()
+    shutdown_dispatcher()
+    shutdown_upload_client()
+    shutdown_archiver()
     logger.info("COSFIM Queue Manager 종료 완료")
 
 app = FastAPI(
@@ -100,43 +209,150 @@ app = FastAPI(
     lifespan=lifespan
 )
 
-# 작업 상태 저장소 (실제로는 DB를 사용하는 것이 좋음)
+# 작업 상태 캐시 (원본은 TaskStore, 시작 시 저장소에서 적재)
 task_storage: Dict[str, Dict[str, Any]] = {}
 
 class TaskTracker:
     """작업 추적 클래스"""
+
+    @staticmethod
+    def load_from_store(store: TaskStore, limit: int):
+        """끝나지 않은 작업과 최근에 끝난 작업 limit개를 캐시에 적재 (재시작 후 복구)"""
+        for stored in store.list_recent(limit):
+            TaskTracker._count_status(None, stored["status"])
+            task_storage[stored["task_id"]] = {
+                "task_id": stored["task_id"],
+                "status": stored["status"],
+                "stage": "done" if stored["status"] in FINISHED_STATUSES else stored["status"],
+                "created_at": stored["created_at"],
+                "water_system": stored["water_system"],
+                "dam_name": stored["dam_name"],
+                "completed_at": stored["completed_at"],
+                "error_message": stored["error_message"],
+                "result": stored["result"]
+            }
+        logger.info(f"저장소에서 작업 {len(task_storage)}개 적재")
     
     @staticmethod
     def create_task(task_id: str, water_system: str, dam_name: str):
-        """새 작업 생성"""
-        task_storage[task_id] = {
-            "task_id": task_id,
-            "status": "queued",
-            "created_at": datetime.now().isoformat(),
-            "water_system": water_system,
-            "dam_name": dam_name,
-            "completed_at": None,
-            "error_message": None,
-            "result": None
-        }
+        """새 작업 생성 (제출 요청이 끝나기 전에 결과가 먼저 반영된 작업은 수계/댐만 채움)"""
+        task = task_storage.get(task_id)
+        if task is None:
+            TaskTracker._count_status(None, "queued")
+            task = task_storage[task_id] = {
+                "task_id": task_id,
+                "status": "queued",
+                "stage": "queued",
+                "created_at": datetime.now().isoformat(),
+                "water_system": None,
+                "dam_name": None,
+                "completed_at": None,
+                "error_message": None,
+                "result": None
+            }
+        task.update(water_system=water_system, dam_name=dam_name)
     
+    @staticmethod
+    def apply_result(result: Dict[str, Any]):
+        """결과 로그에서 읽은 작업 결과로 상태 갱신 후 SSE 구독자에게 완료 전달"""
+        task_id = result['task_id']
+        if task_id not in task_storage:
+            # 제출 요청이 create_task를 호출하기 전에 끝난 작업 (이후 create_task가 수계/댐을 채움)
+            TaskTracker.create_task(task_id, None, None)
+        if result.get('success'):
+            TaskTracker.update_task_status(task_id, "completed", result=result)
+            logger.info(f"Task {task_id} completed successfully")
+        elif result.get('cancelled'):
+            TaskTracker.update_task_status(task_id, "cancelled", error_message=result.get('error'))
+            logger.info(f"Task {task_id} cancelled")
+        else:
+            TaskTracker.update_task_status(task_id, "failed", error_message=result.get('error', 'Unknown error'))
+            logger.error(f"Task {task_id} failed: {result.get('error')}")
+        task_storage[task_id]["stage"] = "done"
+        TaskTracker._publish(task_storage[task_id])
+
     @staticmethod
     def update_task_status(task_id: str, status: str, error_message: str = None, result: Dict = None):
         """작업 상태 업데이트"""
         if task_id in task_storage:
+            TaskTracker._count_status(task_storage[task_id]["status"], status)
             task_storage[task_id]["status"] = status
-            if status in ["completed", "failed"]:
+            if status in FINISHED_STATUSES:
                 task_storage[task_id]["completed_at"] = datetime.now().isoformat()
             if error_message:
                 task_storage[task_id]["error_message"] = error_message
             if result:
                 task_storage[task_id]["result"] = result
     
+    @staticmethod
+    def _count_status(old_status: str, new_status: str):
+        if old_status is not None:
+            status_counts[old_status] = status_counts.get(old_status, 0) - 1
+        status_counts[new_status] = status_counts.get(new_status, 0) + 1
+
+    @staticmethod
+    def update_stage(task_id: str, stage: str):
+        """작업 단계 갱신 후 SSE 구독자에게 전달 (이벤트 루프에서 호출)"""
+        task = task_storage.get(task_id)
+        if task is None or task["stage"] == "done":
+            return
+        task["stage"] = stage
+        if stage != "queued" and task["status"] == "queued":
+            TaskTracker.update_task_status(task_id, "processing")
+        TaskTracker._publish(task)
+
+    @staticmethod
+    def _publish(task: Dict[str, Any]):
+        event = {
+            "task_id": task["task_id"],
+            "stage": task["stage"],
+            "status": task["status"],
+            "error_message": task["error_message"],
+            "timestamp": datetime.now().isoformat(),
+        }
+        for subscriber in stage_subscribers.get(task["task_id"], ()):
+            subscriber.put_nowait(event)
+
+    @staticmethod
+    def subscribe(task_id: str) -> asyncio.Queue:
+        subscriber = asyncio.Queue()
+        stage_subscribers.setdefault(task_id, []).append(subscriber)
+        return subscriber
+
+    @staticmethod
+    def unsubscribe(task_id: str, subscriber: asyncio.Queue):
+        subscribers = stage_subscribers.get(task_id, [])
+        if subscriber in subscribers:
+            subscribers.remove(subscriber)
+        if not subscribers:
+            stage_subscribers.pop(task_id, None)
+
     @staticmethod
     def get_task(task_id: str) -> Dict[str, Any]:
         """작업 정보 조회"""
-        return task_storage.get(task_id)
+        task = task_storage.get(task_id)
+        if task is None and task_store is not None:
+            stored = task_store.get_task(task_id)
+            if stored:
+                task = {key: stored[key] for key in ("task_id", "status", "created_at", "completed_at", "error_message", "result")}
+                task.update(water_system=stored["water_system"], dam_name=stored["dam_name"],
+                            stage="done" if stored["status"] in FINISHED_STATUSES else stored["status"])
+        return task
     
+    @staticmethod
+    async def wait_for_result(task_id: str, timeout: float = None) -> Dict[str, Any]:
+        """작업이 완료/실패할 때까지 대기 후 작업 정보 반환 (timeout 초과 시 현재 상태)"""
+        task = TaskTracker.get_task(task_id)
+        if task is None or task["status"] in FINISHED_STATUSES:
+            return task
+        future = result_waiters.get(task_id)
+        if future is None:
+            future = result_waiters[task_id] = asyncio.get_running_loop().create_future()
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            return TaskTracker.get_task(task_id)
+
     @staticmethod
     def get_all_tasks() -> List[Dict[str, Any]]:
         """모든 작업 조회"""
@@ -162,51 +378,46 @@ def process_file_content(file_content: bytes) -> str:
     # 개행 문자 정규화 (Windows, Unix, Mac 호환)
     opt_data_processed = opt_data_str.replace("\r\n", "\n").replace("\r", "\n")
     
-    # 첫 줄 끝 공백 맞추기 (원본 코드와 호환성 위해)
-    lines = opt_data_processed.split("\n")
-    if len(lines) > 0 and not lines[0].endswith("  "):
-        lines[0] = lines[0].rstrip() + "  "
+    # 첫 줄 끝 공백 맞추기 (원본 코드와 호환성 위해) - 첫 줄만 분리하여 처리
+    first_line, sep, rest = opt_data_processed.partition("\n")
+    if not first_line.endswith("  "):
+        first_line = first_line.rstrip() + "  "
     
     # 빈 줄 끝의 공백 제거하지 않고 유지 (OPT 포맷의 경우 중요할 수 있음)
-    return "\n".join(lines)
+    return first_line + sep + rest
 
-async def background_result_updater():
-    """백그라운드에서 주기적으로 결과 업데이트"""
+def parse_deadline(value: str) -> datetime:
+    """ISO 8601 마감 시각을 서버 로컬 시각으로 변환 (형식 오류/이미 지난 시각이면 400)"""
+    try:
+        deadline = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"deadline must be an ISO 8601 datetime: {value}")
+    if deadline.tzinfo is not None:
+        deadline = deadline.astimezone().replace(tzinfo=None)
+    if deadline <= datetime.now():
+        raise HTTPException(status_code=400, detail=f"deadline has already passed: {value}")
+    return deadline
+
+async def result_log_reader(task_queue):
+    """이 API의 결과 로그 커서로 작업 결과를 읽어 상태를 갱신하고 대기 중인 소비자를 깨움"""
     while True:
-        try:
-            if manager:
-                # 완료된 결과들 가져오기
-                recent_results = manager.task_queue.get_results()
-                
-                for result in recent_results:
-                    task_id = result.get('task_id')
-                    if task_id and task_id in task_storage:
-                        if result.get('success'):
-                            TaskTracker.update_task_status(
-                                task_id, 
-                                "completed", 
-                                result=result
-                            )
-                            logger.info(f"Task {task_id} completed successfully")
-                        else:
-                            TaskTracker.update_task_status(
-                                task_id, 
-                                "failed", 
-                                error_message=result.get('error', 'Unknown error')
-                            )
-                            logger.error(f"Task {task_id} failed: {result.get('error')}")
-            
-            await asyncio.sleep(5)  # 5초마다 확인
-            
-        except Exception as e:
-            logger.error(f"Background updater error: {e}")
-            await asyncio.sleep(10)
-
-# 백그라운드 작업 시작
-@app.on_event("startup")
-async def startup_event():
-    """앱 시작 시 백그라운드 작업 시작"""
-    asyncio.create_task(background_result_updater())
+        results = await run_in_threadpool(task_queue.get_results, consumer=RESULT_CONSUMER,
+                                          timeout=RESULT_POLL_SECONDS)
+        for result in results:
+            try:
+                apply_result_event(result)
+            except Exception as e:
+                logger.error(f"Result event error: {e}")
+
+def apply_result_event(result: Dict[str, Any]):
+    """결과 하나를 작업 상태에 반영하고 그 작업의 완료를 기다리는 요청을 깨움"""
+    task_id = result.get('task_id')
+    if not task_id or task_id == 'unknown':
+        return
+    TaskTracker.apply_result(result)
+    future = result_waiters.pop(task_id, None)
+    if future is not None and not future.done():
+        future.set_result(TaskTracker.get_task(task_id))
 
 @app.get("/")
 def read_root():
@@ -224,10 +435,186 @@ def health_check():
     return {
         "status": "healthy",
         "queue_manager": "running" if manager and manager.task_queue.is_running else "stopped",
+        "callbacks": get_dispatcher().stats(),
+        "forwarding": get_upload_client().stats(),
+        "delivery": manager.task_queue.outbox.stats() if manager and manager.task_queue.outbox else None,
+        "archive": get_archiver().stats(),
+        "result_cache": manager.task_queue.result_cache.stats() if manager and manager.task_queue.result_cache else None,
+        "result_log": manager.task_queue.result_log.stats() if manager else None,
         "timestamp": datetime.now().isoformat()
     }
 
-@app.post("/api/v1/cosfim/submit", response_model=Dict[str, str])
+@app.get("/metrics")
+def metrics():
+    """단계별 소요 시간, 큐 대기, 콜백 지연 지표 (OpenMetrics)"""
+    QUEUE_DEPTH.set(manager.task_queue.task_queue.qsize() if manager else 0)
+    CALLBACK_QUEUE_DEPTH.set(get_dispatcher().queue_depth())
+    OUTBOX_DEPTH.set(manager.task_queue.outbox.depth() if manager and manager.task_queue.outbox else 0)
+    return Response(content=REGISTRY.render(), media_type=OPENMETRICS_CONTENT_TYPE)
+
+@app.get("/api/v1/cosfim/tasks/{task_id}", response_model=TaskStatusResponse)
+async def get_task_status(
+    task_id: str,
+    wait: float = Query(None, ge=0, le=MAX_WAIT_SECONDS, description="완료될 때까지 최대 대기 시간(초, long-poll)")
+):
+    """작업 상태 조회 (wait 지정 시 완료/실패 또는 시간 초과까지 대기)"""
+    task = await TaskTracker.wait_for_result(task_id, timeout=wait) if wait else TaskTracker.get_task(task_id)
+    if task is None:
+        raise HTTPException(status_code=404, detail=f"Task not found: {task_id}")
+    return task
+
+@app.get("/api/v1/cosfim/tasks/{task_id}/events")
+async def stream_task_events(task_id: str, request: Request):
+    """작업 단계 변경을 Server-Sent Events로 전달 (done 이벤트 후 종료)"""
+    task = TaskTracker.get_task(task_id)
+    if task is None:
+        raise HTTPException(status_code=404, detail=f"Task not found: {task_id}")
+
+    def format_event(event: Dict[str, Any]) -> str:
+        return f"event: stage\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+
+    async def event_stream():
+        subscriber = TaskTracker.subscribe(task_id)
+        try:
+            current = TaskTracker.get_task(task_id)
+            yield format_event({
+                "task_id": task_id,
+                "stage": current.get("stage"),
+                "status": current["status"],
+                "error_message": current.get("error_message"),
+                "timestamp": datetime.now().isoformat(),
+            })
+            if current.get("stage") == "done":
+                return
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(subscriber.get(), SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield format_event(event)
+                if event["stage"] == "done":
+                    return
+        finally:
+            TaskTracker.unsubscribe(task_id, subscriber)
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.delete("/api/v1/cosfim/tasks/{task_id}")
+def cancel_task(task_id: str):
+    """작업 취소 (대기 중이면 바로 취소, 처리 중이면 다음 단계에서 중단 후 정리)"""
+    task = TaskTracker.get_task(task_id)
+    if task is None:
+        raise HTTPException(status_code=404, detail=f"Task not found: {task_id}")
+    if task["status"] in FINISHED_STATUSES or not manager:
+        raise HTTPException(status_code=409, detail=f"Task already {task['status']}: {task_id}")
+    outcome = manager.task_queue.cancel_task(task_id)
+    if outcome is None:
+        raise HTTPException(status_code=409, detail=f"Task is already finishing or cancelled: {task_id}")
+    logger.info(f"Task {task_id} cancel requested ({outcome})")
+    return {"task_id": task_id, "status": outcome}
+
+@app.get("/api/v1/cosfim/queue", response_model=QueueStatusResponse)
+def get_queue_status():
+    """대기열 길이, 처리 중인 작업, 대기열이 비워질 때까지 예상 시간"""
+    if not manager:
+        raise HTTPException(status_code=503, detail="Queue manager is not running")
+    task_queue = manager.task_queue
+    running = [task['id'] for task, _ in task_queue.running_tasks()]
+    return {
+        "queue_size": task_queue.task_queue.qsize(),
+        "is_processing": bool(running),
+        "total_completed": status_counts.get("completed", 0),
+        "current_task": running[0] if running else None,
+        "running_tasks": running,
+        "workers": len(task_queue.slots),
+        "agents": task_queue.active_agents(),
+        "eta_seconds": task_queue.estimate_wait(),
+        "capacity": task_queue.max_queue_size,
+        "queue_by_priority": task_queue.task_queue.depth_by_priority(),
+    }
+
+def check_agent_token(x_agent_token: Optional[str] = Header(None)):
+    """원격 워커 요청 인증 (AGENT_TOKEN이 없으면 임대 API 자체를 막음)"""
+    if not AGENT_TOKEN:
+        raise HTTPException(status_code=503, detail="Remote workers are disabled (AGENT_TOKEN is not set)")
+    if x_agent_token != AGENT_TOKEN:
+        raise HTTPException(status_code=401, detail="Invalid agent token")
+
+def wake_lease_waiters():
+    """작업을 기다리는 임대 요청을 깨움 (이벤트 루프에서 호출)"""
+    global lease_wakeup
+    lease_wakeup.set()
+    lease_wakeup = asyncio.Event()
+
+def get_running_queue():
+    if not manager or not manager.task_queue.is_running:
+        raise HTTPException(status_code=503, detail="Queue manager is not running")
+    return manager.task_queue
+
+@app.post("/api/v1/workers/lease", response_model=LeaseResponse, dependencies=[Depends(check_agent_token)],
+          responses={204: {"description": "임대할 작업 없음"}})
+async def lease_task(
+    body: LeaseRequest,
+    wait: float = Query(0, ge=0, le=MAX_WAIT_SECONDS, description="작업이 생길 때까지 최대 대기 시간(초, long-poll)")
+):
+    """원격 워커에게 다음 작업 임대 (lease_seconds 안에 heartbeat로 연장하지 않으면 회수)
+
+    대기하는 동안 스레드풀 스레드를 잡지 않도록 대기열은 바로 확인만 하고,
+    작업이 없으면 새 작업 알림(lease_wakeup)이나 LEASE_POLL_SECONDS까지 이벤트 루프에서 기다린다.
+    """
+    task_queue = get_running_queue()
+    give_up = time.monotonic() + wait
+    while True:
+        wakeup = lease_wakeup
+        lease = await run_in_threadpool(task_queue.lease_task, body.agent_id, lease_seconds=body.lease_seconds,
+                                        timeout=0)
+        remaining = give_up - time.monotonic()
+        if lease is not None or remaining <= 0 or not task_queue.is_running:
+            break
+        with suppress(asyncio.TimeoutError):
+            await asyncio.wait_for(wakeup.wait(), min(remaining, LEASE_POLL_SECONDS))
+    if lease is None:
+        return Response(status_code=204)
+    task_data = lease['task']['data']
+    return {
+        "lease_id": lease['id'],
+        "task_id": lease['task']['id'],
+        "lease_seconds": lease['lease_seconds'],
+        "water_system_name": task_data['water_system_name'],
+        "dam_name": task_data['dam_name'],
+        "session_id": task_data['session_id'],
+        "opt_data": task_data['opt_data'],
+        "result_format": task_data.get('result_format') or DEFAULT_RESULT_FORMAT,
+    }
+
+@app.post("/api/v1/workers/leases/{lease_id}/heartbeat", response_model=HeartbeatResponse,
+          dependencies=[Depends(check_agent_token)])
+def heartbeat_lease(lease_id: str, body: HeartbeatRequest):
+    """임대 연장과 단계 보고 (404면 임대가 회수된 것이므로 워커는 작업을 멈춤)"""
+    heartbeat = get_running_queue().heartbeat_lease(lease_id, stage=body.stage)
+    if heartbeat is None:
+        raise HTTPException(status_code=404, detail=f"Lease not found or expired: {lease_id}")
+    return heartbeat
+
+@app.post("/api/v1/workers/leases/{lease_id}/complete", dependencies=[Depends(check_agent_token)])
+def complete_lease(
+    lease_id: str,
+    success: bool = Form(..., description="처리 성공 여부"),
+    error: Optional[str] = Form(None, description="실패 사유"),
+    csvData: Optional[UploadFile] = File(None, description="결과 CSV (성공 시)")
+):
+    """원격 워커의 처리 결과 수신 - 결과 CSV는 이 노드가 포워딩"""
+    if success and csvData is None:
+        raise HTTPException(status_code=400, detail="csvData is required when success is true")
+    result = get_running_queue().complete_lease(lease_id, success, csv_data=csvData.file.read() if csvData else None,
+                                                error=error)
+    if result is None:
+        raise HTTPException(status_code=404, detail=f"Lease not found or expired: {lease_id}")
+    return {"task_id": result['task_id'], "success": result['success'], "error": result.get('error')}
+
+@app.post("/api/v1/cosfim/submit", response_model=SubmitResponse)
 async def submit_cosfim_task(
     waterSystemName: str = Form(..., description="수계명 (예: 낙동강)"),
     damName: str = Form(..., description="댐명 (예: 합천댐)"),
@@ -235,7 +622,10 @@ async def submit_cosfim_task(
     templateId: str = Form(..., description="템플릿 ID"),
     widgetName : str = Form(..., description="LLM에서 생성한 위젯명"),
     optData: UploadFile = File(..., description="OPT 데이터 텍스트 파일 (.txt)"),
-    sessionId : str = Form(..., description="sessionId")
+    sessionId : str = Form(..., description="sessionId"),
+    priority: str = Form(DEFAULT_PRIORITY, description="우선순위 (emergency, normal, batch)"),
+    deadline: Optional[str] = Form(None, description="마감 시각 (ISO 8601, 지나면 실행하지 않고 실패 처리)"),
+    resultFormat: str = Form(DEFAULT_RESULT_FORMAT, description="위젯으로 보낼 결과 형식 (csv, csv.gz, ndjson, arrow, parquet)")
 ):
     """COSFIM 작업을 큐에 제출"""
     
@@ -250,24 +640,52 @@ async def submit_cosfim_task(
         # 파일 확장자 검증
         if not optData.filename.lower().endswith('.txt'):
             raise HTTPException(status_code=400, detail="optData must be a .txt file")
+
+        if priority not in PRIORITY_CLASSES:
+            raise HTTPException(status_code=400, detail=f"priority must be one of: {', '.join(PRIORITY_CLASSES)}")
+        deadline_at = parse_deadline(deadline) if deadline else None
+        try:
+            check_result_format(resultFormat)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         
         # 파일 내용 읽기 및 처리
         file_content = await optData.read()
         opt_data_processed = process_file_content(file_content)
+
+        # COSFIM 실행 전 OPT 검증 (실패 시 줄 번호와 함께 400)
+        try:
+            validate_opt(opt_data_processed, waterSystemName)
+        except OptValidationError as e:
+            logger.warning(f"OPT 검증 실패 ({damName}): {e}")
+            raise HTTPException(status_code=400, detail={
+                "message": "Invalid OPT data",
+                "errors": [{"line": line_no, "message": message} for line_no, message in e.errors],
+            })
         
-        # 작업을 큐에 추가
-        task_id = manager.add_dam_task(
-            water_system_name=waterSystemName,
-            dam_name=damName,
-            dam_code=damCode,
-            template_id=templateId,
-            user_id=USER_ID,
-            user_pw=USER_PW,
-            opt_data=opt_data_processed,
-            api_end_point=API_END_POINT,
-            session_id = sessionId,
-            widget_name = widgetName
-        )
+        # 작업을 큐에 추가 (대기열/세션 한도 초과 시 429)
+        # 저장소 커밋을 기다리는 동안 이벤트 루프를 막지 않도록 스레드풀에서 실행
+        try:
+            task_id = await run_in_threadpool(
+                manager.add_dam_task,
+                water_system_name=waterSystemName,
+                dam_name=damName,
+                dam_code=damCode,
+                template_id=templateId,
+                user_id=USER_ID,
+                user_pw=USER_PW,
+                opt_data=opt_data_processed,
+                api_end_point=API_END_POINT,
+                session_id = sessionId,
+                widget_name = widgetName,
+                priority=priority,
+                deadline=deadline_at,
+                result_format=resultFormat
+            )
+        except AdmissionError as e:
+            logger.warning(f"작업 거절 ({damName}, {e.reason}): {e}")
+            raise HTTPException(status_code=429, detail={"message": str(e), "reason": e.reason},
+                                headers={"Retry-After": str(e.retry_after)})
         
         # 작업 추적 정보 생성
         TaskTracker.create_task(task_id, waterSystemName, damName)
@@ -279,9 +697,12 @@ async def submit_cosfim_task(
         return {
             "task_id": task_id,
             "status": "queued",
-            "message": f"Task for {damName} has been queued successfully with OPT file: {optData.filename}"
+            "message": f"Task for {damName} has been queued successfully with OPT file: {optData.filename}",
+            "eta_seconds": manager.task_queue.estimate_wait(priority)
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error submitting task: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to submit task: {str(e)}")
@@ -294,6 +715,6 @@ if __name__ == "__main__":
         host='0.0.0.0', 
         port=8000, 
         reload=True,
-        reload_excludes=["work_*", "*.csv", "*.OPT", "*.zip"]  # 작업 디렉토리와 결과 파일 제외
+        reload_excludes=["work_*", "*.csv", "*.OPT", "*.zip", "*.db", "*.db-wal", "*.db-shm", "result_cache"]  # 작업 디렉토리와 결과 파일 제외
     )
     # uvicorn.run("app:app", host='0.0.0.0', port=8000, reload=True)
@@ -0,0 +1,166 @@
+import os
+import time
+import logging
+import threading
+from collections import deque
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import CALLBACK_LATENCY_SECONDS
+
+CALLBACK_URL = os.environ.get("COSFIM_CALLBACK_URL", "http://223.130.139.28/api/v1/chat/callback/cosfim")
+
+
+class CallbackDispatcher:
+    """채팅 콜백 전송기
+
+    enqueue()는 대기열에 넣고 바로 반환한다. 전송은 전용 워커 스레드가
+    커넥션 풀을 공유하는 HTTP 세션으로 처리하며, 동시 전송 수는
+    max_concurrency로 제한된다. 같은 sessionId의 콜백은 한 번에 하나씩
+    넣은 순서대로 전송된다.
+    """
+    def __init__(self, url=CALLBACK_URL, max_concurrency=4, timeout=(3, 10), latency_window=1000):
+        self.url = url
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.logger = logging.getLogger("CallbackDispatcher")
+
+        self._http = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_concurrency)
+        self._http.mount("http://", adapter)
+        self._http.mount("https://", adapter)
+        self._http.headers.update({'Content-Type': 'application/json; charset=utf-8'})
+
+        self._cond = threading.Condition()
+        self._pending = {}      # session_id -> deque[(message, enqueued_at)]
+        self._ready = deque()   # 전송 가능한 session_id (진행 중이 아닌 세션)
+        self._active = set()    # 현재 전송 중인 session_id
+        self._depth = 0
+        self._running = False
+        self._workers = []
+
+        self.sent_count = 0
+        self.failed_count = 0
+        self._latencies = deque(maxlen=latency_window)
+
+    def start(self):
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        for idx in range(self.max_concurrency):
+            worker = threading.Thread(target=self._worker_loop, name=f"callback-{idx}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+        self.logger.info(f"콜백 전송기 시작 (동시 전송 {self.max_concurrency})")
+
+    def stop(self, timeout=5):
+        """남은 콜백을 timeout 동안 전송한 뒤 중지"""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._depth and time.monotonic() < deadline:
+                self._cond.wait(timeout=max(0.0, deadline - time.monotonic()))
+            self._running = False
+            self._cond.notify_all()
+        for worker in self._workers:
+            worker.join(timeout=max(0.0, deadline - time.monotonic()))
+        self._workers = []
+        self._http.close()
+        self.logger.info("콜백 전송기 중지")
+
+    def enqueue(self, session_id, message):
+        """콜백을 대기열에 추가 (블로킹 없음)"""
+        with self._cond:
+            self._pending.setdefault(session_id, deque()).append((message, time.monotonic()))
+            self._depth += 1
+            if session_id not in self._active and len(self._pending[session_id]) == 1:
+                self._ready.append(session_id)
+                self._cond.notify()
+
+    def queue_depth(self):
+        with self._cond:
+            return self._depth
+
+    def stats(self):
+        """대기열 길이와 전송 지연(대기 + 전송, 초) 통계"""
+        with self._cond:
+            latencies = sorted(self._latencies)
+            depth = self._depth
+        result = {
+            'queue_depth': depth,
+            'sent': self.sent_count,
+            'failed': self.failed_count,
+        }
+        if latencies:
+            result['latency_p50'] = latencies[len(latencies) // 2]
+            result['latency_p95'] = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+            result['latency_max'] = latencies[-1]
+        return result
+
+    def _worker_loop(self):
+        while True:
+            with self._cond:
+                while self._running and not self._ready:
+                    self._cond.wait()
+                if not self._ready:
+                    return
+                session_id = self._ready.popleft()
+                self._active.add(session_id)
+                message, enqueued_at = self._pending[session_id].popleft()
+
+            ok = self._send(session_id, message)
+
+            latency = time.monotonic() - enqueued_at
+            CALLBACK_LATENCY_SECONDS.observe(latency, message.get('type'), "sent" if ok else "failed")
+            with self._cond:
+                self._depth -= 1
+                self._latencies.append(latency)
+                if ok:
+                    self.sent_count += 1
+                else:
+                    self.failed_count += 1
+                self._active.discard(session_id)
+                if self._pending[session_id]:
+                    self._ready.append(session_id)
+                    self._cond.notify()
+                else:
+                    del self._pending[session_id]
+                self._cond.notify_all()
+
+    def _send(self, session_id, message):
+        try:
+            response = self._http.post(
+                self.url,
+                params={'sessionId': session_id},
+                json=message,
+                timeout=self.timeout,
+            )
+            self.logger.info(f"콜백 전송 {message.get('type')}/{message.get('process')} -> {response.status_code}")
+            return response.status_code < 400
+        except Exception as e:
+            self.logger.error(f"콜백 전송 실패 (sessionId={session_id}): {e}")
+            return False
+
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_dispatcher():
+    """프로세스 공용 콜백 전송기 (최초 호출 시 시작)"""
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = CallbackDispatcher()
+            _dispatcher.start()
+        return _dispatcher
+
+
+def shutdown_dispatcher(timeout=5):
+    """공용 콜백 전송기의 남은 콜백 전송 후 중지"""
+    global _dispatcher
+    with _dispatcher_lock:
+        dispatcher, _dispatcher = _dispatcher, None
+    if dispatcher is not None:
+        dispatcher.stop(timeout=timeout)
@@ -0,0 +1,707 @@
+import os
+import ctypes
+import logging
+import threading
+import subprocess
+from contextlib import suppress, contextmanager
+
+import pywinauto
+from pywinauto.application import Application
+import pywinauto.keyboard as keyboard
+import pyperclip
+from pywinauto.timings import TimeoutError
+from pywinauto.findwindows import ElementNotFoundError
+
+from wait_engine import wait_until, WaitRecorder, WaitTimeout
+from table_extract import GridTableReader, UiaGridProvider
+from metrics import time_stage
+from workspace import CosfimWorkspace, BASE_WORKSPACE_DIR
+
+# 같은 데스크톱의 COSFIM 드라이버(슬롯 스레드, 다른 프로세스의 worker_agent)가 함께 쓰는
+# 포커스/키보드/마우스/클립보드 입력 잠금 (Windows 이름 있는 뮤텍스, 같은 스레드는 다시 잡을 수 있음)
+GUI_INPUT_MUTEX = "Local\\COSFIM_GUI_INPUT"
+_WAIT_OBJECT_0 = 0x0
+_WAIT_ABANDONED = 0x80
+
+_kernel32 = None
+_gui_input_mutex = None
+_gui_input_mutex_lock = threading.Lock()
+
+
+def get_gui_input_mutex():
+    """프로세스 공용 입력 잠금 뮤텍스 핸들 (최초 호출 시 생성하거나 다른 프로세스의 것을 엶)"""
+    global _kernel32, _gui_input_mutex
+    with _gui_input_mutex_lock:
+        if _gui_input_mutex is None:
+            from ctypes import wintypes
+            kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+            kernel32.CreateMutexW.argtypes = (wintypes.LPVOID, wintypes.BOOL, wintypes.LPCWSTR)
+            kernel32.CreateMutexW.restype = wintypes.HANDLE
+            kernel32.WaitForSingleObject.argtypes = (wintypes.HANDLE, wintypes.DWORD)
+            kernel32.WaitForSingleObject.restype = wintypes.DWORD
+            kernel32.ReleaseMutex.argtypes = (wintypes.HANDLE,)
+            handle = kernel32.CreateMutexW(None, False, GUI_INPUT_MUTEX)
+            if not handle:
+                raise ctypes.WinError(ctypes.get_last_error())
+            _kernel32, _gui_input_mutex = kernel32, handle
+        return _gui_input_mutex
+
+
+def _try_acquire(mutex):
+    """기다리지 않고 뮤텍스를 잡아 봄 (잡은 스레드가 놓지 않고 끝났어도 잡힘)"""
+    return _kernel32.WaitForSingleObject(mutex, 0) in (_WAIT_OBJECT_0, _WAIT_ABANDONED)
+
+
+def is_cosfim_running(pid=None):
+    """COSFIM_GUI.exe (pid 지정 시 해당 프로세스) 실행 여부"""
+    if pid is None:
+        result = subprocess.run(['tasklist', '/FI', 'IMAGENAME eq COSFIM_GUI.exe'],
+                                capture_output=True, text=True, timeout=5)
+        return 'COSFIM_GUI.exe' in result.stdout
+    result = subprocess.run(['tasklist', '/FI', f'PID eq {pid}'],
+                            capture_output=True, text=True, timeout=5)
+    return str(pid) in result.stdout
+
+
+class PywinautoCosfimDriver:
+    """COSFIM_GUI.exe를 pywinauto(UIA)로 조작하는 드라이버 (Windows 전용)
+
+    CosfimHandler가 호출하는 드라이버 인터페이스:
+      launch() / health_check() / shutdown()  - 세션 수명 (CosfimSessionPool)
+      kill()                                   - 강제 종료 (워치독, 다른 스레드에서 호출)
+      bind(수계, 댐, wait_recorder, cancel_token)
+                                               - 작업 라벨, 대기 기록기, 취소 토큰 연결
+      prepare()                                - 메인 창과 입력 요소 확보
+      write_opt(opt_name, opt_data)            - OPT 파일 기록
+      load_opt()                               - 수계/댐 선택 후 OPT 불러오기
+      compute()                                - F5 연산 완료까지 대기
+      read_table()                             - 결과 테이블 TSV 반환
+
+    workspace(CosfimWorkspace)가 exclusive가 아니면 같은 호스트에 다른 슬롯의
+    COSFIM이 떠 있다는 뜻이므로, 작업 폴더를 작업 디렉토리로 실행하고
+    정리/강제 종료는 이 드라이버가 띄운 프로세스(PID)로 한정한다. COSFIM이
+    OPT를 작업 디렉토리 기준으로 읽는지 확인되기 전에는 SLOT_WORKSPACES가
+    False라서 이런 workspace를 받지 않는다 (make_slots도 workers를 1로 제한).
+
+    포커스를 잡고 키보드/마우스/클립보드를 쓰는 구간은 _input()으로 감싸서
+    같은 데스크톱의 다른 드라이버와 입력이 섞이지 않게 한다.
+    """
+    APP_PATH = r"C:\Program Files (x86)\KWater\댐군 홍수조절 연계 운영 시스템\COSFIM_GUI.exe"
+    BASE_FILE_DIR = BASE_WORKSPACE_DIR
+    WAIT_TIME = 0.1               # 조건 폴링 시작 간격
+    STEP_TIMEOUT = 5              # GUI 단계별 대기 한도
+    FOCUS_TIMEOUT = 1             # 포커스 확인 대기 한도 (초과해도 진행)
+    COMPUTE_TIMEOUT = 300         # F5 연산 결과 창 대기 한도
+    PROCESS_EXIT_TIMEOUT = 10     # 프로세스 종료 확인 대기 한도
+    LAUNCH_TIMEOUT = 45           # 프로세스 연결/로그인 창 대기 한도
+    ERROR_CHECK_TIMEOUT = 2       # OPT 불러오기 후 에러 창 확인 한도
+    # 결과 테이블 추출 방식: "clipboard" (복사/붙여넣기) 또는 "uia" (접근성 트리 직접 읽기)
+    TABLE_BACKEND = os.environ.get("COSFIM_TABLE_BACKEND", "clipboard")
+    INPUT_LOCK_TIMEOUT = 120      # 다른 드라이버의 입력 구간이 끝나기를 기다리는 한도
+    # 슬롯별 작업 폴더(작업 디렉토리)의 OPT를 COSFIM이 읽는지 Windows 호스트에서 확인한 뒤에만 켬
+    SLOT_WORKSPACES = os.environ.get("COSFIM_SLOT_WORKSPACES") == "1"
+
+    def __init__(self, user_id, user_pw, workspace=None):
+        if workspace is not None and not workspace.exclusive and not self.SLOT_WORKSPACES:
+            raise ValueError("COSFIM이 작업 디렉토리의 OPT를 읽는지 확인되지 않아 슬롯별 작업 폴더를 쓸 수 없습니다 "
+                             "(확인 후 COSFIM_SLOT_WORKSPACES=1)")
+        self.user_id = user_id
+        self.user_pw = user_pw
+        self.workspace = workspace or CosfimWorkspace(self.BASE_FILE_DIR)
+        self.pid = None
+        self.logger = logging.getLogger("PywinautoCosfimDriver")
+        self.app = None
+        self.main_win = None
+        self.is_new_instance = None
+        self.wait_recorder = WaitRecorder()
+        self.cancel_token = None
+        self.water_system_name = None
+        self.dam_name = None
+
+        # UI 요소
+        self.tool_bar = None
+        self.save_btn = None
+        self.load_btn = None
+        self.water_system_box = None
+        self.dam_box = None
+
+    def bind(self, water_system_name, dam_name, wait_recorder, cancel_token=None):
+        """이번 작업의 수계/댐, 대기 기록기, 취소 토큰 연결 (취소되면 대기 중에 WaitCancelled)"""
+        self.water_system_name = water_system_name
+        self.dam_name = dam_name
+        self.wait_recorder = wait_recorder
+        self.cancel_token = cancel_token
+
+#    def safe_close_existing_instances(self):
+#        """기존 COSFIM 인스턴스를 안전하게 종료"""
+#        try:
+#            existing_app = Application(backend='uia')
+#            existing_app.connect(title_re="COSFIM.*Web Service")
+#            
+#            # 기존 창들 정리
+#            for window in existing_app.windows():
+#                try:
+#                    window.close()
+#                    time.sleep(0.5)
+#                except:
+#                    pass
+#            
+#            self.logger.info("기존 COSFIM 인스턴스 정리 완료")
+#            time.sleep(2)  # 충분한 대기 시간
+#        except:
+#            self.logger.info("기존 COSFIM 인스턴스 없음")
+
+
+
+    def safe_close_existing_instances(self):
+        """기존 COSFIM 인스턴스를 안전하게 종료"""
+        self.logger.info("=== 기존 COSFIM 프로세스 정리 시작 ===")
+
+        # 1단계: UI를 통한 정상 종료 시도 (id.xml 권한 문제 우회)
+        try:
+            existing_app = Application(backend='uia')
+            existing_app.connect(title_re="COSFIM.*Web Service")
+
+            pids = []
+            for window in existing_app.windows():
+                try:
+                    pid = window.process_id()
+                    pids.append(pid)
+                    self._close_window_gracefully(window, pid)
+                    self.logger.info(f"기존 창 닫기: PID {pid}")
+                except Exception as e:
+                    self.logger.warning(f"기존 창 닫기 실패: {e}")
+
+            # 1.5단계: 여전히 살아있는 프로세스는 강제 종료
+            self._kill_remaining_pids(pids)
+        except Exception as e:
+            self.logger.info(f"UI 기반 정리 스킵 (기존 인스턴스 없음): {e}")
+            
+        # 2단계: 프로세스 이름으로 강제 정리
+        try:
+            if is_cosfim_running():
+                self.logger.warning("⚠️ 남아있는 COSFIM_GUI.exe 발견! 강제 종료...")
+                subprocess.run(['taskkill', '/F', '/IM', 'COSFIM_GUI.exe'], 
+                             capture_output=True, timeout=5)
+                self.logger.info("COSFIM_GUI.exe 강제 종료 완료")
+            else:
+                self.logger.info("남아있는 COSFIM_GUI.exe 프로세스 없음")
+        except Exception as e:
+            self.logger.warning(f"프로세스 이름 기반 정리 오류: {e}")
+        
+        # 3단계: 최종 확인 (프로세스가 사라질 때까지 대기)
+        elapsed = self._wait("existing_process_exit", lambda: not is_cosfim_running(),
+                             timeout=self.PROCESS_EXIT_TIMEOUT, required=False)
+        if elapsed is not None:
+            self.logger.info(f"✅ 기존 프로세스 정리 완료 확인 ({elapsed:.1f}초)")
+        else:
+            self.logger.warning("❌ 프로세스 정리 확인 시간 초과 - 계속 진행")
+
+    def _close_window_gracefully(self, window, pid):
+        """Alt+F4로 창을 닫고 저장 확인 창이 뜨면 '아니요' 선택"""
+        try:
+            with self._input("close_window"):
+                window.set_focus()
+                window.type_keys('%{F4}')  # Alt+F4
+                self.logger.info(f"UI 종료 시도 (Alt+F4): PID {pid}")
+
+                # 저장 확인 창이 뜨면 "아니요" 선택
+                try:
+                    confirm_win = window.child_window(title_re="선택|저장|알림", control_type="Window")
+                    if confirm_win.exists(timeout=2):
+                        no_btn = confirm_win.child_window(title_re="아니요|No", control_type="Button")
+                        if no_btn.exists(timeout=1):
+                            no_btn.click_input()
+                            self.logger.info(f"저장 확인 창 '아니요' 클릭: PID {pid}")
+                            self._wait("confirm_close", lambda: not confirm_win.exists(timeout=0), required=False)
+                except:
+                    pass
+
+        except Exception as e:
+            self.logger.warning(f"UI 종료 시도 실패: {e}")
+            # 실패하면 기존 방식 사용
+            window.close()
+
+    def _kill_remaining_pids(self, pids):
+        """정상 종료를 기다린 뒤 아직 살아있는 PID만 강제 종료"""
+        pids = set(pids)
+        if not pids:
+            return
+        self._wait("process_exit", lambda: not any(is_cosfim_running(pid) for pid in pids),
+                   timeout=self.PROCESS_EXIT_TIMEOUT, required=False)
+        for pid in pids:
+            try:
+                if is_cosfim_running(pid):
+                    subprocess.run(['taskkill', '/F', '/PID', str(pid)],
+                                 capture_output=True, timeout=5)
+                    self.logger.info(f"프로세스 강제 종료 완료: PID {pid}")
+            except Exception as e:
+                self.logger.warning(f"프로세스 강제 종료 실패 (PID {pid}): {e}")
+        self._wait("process_kill", lambda: not any(is_cosfim_running(pid) for pid in pids),
+                   timeout=self.PROCESS_EXIT_TIMEOUT, required=False)
+
+
+    def launch(self):
+        """앱 실행 - 기존 인스턴스 정리 후 새로 시작, 로그인, 업데이트 확인"""
+        try:
+            self.workspace.prepare()
+            # 기존 인스턴스 정리 (다른 슬롯과 호스트를 나눠 쓰면 생략)
+            if self.workspace.exclusive:
+                with self._stage("safe_close"):
+                    self.safe_close_existing_instances()
+
+            # 방법 1: subprocess로 직접 실행 (pywinauto.start() 대신)
+            self.logger.info("코스핌 실행 시작 (subprocess 방식)...")
+
+            # 프로세스 시작
+            with self._stage("launch"):
+                if self.workspace.exclusive:
+                    subprocess.Popen([self.APP_PATH], shell=True)
+                else:
+                    # 슬롯 작업 폴더에서 실행하고 PID로 연결 (다른 슬롯 인스턴스와 구분)
+                    self.pid = subprocess.Popen([self.APP_PATH], cwd=self.workspace.root).pid
+            self.logger.info(f"코스핌 프로세스 시작됨 (subprocess, {self.workspace})")
+
+            # 실행된 프로세스에 연결 (프로세스가 뜰 때까지 폴링)
+            self.logger.info("실행된 코스핌 프로세스에 연결 시도...")
+            with self._stage("connect"):
+                elapsed = self._wait("connect", self._try_connect, timeout=self.LAUNCH_TIMEOUT)
+            self.logger.info(f"코스핌 프로세스 연결 성공 ({elapsed:.1f}초)")
+
+            with self._stage("login"):
+                # 로그인 창이 나타날 때까지 대기
+                self.logger.info("로그인 창 대기 중...")
+                self.login_win = self.app.window(title_re="로그인")
+                try:
+                    self._wait("login_window", lambda: self._is_visible(self.login_win), timeout=self.LAUNCH_TIMEOUT)
+                except Exception as e:
+                    # 모든 창 확인
+                    with suppress(Exception):
+                        for idx, win in enumerate(self.app.windows()):
+                            self.logger.info(f"  창 {idx+1}: {win.window_text()}")
+                    self.logger.error(f"로그인 창을 찾을 수 없음: {e}")
+                    raise
+                self.logger.info("새 COSFIM 인스턴스 실행 성공")
+                self.is_new_instance = True
+
+                with self._input("login"):
+                    self._login()
+
+            with self._stage("update_check"):
+                self._update_check()
+
+        except Exception as e:
+            self.logger.error(f"앱 실행 실패: {e}")
+            raise
+
+    def _try_connect(self):
+        if self.pid is not None:
+            self.app = Application(backend="uia").connect(process=self.pid, timeout=1)
+        else:
+            self.app = Application(backend="uia").connect(path=self.APP_PATH, timeout=1)
+        return True
+
+    def _login(self):
+        self._set_focus(self.login_win, "login")
+        id_box = self.login_win.child_window(auto_id="textBox_ID", control_type="Edit")
+        self._wait("login_input", lambda: id_box.exists(timeout=0) and id_box.is_enabled())
+
+        id_box.type_keys(self.user_id)
+        self.login_win.child_window(auto_id="textBox_PWD", control_type="Edit").type_keys(self.user_pw)
+        #login_box = self.login_win.child_window(auto_id="textBox_ID", control_type="Edit")
+        #login_box.set_edit_text(self.user_id)
+
+        #pwd_box = self.login_win.child_window(auto_id="textBox_PWD", control_type="Edit")
+        #pwd_box.set_edit_text(self.user_pw)
+
+        self.login_win.child_window(auto_id="button_Accept", control_type="Button").click_input()
+        self._wait("login_close", lambda: not self.login_win.exists(timeout=0), required=False)
+        self.logger.info("로그인 성공")
+    
+    def _update_check(self):
+        try: 
+            update_win = self.app.window(title_re="선택")
+            main_win = self.app.window(title_re="COSFIM.*Web Service", control_type="Window")
+            # 업데이트 창 또는 메인 창 중 먼저 뜨는 쪽까지만 대기
+            self._wait("update_check", lambda: update_win.exists(timeout=0) or main_win.exists(timeout=0),
+                       timeout=self.STEP_TIMEOUT)
+            if not update_win.exists(timeout=0):
+                raise ElementNotFoundError()
+            with self._input("update_check"):
+                update_win.child_window(auto_id="7", control_type="Button").click_input()
+            self.logger.info("업데이트 요청 무시")
+        except:
+            self.logger.info("업데이트 요청 없음")
+            return
+
+    def health_check(self):
+        """메인 창 확인 후 이전 작업의 잔여 윈도우 정리"""
+        with self._input("health_check"):
+            self.main_win = self._main_win()
+            self._close_residue_windows()
+        return True
+
+    def shutdown(self):
+        """COSFIM 프로세스 종료 (이전 작업의 취소 토큰과 무관하게 끝까지 정리)"""
+        self.cancel_token = None
+        self.cleanup()
+
+    def kill(self):
+        """COSFIM 프로세스 강제 종료 (워치독 스레드에서 호출 - 멈춘 pywinauto 호출을 끊음)"""
+        if self.workspace.exclusive:
+            self.logger.warning("COSFIM_GUI.exe 강제 종료 (워치독)")
+            subprocess.run(['taskkill', '/F', '/IM', 'COSFIM_GUI.exe'], capture_output=True, timeout=5)
+        elif self.pid is not None:
+            self.logger.warning(f"COSFIM 강제 종료 (워치독, PID {self.pid})")
+            subprocess.run(['taskkill', '/F', '/T', '/PID', str(self.pid)], capture_output=True, timeout=5)
+
+    def prepare(self):
+        """메인 창, 툴바, 콤보박스 요소 확보"""
+        with self._input("prepare"):
+            self.main_win = self._main_win()
+            self._close_residue_windows()
+        self.tool_bar, self.save_btn, self.load_btn = self._tool_bar()   
+        self.water_system_box, self.dam_box, self.time_interval_box, self.time_picker_start = self._select_box()
+
+    def _stage(self, stage):
+        """처리 단계 소요 시간을 수계/댐 라벨로 기록 (metrics.STAGE_SECONDS)"""
+        return time_stage(stage, self.water_system_name, self.dam_name)
+
+    @contextmanager
+    def _input(self, name):
+        """포커스/키보드/마우스/클립보드를 쓰는 동안 같은 데스크톱의 다른 드라이버 입력을 막음 (중첩 가능)"""
+        mutex = get_gui_input_mutex()
+        self._wait(f"{name}_input_lock", lambda: _try_acquire(mutex), timeout=self.INPUT_LOCK_TIMEOUT)
+        try:
+            yield
+        finally:
+            _kernel32.ReleaseMutex(mutex)
+
+    def _wait(self, name, predicate, timeout=None, required=True):
+        """조건 기반 대기 (실제 소요 시간은 wait_recorder에 기록)"""
+        return wait_until(
+            predicate,
+            timeout=timeout or self.STEP_TIMEOUT,
+            name=name,
+            interval=self.WAIT_TIME,
+            recorder=self.wait_recorder,
+            raise_on_timeout=required,
+            cancel=self.cancel_token,
+        )
+
+    def _wait_gone(self, name, window, timeout=None):
+        """윈도우가 사라질 때까지 대기 (시간 초과 시 진행)"""
+        return self._wait(name, lambda: not window.exists(timeout=0), timeout=timeout, required=False)
+
+    @staticmethod
+    def _is_visible(window):
+        """윈도우가 존재하고 화면에 보이는지 (없으면 즉시 False)"""
+        return window.exists(timeout=0) and window.is_visible()
+
+    def _set_focus(self, window, name):
+        """포커스 설정 후 활성화될 때까지 대기"""
+        window.set_focus()
+        self._wait(f"{name}_focus", window.is_active, timeout=self.FOCUS_TIMEOUT, required=False)
+
+    def _main_win(self):
+        main_win = self.app.window(title_re="COSFIM.*Web Service", control_type="Window")
+        self._wait("main_window", lambda: self._is_visible(main_win), timeout=10)
+        self.logger.info("메인 창 로딩 완료")
+        self._set_focus(main_win, "main")
+        return main_win
+
+    def _close_windows(self, window):
+        """에러 무시하고 윈도우 제거"""
+        with suppress(Exception):
+            if window.exists():
+                self.logger.info(f"윈도우 제거: {window.window_text()}")
+                window.close()
+                self._wait_gone("close_window", window)
+
+    def _close_residue_windows(self):
+        """이전 실행에서 남은 윈도우가 있다면 제거"""
+        self.logger.info("불필요한 윈도우 정리 시작...")
+        data_output_wins = [
+            self.app.window(auto_id="GraphForm", control_type="Window"),            
+            self.app.window(auto_id="AnalysisForm", control_type="Window"),
+            self.app.window(auto_id="DiagramSlideForm", control_type="Window")
+        ]
+        for window in data_output_wins:
+            self._close_windows(window)
+
+        self._set_focus(self.main_win, "main")
+        error_wins = [
+            self.main_win.child_window(title="선택", control_type="Window"),
+            self.main_win.child_window(title="알림", control_type="Window"),
+        ]
+        for window in error_wins:            
+            with suppress(Exception):
+                if window.exists(timeout=0):
+                    self.logger.info(f"윈도우 제거: {window.window_text()}")
+                    window.child_window(title="아니요(N)", auto_id="7", control_type="Button").click_input()
+                    self._wait_gone("close_dialog", window)
+
+        self.logger.info("불필요한 윈도우 정리 완료")
+
+    def _focus_main_win(self):
+        self._set_focus(self.main_win, "main")
+
+    def _tool_bar(self):
+        tool_bar = self.main_win.child_window(auto_id="toolBar", control_type="ToolBar")
+        save_btn = tool_bar.child_window(title="현재 모의를 저장 합니다.", control_type="SplitButton")
+        load_btn = tool_bar.child_window(title="기존 모의를 읽어 옵니다.", control_type="SplitButton")
+        return tool_bar, save_btn, load_btn
+
+    def _select_box(self):
+        water_system_box = self.main_win.child_window(auto_id="comboBox_waterSystem", control_type="ComboBox")
+        dam_box = self.main_win.child_window(auto_id="comboBox_DamName", control_type="ComboBox")
+        time_interval_box = self.main_win.child_window(auto_id="comboBox_TimeInterval", control_type="ComboBox")
+        time_picker_start = self.main_win.child_window(auto_id="timePicker_Current", control_type="Pane")
+        return water_system_box, dam_box, time_interval_box, time_picker_start
+
+    def _select_combo_item(self, box, value, name):
+        """콤보박스 항목 선택 후 값이 반영될 때까지 대기"""
+        self._focus_main_win()
+        box.click_input()
+        item = box.child_window(title=value, control_type="ListItem")
+        self._wait(f"{name}_list", lambda: self._is_visible(item))
+        item.click_input()
+        self._wait(f"{name}_commit", lambda: box.selected_text() == value)
+
+    def _select_water_system(self):
+        self._select_combo_item(self.water_system_box, self.water_system_name, "water_system")
+        self.logger.info(f"수계 선택 {self.water_system_name=}")
+    
+    def _select_dam(self):
+        self._select_combo_item(self.dam_box, self.dam_name, "dam")
+        self.logger.info(f"댐 선택 {self.dam_name=}")
+    
+    def _check_error_window(self):
+        """에러 창을 확인하는 함수"""
+        try:
+            error_win = self.main_win.child_window(title="선택", control_type="Window")
+            self._wait("opt_error_check", lambda: self._is_visible(error_win), timeout=self.ERROR_CHECK_TIMEOUT)
+            self._set_focus(error_win, "error")
+
+            self.logger.info("OPT 파일 불러오기 중 에러 발생")
+            
+            error_title = "OPT 파일 불러오기 중 에러 발생"
+            try:
+                error_text_win = error_win.child_window(control_type="Text")
+                error_title = error_text_win.window_text()
+            except:
+                pass 
+            error_win.child_window(title="아니요(N)", control_type="Button").click_input()
+            self._wait_gone("error_close", error_win)
+            raise ValueError(f"에러 창 발생: {error_title}")
+        except ValueError as e:
+            raise 
+        except (ElementNotFoundError, TimeoutError, WaitTimeout):
+            self.logger.info("에러 창 없음 - 정상 진행")
+        except Exception as e:
+            self.logger.error(f"에러 창 확인 중 예상치 못한 에러: {e}")
+
+    def load_opt(self):
+        """수계/댐 선택 후 OPT 불러오기 (OPT 오류 창이 뜨면 ValueError)"""
+        try:
+            with self._input("load_opt"):
+                self._focus_main_win()
+                self._select_water_system()
+                self._select_dam()
+                self.load_btn.click_input()
+                self._check_error_window()
+            self.logger.info("OPT 파일 불러오기 완료")
+            #
+            # # OPT에서 안 불러와지는 항목들 수동 설정
+            # self._select_time_interval()
+            # self._select_time_picker_start_date()
+            # if self.time_interval in ["10분", "30분", "60분"]:
+            #     self._select_time_picker_start_hr_min()
+
+        except Exception as e:
+            self.logger.error(f"옵션 선택 중 에러 발생: {e}")
+            raise
+
+    # def _select_time_interval(self):
+    #     time_interval = self.time_interval
+    #     self._focus_main_win()
+    #     self.time_interval_box.click_input()
+    #     time.sleep(self.WAIT_TIME)
+    #     self.time_interval_box.child_window(title=time_interval, control_type="ListItem").click_input()
+    #     time.sleep(self.WAIT_TIME_LONG)
+    #     self.logger.info(f"시간 간격 선택 {time_interval=}")
+    #
+    # def _select_time_picker_start_date(self):
+    #     year, month, day = self.start_time[:3]
+    #     self._focus_main_win()
+    #     time_picker_start_date = self.time_picker_start.child_window(auto_id="dateTimePicker", control_type="Pane")
+    #
+    #     # 날짜-연
+    #     pywinauto.mouse.click(coords=(time_picker_start_date.rectangle().left+2, time_picker_start_date.rectangle().top+2))
+    #     time.sleep(self.WAIT_TIME_LONG)
+    #     pywinauto.keyboard.send_keys(year)
+    #     time.sleep(self.WAIT_TIME_LONG)
+    #
+    #     # 날짜-월
+    #     pywinauto.mouse.click(coords=(time_picker_start_date.rectangle().left+37, time_picker_start_date.rectangle().top+2))
+    #     time.sleep(self.WAIT_TIME_LONG)
+    #     pywinauto.keyboard.send_keys(month)
+    #     time.sleep(self.WAIT_TIME_LONG)
+    #
+    #     # 날짜-일
+    #     pywinauto.mouse.click(coords=(time_picker_start_date.rectangle().left+55, time_picker_start_date.rectangle().top+2))
+    #     time.sleep(self.WAIT_TIME_LONG)
+    #     pywinauto.keyboard.send_keys(day)
+    #     time.sleep(self.WAIT_TIME_LONG)
+    #     self.logger.info(f"시작 날짜 선택:{year}-{month}-{day}")
+    #
+    # def _select_time_picker_start_hr_min(self):
+    #     hr, min = self.start_time[-2:]
+    #     self._focus_main_win()
+    #     time_picker_start_hr = self.time_picker_start.child_window(auto_id="comboBox_Hour", control_type="ComboBox")
+    #     time_picker_start_min = self.time_picker_start.child_window(auto_id="comboBox_Minute", control_type="ComboBox")
+    #
+    #     # 시간
+    #     time_picker_start_hr.click_input()
+    #     time.sleep(self.WAIT_TIME_LONG_LONG)
+    #     time_picker_start_hr.child_window(title=hr, control_type="ListItem").click_input()
+    #     time.sleep(self.WAIT_TIME_LONG)
+    #     # 분
+    #     time_picker_start_min.click_input()
+    #     time.sleep(self.WAIT_TIME_LONG_LONG)
+    #     time_picker_start_min.child_window(title=min, control_type="ListItem").click_input()
+    #     time.sleep(self.WAIT_TIME_LONG)
+    #
+    #     self.logger.info(f"시작 시간 선택:{hr}:{min}")
+
+    def write_opt(self, opt_name, opt_data):
+        """COSFIM 작업 폴더의 {opt_name}.OPT에 OPT 내용 기록"""
+        opt_file_path = self.workspace.opt_path(opt_name)
+        self.logger.info(f"옵션 파일 경로 {opt_file_path=}")
+        with open(opt_file_path, "w") as f:
+            f.write(opt_data)
+        self.logger.info("OPT 파일 적용 완료")
+        return opt_file_path
+
+    def compute(self):
+        """F5 연산 실행 후 결과 창이 뜰 때까지 대기 (연산 중에는 입력 잠금을 놓음)"""
+        with self._input("compute"):
+            self._focus_main_win()
+            keyboard.send_keys("{F5}")
+        graph_win = self.app.window(auto_id="GraphForm", control_type="Window")
+        self._wait("compute", lambda: self._is_visible(graph_win), timeout=self.COMPUTE_TIMEOUT)
+
+    def read_table(self):
+        """결과 테이블을 TSV 텍스트로 읽은 뒤 결과 창 닫기"""
+        with self._input("read_table"):
+            return self._read_table()
+
+    def _read_table(self):
+        graph_win = self.app.window(auto_id="GraphForm", control_type="Window")
+        self._set_focus(graph_win, "graph")
+        table_tap = graph_win.child_window(auto_id="tabControl", control_type="Tab").child_window(title="테이블", control_type="TabItem")
+        table_tap.click_input()
+
+        table_area = graph_win.child_window(title="테이블", auto_id="tabPage_Table", control_type="Pane")
+        table_sheet = table_area.child_window(auto_id="sheet_DetailView", control_type="Pane")
+        self._wait("table_tab", lambda: self._is_visible(table_sheet))
+
+        table_data = None
+        if self.TABLE_BACKEND == "uia":
+            try:
+                table_data = self._read_table_uia(table_sheet)
+            except Exception as e:
+                self.logger.warning(f"접근성 트리 테이블 읽기 실패 - 클립보드 방식으로 전환: {e}")
+        if table_data is None:
+            table_data = self._read_table_clipboard(table_sheet)
+
+        analysis_win = self.app.window(auto_id="AnalysisForm", control_type="Window")
+        diagram_win = self.app.window(auto_id="DiagramSlideForm", control_type="Window")
+
+        graph_win.close()
+        analysis_win.close()
+        diagram_win.close()
+        for window in (graph_win, analysis_win, diagram_win):
+            self._wait_gone("result_close", window)
+
+        return table_data
+
+    def _read_table_uia(self, table_sheet):
+        """GridPattern/ValuePattern으로 셀 값을 일괄 읽기 (클립보드 미사용)"""
+        return GridTableReader(UiaGridProvider(table_sheet.wrapper_object())).read()
+
+    def _read_table_clipboard(self, table_sheet):
+        """시트 선택 후 Ctrl+C로 복사하여 클립보드에서 읽기"""
+        pywinauto.mouse.click(coords=(table_sheet.rectangle().left+2, table_sheet.rectangle().top+2))
+        pywinauto.keyboard.send_keys("+{RIGHT}" * 8)
+
+        # 복사 결과가 클립보드에 들어올 때까지 대기
+        pyperclip.copy("")
+        pywinauto.keyboard.send_keys("^c")
+        self._wait("clipboard", lambda: pyperclip.paste() != "")
+        return pyperclip.paste()
+
+#    def cleanup(self):
+#        """리소스 정리"""
+#        try:
+#            if self.app:
+#                for window in self.app.windows():
+#                    try:
+#                        window.close()
+#                    except:
+#                        pass
+#            self.logger.info("앱 정리 완료")
+#        except Exception as e:
+#            self.logger.error(f"정리 중 에러: {e}")
+
+    def cleanup(self):
+        """리소스 정리 - UI 기반 정상 종료 우선"""
+        pids = []
+
+        try:
+            # 1단계: 앱 객체를 통한 UI 기반 정상 종료 시도
+            if self.app:
+                self.logger.info("앱 객체를 통한 프로세스 정리 시작...")
+                for window in self.app.windows():
+                    try:
+                        pid = window.process_id()
+                        pids.append(pid)
+                        self._close_window_gracefully(window, pid)
+                        self.logger.info(f"창 닫기 완료: PID {pid}")
+
+                    except Exception as e:
+                        self.logger.warning(f"창 닫기 실패: {e}")
+
+                # 수집된 PID 중 아직 살아있는 프로세스만 강제 종료
+                self._kill_remaining_pids(pids)
+
+        except Exception as e:
+            self.logger.error(f"앱 객체 정리 중 에러: {e}")
+        
+        if not self.workspace.exclusive:
+            # 다른 슬롯의 COSFIM은 건드리지 않고 이 드라이버가 띄운 프로세스만 정리
+            if self.pid is not None:
+                self._kill_remaining_pids(pids + [self.pid])
+            return
+
+        # 2단계: 프로세스 이름으로 강제 정리 (안전장치)
+        try:
+            self.logger.info("프로세스 이름 기반 정리 시작...")
+            if is_cosfim_running():
+                self.logger.warning("⚠️ 남아있는 COSFIM_GUI.exe 프로세스 발견! 강제 종료 시도...")
+                subprocess.run(['taskkill', '/F', '/IM', 'COSFIM_GUI.exe'], 
+                             capture_output=True, timeout=5)
+                self.logger.info("COSFIM_GUI.exe 프로세스 강제 종료 완료")
+            else:
+                self.logger.info("남아있는 COSFIM_GUI.exe 프로세스 없음")
+                
+        except Exception as e:
+            self.logger.error(f"프로세스 이름 기반 정리 중 에러: {e}")
+        
+        # 3단계: 프로세스 완전 종료까지 대기 후 최종 확인
+        elapsed = self._wait("cleanup_process_exit", lambda: not is_cosfim_running(),
+                             timeout=self.PROCESS_EXIT_TIMEOUT, required=False)
+        if elapsed is not None:
+            self.logger.info("✅ 모든 COSFIM 프로세스 정리 완료")
+        else:
+            self.logger.error("❌ 일부 COSFIM 프로세스가 여전히 남아있을 수 있습니다")
@@ -0,0 +1,214 @@
+import time
+import random
+import logging
+import threading
+from datetime import timedelta
+
+from opt_document import OptDocument
+from wait_engine import WaitTimeout, WaitCancelled
+from metrics import time_stage
+
+# 실제 COSFIM에서 관찰되는 단계별 소요 시간 (초) - 벤치마크에서 time_scale로 축소해서 사용
+REALISTIC_LATENCIES = {
+    "launch": 20.0,           # 실행 + 로그인
+    "slow_launch": 40.0,      # 느린 실행 시 추가 시간
+    "update_dialog": 3.0,     # 업데이트 확인 창 처리
+    "prepare": 1.0,
+    "write_opt": 0.01,
+    "load_opt": 3.0,
+    "compute": 40.0,
+    "compute_timeout": 300.0, # 연산 결과 창이 끝내 뜨지 않을 때까지 기다린 시간
+    "read_table": 2.0,
+    "shutdown": 5.0,
+}
+
+# 장애 모드 (failures에 확률로 지정) - hang은 kill()될 때까지 연산이 끝나지 않음
+FAILURE_MODES = ("slow_launch", "update_dialog", "opt_error", "compute_timeout", "garbled_clipboard", "hang")
+
+
+class SimulatedCosfimDriver:
+    """리눅스에서 처리 흐름과 처리량을 검증하기 위한 COSFIM 모의 드라이버
+
+    cosfim_gui.PywinautoCosfimDriver와 같은 인터페이스를 제공한다.
+    latencies는 단계별 소요 시간(초, 기본 0)이고 time_scale을 곱해서 대기한다.
+    failures는 {장애 모드: 발생 확률}이며 모드는 FAILURE_MODES 참고.
+    kill()은 진행 중인 대기를 바로 끝내고 해당 호출이 RuntimeError로 실패하게 한다.
+    bind()로 받은 취소 토큰이 설정되면 대기 중에 WaitCancelled가 발생한다.
+    read_table()은 마지막으로 기록된 OPT의 시작 시간/연산 시간/분석단위에
+    맞는 결과 테이블을 돌려준다. workspace(CosfimWorkspace)가 주어지면
+    OPT를 실제로 그 폴더에 쓰고 load_opt()에서 다시 읽어 들인다.
+    """
+    COMPUTE_TIMEOUT = 300
+    CANCEL_POLL = 0.05            # 대기 중 취소 토큰 확인 간격
+
+    def __init__(self, user_id=None, user_pw=None, launch_delay=0.0, healthy=True,
+                 latencies=None, failures=None, time_scale=1.0, seed=None, workspace=None):
+        self.user_id = user_id
+        self.user_pw = user_pw
+        self.workspace = workspace
+        self.healthy = healthy
+        self.latencies = dict.fromkeys(REALISTIC_LATENCIES, 0.0)
+        self.latencies["launch"] = launch_delay
+        self.latencies.update(latencies or {})
+        self.failures = dict(failures or {})
+        unknown = set(self.failures) - set(FAILURE_MODES)
+        if unknown:
+            raise ValueError(f"알 수 없는 장애 모드: {sorted(unknown)}")
+        self.time_scale = time_scale
+        self.random = random.Random(seed)
+        self.logger = logging.getLogger("SimulatedCosfimDriver")
+
+        self.app = None
+        self.water_system_name = None
+        self.dam_name = None
+        self.wait_recorder = None
+        self.cancel_token = None
+        self.opt_document = None
+        self.opt_file_path = None
+        self._killed = threading.Event()
+
+        self.launch_count = 0
+        self.health_check_count = 0
+        self.shutdown_count = 0
+        self.kill_count = 0
+        self.failure_counts = dict.fromkeys(FAILURE_MODES, 0)
+
+    def _sleep(self, step):
+        delay = self.latencies.get(step, 0.0) * self.time_scale
+        if delay > 0:
+            self._pause(step, delay)
+
+    def _pause(self, step, delay=None):
+        """delay초(None이면 무기한) 대기 - kill()되면 RuntimeError, 작업이 취소되면 WaitCancelled"""
+        deadline = None if delay is None else time.monotonic() + delay
+        while True:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return
+            if self._killed.wait(self.CANCEL_POLL if remaining is None else min(remaining, self.CANCEL_POLL)):
+                raise RuntimeError(f"모의 COSFIM이 강제 종료됨 ({step} 중)")
+            if self.cancel_token is not None and self.cancel_token.is_set():
+                raise WaitCancelled(step, self.cancel_token.reason)
+
+    def _fails(self, mode):
+        if self.random.random() < self.failures.get(mode, 0.0):
+            self.failure_counts[mode] += 1
+            return True
+        return False
+
+    def _stage(self, stage):
+        return time_stage(stage, self.water_system_name, self.dam_name)
+
+    def bind(self, water_system_name, dam_name, wait_recorder, cancel_token=None):
+        self.water_system_name = water_system_name
+        self.dam_name = dam_name
+        self.wait_recorder = wait_recorder
+        self.cancel_token = cancel_token
+
+    def launch(self):
+        """실행 및 로그인 모의 (느린 실행, 업데이트 확인 창 포함)"""
+        self._killed.clear()
+        if self.workspace is not None:
+            self.workspace.prepare()
+        with self._stage("launch"):
+            self._sleep("launch")
+            if self._fails("slow_launch"):
+                self.logger.warning("모의 COSFIM 실행 지연")
+                self._sleep("slow_launch")
+        with self._stage("update_check"):
+            if self._fails("update_dialog"):
+                self.logger.info("모의 업데이트 요청 무시")
+                self._sleep("update_dialog")
+        self.app = object()
+        self.launch_count += 1
+        self.logger.info("모의 COSFIM 실행 및 로그인 완료")
+
+    def health_check(self):
+        """잔여 윈도우 정리 모의 - 인스턴스 정상 여부 반환"""
+        self.health_check_count += 1
+        return self.app is not None and self.healthy
+
+    def shutdown(self):
+        """프로세스 종료 모의 (이전 작업의 취소 토큰과 무관하게 끝까지 정리)"""
+        self.cancel_token = None
+        if not self._killed.is_set():
+            self._sleep("shutdown")
+        self.app = None
+        self.shutdown_count += 1
+        self.logger.info("모의 COSFIM 종료")
+
+    def kill(self):
+        """강제 종료 모의 (다른 스레드에서 호출)"""
+        self.app = None
+        self.kill_count += 1
+        self._killed.set()
+        self.logger.warning("모의 COSFIM 강제 종료")
+
+    def prepare(self):
+        if self.app is None:
+            raise RuntimeError("모의 COSFIM이 실행되지 않았습니다")
+        self._sleep("prepare")
+
+    def write_opt(self, opt_name, opt_data):
+        self._sleep("write_opt")
+        if self.workspace is None:
+            self.opt_document = OptDocument.parse(opt_data)
+            return f"{opt_name}.OPT"
+        self.opt_file_path = self.workspace.opt_path(opt_name)
+        with open(self.opt_file_path, "w") as f:
+            f.write(opt_data)
+        return self.opt_file_path
+
+    def load_opt(self):
+        """OPT 불러오기 모의 (opt_error 시 실제 드라이버와 같은 ValueError)"""
+        self._sleep("load_opt")
+        if self._fails("opt_error"):
+            raise ValueError("에러 창 발생: OPT 파일 불러오기 중 에러 발생")
+        if self.opt_file_path is not None:
+            # 실제 COSFIM처럼 작업 폴더의 파일을 읽음 (다른 슬롯이 덮어썼으면 그 내용이 결과에 반영됨)
+            with open(self.opt_file_path) as f:
+                self.opt_document = OptDocument.parse(f.read())
+
+    def compute(self):
+        """F5 연산 모의 (compute_timeout 시 결과 창 대기 시간 초과, hang 시 kill()/취소까지 멈춤)"""
+        if self._fails("hang"):
+            self.logger.warning("모의 COSFIM 응답 없음")
+            self._pause("compute")
+        if self._fails("compute_timeout"):
+            self._sleep("compute_timeout")
+            raise WaitTimeout("compute", self.COMPUTE_TIMEOUT)
+        self._sleep("compute")
+
+    def read_table(self):
+        """결과 테이블 복사 모의 (garbled_clipboard 시 헤더가 깨진 텍스트)"""
+        self._sleep("read_table")
+        doc = self.opt_document
+        steps = max(1, doc.total_steps * 60 // doc.interval) + 1
+        table = make_result_tsv(doc.start_time, steps, interval_minutes=doc.interval)
+        if self._fails("garbled_clipboard"):
+            # 복사 도중 끊긴 클립보드: 헤더 일부와 앞쪽 몇 줄만 남음
+            return table[len(RESULT_COLUMNS[0]) + 1:len(table) // 3]
+        return table
+
+
+RESULT_COLUMNS = [
+    "월일시분", "관측우량(mm)", "유효우량(mm)", "관측유입(㎥/s)", "계산유입(㎥/s)",
+    "댐수위(El. m)", "총방류(㎥/s)", "발전방류(㎥/s)", "여수로방류(㎥/s)",
+]
+
+
+def make_result_tsv(start_time, steps, interval_minutes=60):
+    """COSFIM 결과 테이블(클립보드 복사 형식)과 같은 모양의 TSV 생성"""
+    lines = ["\t".join(RESULT_COLUMNS)]
+    for i in range(steps):
+        t = start_time + timedelta(minutes=interval_minutes * i)
+        rain = (i * 7 % 11) * 0.5
+        inflow = 50.0 + (i % 48) * 3.25
+        lines.append("\t".join([
+            t.strftime("%Y-%m-%d %H:%M"),
+            f"{rain:.1f}", f"{rain * 0.6:.1f}",
+            f"{inflow:.2f}", f"{inflow * 0.97:.2f}",
+            f"{170.0 + i * 0.01:.2f}",
+            f"{inflow * 0.8:.2f}", f"{inflow * 0.5:.2f}", f"{inflow * 0.3:.2f}",
+        ]))
+    return "\r\n".join(lines) + "\r\n"
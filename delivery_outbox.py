@@ -0,0 +1,203 @@
+import os
+import json
+import time
+import heapq
+import random
+import logging
+import itertools
+import threading
+from datetime import datetime
+from contextlib import suppress
+from pathlib import Path
+
+from metrics import DELIVERIES, DELIVERY_SECONDS
+from result_archive import write_atomic, get_archiver
+
+# 작업 디렉토리 안의 전달 기록 파일 (전달되면 삭제)
+RECORD_NAME = "delivery.json"
+# 전달 1건의 최대 시도 횟수와 재시도 대기 (지수 백오프, 초)
+DELIVERY_MAX_ATTEMPTS = 8
+RETRY_BASE_SECONDS = 5
+RETRY_MAX_SECONDS = 300
+
+
+class DeliveryOutbox:
+    """결과 전달 대기열 (작업 디렉토리의 기록 파일로 영속화)
+
+    enqueue()는 바로 반환하고, 결과와 work_dir/delivery.json은 보관 스레드
+    (result_archive)가 쓴다. 전용 스레드 concurrency개가 deliver(record, data)로
+    메모리의 결과를 전달하고 (재시작 후 복구한 기록만 data가 None - 기록의 csv_path를 읽음),
+    실패하면 지수 백오프(retry_base ~ retry_max초, jitter)로 max_attempts까지 다시 시도한다.
+    예외에 retry_after가 있으면(CircuitOpenError) 그만큼은 기다린다. 재시도는 여기서만 하므로
+    deliver는 한 번만 시도해야 한다. max_attempts번 모두 실패하면 기록 파일을 지우고
+    give_up(record, error)을 호출한다 (TaskQueue는 작업을 실패로 기록하고 위젯에 알림).
+    전달된 기록 파일은 지우므로 재시작 후 recover()는 남은 work_*/delivery.json을
+    다시 대기열에 넣는다 (COSFIM을 다시 실행하지 않음). 기록 파일을 쓰기 전에 전달되면
+    기록 파일은 쓰지 않고, 쓰기 전에 프로세스가 죽은 결과는 재전달되지 않는다.
+    """
+    def __init__(self, deliver, concurrency=4, max_attempts=DELIVERY_MAX_ATTEMPTS,
+                 retry_base=RETRY_BASE_SECONDS, retry_max=RETRY_MAX_SECONDS, give_up=None):
+        self.deliver = deliver
+        self.give_up = give_up
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.logger = logging.getLogger("DeliveryOutbox")
+
+        self._cond = threading.Condition()
+        self._due = []              # (전달 시각(monotonic), 순번, 전달 항목)
+        self._seq = itertools.count()
+        self._in_flight = 0
+        self._running = False
+        self._workers = []
+
+        self.delivered_count = 0
+        self.gave_up_count = 0
+
+    def start(self):
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        for idx in range(self.concurrency):
+            worker = threading.Thread(target=self._worker_loop, name=f"delivery-{idx}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+        self.logger.info(f"결과 전달기 시작 (동시 전달 {self.concurrency})")
+
+    def stop(self, timeout=5):
+        """지금 전달할 수 있는 기록을 timeout 동안 전달한 뒤 중지 (남은 기록은 파일로 남아 재시작 때 전달)"""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while (self._in_flight or (self._due and self._due[0][0] <= time.monotonic())) and time.monotonic() < deadline:
+                self._cond.wait(timeout=max(0.0, deadline - time.monotonic()))
+            self._running = False
+            self._cond.notify_all()
+        for worker in self._workers:
+            worker.join(timeout=max(0.0, deadline - time.monotonic()))
+        self._workers = []
+        self.logger.info(f"결과 전달기 중지 (미전달 {self.depth()}건)")
+
+    def enqueue(self, work_dir, record, data=None):
+        """전달 대기열에 추가하고 기록 파일 쓰기는 보관 스레드에 맡김 (디스크 쓰기/전달을 기다리지 않음)
+
+        data(결과 bytes)가 주어지면 재시작 후 다시 보낼 수 있도록 record['csv_path']에도 쓴다.
+        """
+        record = dict(record, enqueued_at=datetime.now().isoformat(), attempts=0)
+        entry = self._entry(Path(work_dir) / RECORD_NAME, record, data, persisted=False)
+        if not get_archiver().submit(self._persist, entry['path'], entry):
+            self.logger.warning(f"전달 기록을 쓰지 못해 재시작 후에는 재전달되지 않음 ({record.get('task_id')})")
+        self._schedule(entry, time.monotonic())
+
+    def recover(self, root="."):
+        """재시작 전 전달하지 못한 work_*/delivery.json을 다시 대기열에 추가"""
+        paths = sorted(Path(root).glob(f"work_*/{RECORD_NAME}"))
+        for path in paths:
+            try:
+                with open(path, encoding="utf-8") as f:
+                    record = json.load(f)
+            except (OSError, ValueError) as e:
+                self.logger.error(f"전달 기록을 읽을 수 없음 ({path}): {e}")
+                continue
+            record['attempts'] = 0
+            self._schedule(self._entry(path, record, None, persisted=True), time.monotonic())
+        if paths:
+            self.logger.info(f"미전달 결과 {len(paths)}건 복구")
+        return len(paths)
+
+    def depth(self):
+        with self._cond:
+            return len(self._due) + self._in_flight
+
+    def stats(self):
+        with self._cond:
+            depth = len(self._due) + self._in_flight
+        return {'depth': depth, 'delivered': self.delivered_count, 'gave_up': self.gave_up_count}
+
+    @staticmethod
+    def _entry(path, record, data, persisted):
+        """전달 항목 (lock: 기록 파일 쓰기와 전달 완료 처리를 직렬화)"""
+        return {'path': path, 'record': record, 'data': data, 'persisted': persisted, 'done': False,
+                'lock': threading.Lock()}
+
+    @staticmethod
+    def _write(path, record):
+        write_atomic(path, json.dumps(record, ensure_ascii=False).encode("utf-8"))
+
+    def _persist(self, path, entry):
+        """보관 스레드에서 결과와 기록 파일 쓰기 (이미 전달되었으면 결과만 씀)"""
+        with entry['lock']:
+            if entry['data'] is not None:
+                write_atomic(entry['record']['csv_path'], entry['data'])
+            if not entry['done']:
+                self._write(path, entry['record'])
+                entry['persisted'] = True
+
+    def _schedule(self, entry, due):
+        with self._cond:
+            heapq.heappush(self._due, (due, next(self._seq), entry))
+            self._cond.notify()
+
+    @staticmethod
+    def _finish(entry):
+        """전달이 끝난 항목 (기록 파일이 이미 쓰였으면 삭제, 아직이면 쓰지 않게 함)"""
+        with entry['lock']:
+            entry['done'] = True
+            if entry['persisted']:
+                with suppress(FileNotFoundError):
+                    os.remove(entry['path'])
+
+    def _retry_delay(self, attempts, error):
+        delay = min(self.retry_max, self.retry_base * 2 ** (attempts - 1)) * random.uniform(0.5, 1.0)
+        return max(delay, getattr(error, "retry_after", 0) or 0)
+
+    def _worker_loop(self):
+        while True:
+            with self._cond:
+                while self._running and (not self._due or self._due[0][0] > time.monotonic()):
+                    self._cond.wait(timeout=self._due[0][0] - time.monotonic() if self._due else None)
+                if not self._running:
+                    return
+                _, _, entry = heapq.heappop(self._due)
+                self._in_flight += 1
+
+            record = entry['record']
+            try:
+                self.deliver(record, entry['data'])
+                error = None
+            except Exception as e:
+                error = e
+            latency = (datetime.now() - datetime.fromisoformat(record['enqueued_at'])).total_seconds()
+
+            if error is None:
+                self._finish(entry)
+                DELIVERIES.inc("delivered")
+                DELIVERY_SECONDS.observe(latency, "delivered")
+                self.delivered_count += 1
+            else:
+                record['attempts'] += 1
+                if record['attempts'] < self.max_attempts:
+                    delay = self._retry_delay(record['attempts'], error)
+                    self.logger.warning(f"결과 전달 실패 ({record.get('task_id')}, {record['attempts']}/"
+                                        f"{self.max_attempts}): {error} - {delay:.0f}초 후 재시도")
+                    DELIVERIES.inc("retry")
+                    with entry['lock']:
+                        if entry['persisted']:
+                            self._write(entry['path'], record)
+                    self._schedule(entry, time.monotonic() + delay)
+                else:
+                    # 실패로 알린 결과는 재시작 후에도 다시 보내지 않음 (결과 파일은 작업 폴더에 남음)
+                    self.logger.error(f"결과 전달 포기 ({record.get('task_id')}, {record['attempts']}회 실패): {error}")
+                    self._finish(entry)
+                    DELIVERIES.inc("gave_up")
+                    DELIVERY_SECONDS.observe(latency, "gave_up")
+                    self.gave_up_count += 1
+                    if self.give_up is not None:
+                        try:
+                            self.give_up(record, error)
+                        except Exception as e:
+                            self.logger.error(f"전달 포기 처리 실패 ({record.get('task_id')}): {e}")
+            with self._cond:
+                self._in_flight -= 1
+                self._cond.notify_all()
@@ -0,0 +1,196 @@
+import time
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+
+OPENMETRICS_CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+# GUI 단계(수백 ms ~ 수 분)와 큐 대기(수 초 ~ 수십 분)를 함께 담는 버킷 (초)
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_labels(labelnames, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    metric_type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name}: 라벨 {self.labelnames} 값이 필요합니다 (받은 값 {labels})")
+        return tuple("" if value is None else str(value) for value in labels)
+
+    def render(self):
+        lines = [f"# TYPE {self.name} {self.metric_type}", f"# HELP {self.name} {_escape(self.documentation)}"]
+        lines.extend(self._samples())
+        return lines
+
+
+class Counter(_Metric):
+    metric_type = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values = {}
+
+    def inc(self, *labels, amount=1):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}_total{_format_labels(self.labelnames, key)} {_format_value(value)}"
+                for key, value in items]
+
+
+class Gauge(_Metric):
+    metric_type = "gauge"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values = {}
+
+    def set(self, value, *labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def _samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+                for key, value in items]
+
+
+class Histogram(_Metric):
+    metric_type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._series = {}   # 라벨 값 -> [버킷별 개수(누적 아님), 합계, 개수]
+
+    def observe(self, value, *labels):
+        key = self._key(labels)
+        idx = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            series[0][idx] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, *labels):
+        """with 블록 소요 시간을 기록 (예외가 나도 기록)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labels)
+
+    def _samples(self):
+        with self._lock:
+            items = sorted((key, (list(series[0]), series[1], series[2])) for key, series in self._series.items())
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, ("le", _format_value(float(bound))))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_count{labels} {count}")
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        return lines
+
+
+class MetricsRegistry:
+    """프로세스 내 지표 모음 - render()는 OpenMetrics 텍스트 형식"""
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"이미 등록된 지표입니다: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "cosfim_stage_seconds", "COSFIM 처리 단계별 소요 시간", ("stage", "water_system", "dam"))
+QUEUE_WAIT_SECONDS = REGISTRY.histogram(
+    "cosfim_queue_wait_seconds", "작업 제출부터 처리 시작까지 대기 시간", ("water_system", "dam"))
+TASK_SECONDS = REGISTRY.histogram(
+    "cosfim_task_seconds", "작업 처리 시작부터 결과 기록까지 소요 시간", ("water_system", "dam", "status"))
+TASKS = REGISTRY.counter(
+    "cosfim_tasks", "처리 완료된 작업 수", ("water_system", "dam", "status"))
+STALLS = REGISTRY.counter(
+    "cosfim_stalls", "단계별 시간 예산을 넘겨 워치독이 중단시킨 작업 수", ("stage", "water_system", "dam", "action"))
+QUEUE_DEPTH = REGISTRY.gauge("cosfim_queue_depth", "처리 대기 중인 작업 수")
+ADMISSION_REJECTED = REGISTRY.counter(
+    "cosfim_admission_rejected", "대기열 용량/세션 한도 초과로 거절된 제출 수", ("reason",))
+CALLBACK_QUEUE_DEPTH = REGISTRY.gauge("cosfim_callback_queue_depth", "전송 대기 중인 채팅 콜백 수")
+CALLBACK_LATENCY_SECONDS = REGISTRY.histogram(
+    "cosfim_callback_latency_seconds", "채팅 콜백 대기 + 전송 시간", ("type", "outcome"))
+FORWARD_ATTEMPT_SECONDS = REGISTRY.histogram(
+    "cosfim_forward_attempt_seconds", "위젯 업로드 시도 1회 소요 시간", ("host", "outcome"))
+FORWARD_BREAKER_STATE = REGISTRY.gauge(
+    "cosfim_forward_breaker_state", "위젯 업로드 차단기 상태 (0 닫힘, 1 반개방, 2 열림)", ("host",))
+FORWARD_SHORT_CIRCUITED = REGISTRY.counter(
+    "cosfim_forward_short_circuited", "차단기가 열려 보내지 않고 바로 실패시킨 업로드 수", ("host",))
+OUTBOX_DEPTH = REGISTRY.gauge("cosfim_outbox_depth", "전달 대기 중인 결과 수 (재시도 대기 포함)")
+DELIVERIES = REGISTRY.counter(
+    "cosfim_deliveries", "결과 전달 시도 결과 (delivered, retry, gave_up)", ("outcome",))
+DELIVERY_SECONDS = REGISTRY.histogram(
+    "cosfim_delivery_seconds", "결과 기록부터 전달 완료까지 시간", ("outcome",))
+
+
+def time_stage(stage, water_system=None, dam=None):
+    """처리 단계 타이머 (with 블록)"""
+    return STAGE_SECONDS.time(stage, water_system, dam)
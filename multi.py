@@ -3,28 +3,34 @@ import os
 import sys
 import time
 import logging
-import pywinauto
-from pywinauto.application import Application
-import pywinauto.keyboard as keyboard
-import pyperclip
-import pandas as pd
-from io import StringIO
-import requests
-from pywinauto.timings import TimeoutError
-from pywinauto.findwindows import ElementNotFoundError
-from contextlib import suppress
 import threading
 import queue
 from datetime import datetime
 import uuid
 import json
 from pathlib import Path
-import subprocess
+from functools import partial
+from session_pool import CosfimSessionPool
+from workspace import make_workspaces, BASE_WORKSPACE_DIR, SLOT_WORKSPACE_ROOT
+from wait_engine import WaitRecorder, CancellationToken
+from callback_dispatcher import get_dispatcher
+from upload_client import get_upload_client
+from delivery_outbox import DeliveryOutbox
+from result_archive import get_archiver
+from result_cache import make_result_key
+from opt_document import OptDocument
+from result_table import (parse_result_table, serialize_result, check_result_format,
+                          RESULT_FORMATS, DEFAULT_RESULT_FORMAT)
+from result_log import ResultLog
+from task_scheduler import (PriorityTaskQueue, DurationEstimator, AdmissionError,
+                            PRIORITY_CLASSES, DEFAULT_PRIORITY)
+from metrics import time_stage, QUEUE_WAIT_SECONDS, TASK_SECONDS, TASKS, ADMISSION_REJECTED, STALLS
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - [%(name)s] %(message)s')
 
 
 def create_call_back_message(callback_type:str,process: str,session_id : str, message : str):
+    """채팅 콜백을 전송 대기열에 추가 (전송은 CallbackDispatcher가 비동기로 처리)"""
     callback_message = {
         "type" : callback_type,
         "process" : process,
@@ -33,70 +39,490 @@ def create_call_back_message(callback_type:str,process: str,session_id : str, me
         "data" : None
     }
     
-    print("this is callback message :" , callback_message)
-    headers = {'Content-Type' : 'application/json; charset=utf-8'}
-    response = requests.post(
-                            f'http://223.130.139.28/api/v1/chat/callback/cosfim?sessionId={session_id}', 
-                            json=callback_message,
-                            headers = headers
-                        )
-
-    print(response)
+    logging.info(f"this is callback message : {callback_message}")
+    get_dispatcher().enqueue(session_id, callback_message)
+
+
+# 작업 1건 전체 제한 시간 (초) - 단계별 예산은 아래 비율로 나눠 씀
+TASK_TIMEOUT = 900
+# 작업 단계가 끝나야 하는 시점 (작업 시작부터 TASK_TIMEOUT에 대한 누적 비율)
+# 앞 단계가 빨리 끝나면 남은 시간은 뒤 단계가 쓴다
+STAGE_DEADLINE_SHARES = {
+    "launching": 0.25, "preparing": 0.35, "computing": 0.8, "extracting": 0.9, "forwarding": 1.0,
+}
+# 시간 예산을 넘긴 작업을 다시 대기열에 넣는 횟수 (넘으면 실패 처리)
+MAX_STALL_RETRIES = 1
+WATCHDOG_INTERVAL = 1.0
+# stop_worker()에서 처리 중인 작업을 기다리는 최대 시간 (초)
+STOP_JOIN_TIMEOUT = 30
+# 원격 워커 임대 기간 (초) - 이 안에 heartbeat가 없으면 작업을 다시 대기열에 넣음
+LEASE_SECONDS = 60
+# 마지막 요청 후 이 시간(초)이 지나지 않은 원격 워커를 처리 용량으로 셈
+AGENT_TTL = LEASE_SECONDS * 2
+# 결과 포워딩을 동시에 처리하는 전달 스레드 수 (MultiCosfimManager 기본값)
+DELIVERY_CONCURRENCY = 4
+
+
+class TaskAborted(Exception):
+    """취소 토큰이 설정된 작업 (단계 경계에서 발생, 사유는 "cancelled" 또는 "stalled")"""
+
+
+def load_driver_factory(name=None):
+    """COSFIM 드라이버 클래스 (COSFIM_DRIVER 환경변수: gui 기본, sim은 모의 드라이버)
+
+    pywinauto는 gui 드라이버를 쓸 때만 불러오므로 이 모듈은 리눅스에서도 import 가능하다.
+    """
+    name = name or os.environ.get("COSFIM_DRIVER", "gui")
+    if name == "sim":
+        from cosfim_sim import SimulatedCosfimDriver
+        return SimulatedCosfimDriver
+    from cosfim_gui import PywinautoCosfimDriver
+    return PywinautoCosfimDriver
 
 
 class TaskQueue:
-    """작업 큐 관리 클래스"""
-    def __init__(self):
-        self.task_queue = queue.Queue()
-        self.result_queue = queue.Queue()
+    """작업 큐 관리 클래스
+
+    max_queue_size(대기 작업 수)와 max_pending_per_session(채팅 세션별 대기+처리 중
+    작업 수)을 넘는 add_task()는 AdmissionError로 거절한다 (None이면 제한 없음).
+
+    워치독 스레드는 처리 중인 작업이 단계별 시간 예산(task_timeout x
+    STAGE_DEADLINE_SHARES)을 넘기면 COSFIM을 강제 종료하고, 멈춘 워커
+    스레드를 버린 뒤 새 워커로 대기열 처리를 이어간다. 멈춘 작업은
+    MAX_STALL_RETRIES번까지 다시 대기열에 넣고 그 뒤로는 실패 처리한다.
+
+    cancel_task()는 대기 중인 작업을 바로 취소하고, 처리 중인 작업은 취소
+    토큰을 설정해 CosfimHandler가 다음 단계 경계나 GUI 대기 중에 멈추게 한다.
+
+    slots는 워커 슬롯 목록이다. 슬롯마다 워커 스레드 하나가 같은 대기열에서
+    작업을 꺼내고, 슬롯의 driver_factory/session_pool(작업 폴더가 분리된
+    COSFIM 인스턴스)로 처리한다 (make_slots() 참고). 주어지지 않으면
+    session_pool/driver_factory로 된 슬롯 하나로 순차 처리한다.
+
+    다른 호스트의 워커(worker_agent.py)는 lease_task()로 작업을 임대하고
+    heartbeat_lease()로 임대를 연장하며 complete_lease()로 결과 CSV를 올린다.
+    포워딩은 이 노드가 한다. 임대 기간 안에 heartbeat가 없거나 단계 예산을
+    넘긴 임대는 워치독이 회수해서 멈춘 작업과 같이 재시도/실패 처리한다.
+
+    delivery_concurrency가 주어지면 결과 CSV 포워딩을 워커 스레드에서 하지 않고
+    작업 폴더에 전달 기록만 남긴 뒤 DeliveryOutbox가 따로 전달한다. 작업은
+    CSV가 저장되면 완료되고, 업로드가 실패해도 COSFIM을 다시 실행하지 않으며
+    재시작 전 전달하지 못한 결과는 start_worker()에서 다시 전달한다.
+
+    결과 CSV는 메모리에서 바로 업로드하고, archive_results면 작업 폴더에
+    비동기로 보관한다 (result_archive). DeliveryOutbox를 쓰면 재전달을 위해
+    항상 작업 폴더에 쓴다.
+    """
+    def __init__(self, session_pool=None, store=None, result_cache=None, driver_factory=None,
+                 max_queue_size=None, max_pending_per_session=None, task_timeout=TASK_TIMEOUT, slots=None,
+                 delivery_concurrency=None, archive_results=True):
+        self.task_queue = PriorityTaskQueue()
+        self.result_log = ResultLog()
         self.is_running = False
-        self.worker_thread = None
+        self.watchdog_thread = None
+        self.task_timeout = task_timeout
+        # 워커별 실행 상태 (작업, 단계, 단계 마감, 중단 이벤트)
+        self._runs = []
+        self._active_runs = {}          # task_id -> 처리 중인 워커 실행 상태 (원격 임대 포함)
+        self._runs_lock = threading.Lock()
+        # 원격 워커 임대 (lease_id -> 임대 상태)와 원격 워커별 마지막 요청 시각
+        self._leases = {}
+        self._agents = {}
+        if slots is None:
+            slots = [{'index': 0, 'workspace': None, 'driver_factory': driver_factory, 'session_pool': session_pool}]
+        self.slots = slots
+        self.store = store
+        self.result_cache = result_cache
+        self.outbox = (DeliveryOutbox(self._deliver_record, delivery_concurrency, give_up=self._give_up_record)
+                       if delivery_concurrency else None)
+        self.archive_results = archive_results
+        self._stage_listeners = []
+        # 댐별 최근 처리 시간 (대기열 ETA 추정용)
+        self.durations = DurationEstimator()
+        # 입장 제어 (세션별 대기+처리 중 작업 수)
+        self.max_queue_size = max_queue_size
+        self.max_pending_per_session = max_pending_per_session
+        self._admission_lock = threading.Lock()
+        self._pending_sessions = {}     # task_id -> session_id
+        self._session_pending = {}      # session_id -> 대기+처리 중 작업 수
+        self._admitting = 0             # 입장했지만 아직 큐에 넣지 않은 작업 수 (저장소 커밋 대기)
+        # 대기/실행 중인 동일 작업 (수계, 댐, OPT 해시 -> 대표 작업)
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+        # 결과가 나오지 않은 작업 (task_id -> 작업, 취소 조회용)
+        self._tasks = {}
+        if self.store:
+            self._resume_from_store()
         
     def add_task(self, task_data):
-        """작업을 큐에 추가"""
+        """작업을 큐에 추가 (결과 캐시에 있으면 대기열/입장 제어 없이 바로 전달)"""
         task_id = str(uuid.uuid4())
         task = {
             'id': task_id,
             'timestamp': datetime.now(),
             'data': task_data
         }
-        self.task_queue.put(task)
-        logging.info(f"Task added to queue: {task_id}")
+        if self._serve_cached_on_submit(task):
+            return task_id
+        with self._admission_lock:
+            self._admit(task_data)
+            # 자리만 잡아 두고 저장소 커밋은 잠금 밖에서 기다림 (다른 제출을 막지 않음)
+            self._admitting += 1
+            self._reserve_session(task_id, task_data.get('session_id'))
+        try:
+            if self.store:
+                # 큐에 넣기 전에 저장소에 커밋 (재시작 시 복구 가능)
+                self.store.insert_task(task_id, task_data, created_at=task['timestamp'])
+        except Exception:
+            self._release_session(task_id)
+            raise
+        else:
+            self._enqueue(task)
+        finally:
+            with self._admission_lock:
+                self._admitting -= 1
         return task_id
+
+    def _serve_cached_on_submit(self, task):
+        """캐시 적중 작업을 제출한 스레드에서 바로 전달하고 결과 발행 (캐시에 없으면 False)"""
+        if not self.result_cache:
+            return False
+        data = self.result_cache.read(self._cache_key(task['data']))
+        if data is None:
+            return False
+        task['cancel_token'] = CancellationToken()
+        if self.store:
+            # 완료 기록보다 먼저 커밋되므로(같은 쓰기 스레드) 기다리지 않음
+            self.store.insert_task(task['id'], task['data'], created_at=task['timestamp'], wait=False)
+        started = time.perf_counter()
+        try:
+            result = self._deliver_cached(task, self._create_forwarder(task['data']), self._work_dir(task['id']), data)
+        except Exception as e:
+            logging.error(f"Task {task['id']} failed: {e}")
+            result = {'task_id': task['id'], 'success': False, 'error': str(e)}
+        self._finish_task(task, result, time.perf_counter() - started)
+        return True
+
+    def _admit(self, task_data):
+        """대기열 용량과 세션별 한도 확인 (초과 시 AdmissionError)"""
+        session_id = task_data.get('session_id')
+        if self.max_queue_size is not None and self.task_queue.qsize() + self._admitting >= self.max_queue_size:
+            reason, message = "queue_full", f"대기열이 가득 찼습니다 ({self.max_queue_size}개)"
+        elif (self.max_pending_per_session is not None
+              and self._session_pending.get(session_id, 0) >= self.max_pending_per_session):
+            reason, message = "session_quota", f"세션 {session_id}의 대기 작업이 한도({self.max_pending_per_session}개)에 도달했습니다"
+        else:
+            return
+        ADMISSION_REJECTED.inc(reason)
+        raise AdmissionError(message, reason, retry_after=max(1, round(self._next_completion())))
+
+    def _enqueue(self, task):
+        """동일 작업이 대기/실행 중이면 그 작업의 구독자로 연결, 아니면 큐에 추가"""
+        task_data = task['data']
+        task['priority'] = task_data.get('priority') or DEFAULT_PRIORITY
+        task['deadline'] = datetime.fromisoformat(task_data['deadline']) if task_data.get('deadline') else None
+        task['cancel_token'] = CancellationToken()
+        key = self._cache_key(task_data)
+        with self._inflight_lock:
+            leader = self._inflight.get(key)
+            if leader is not None:
+                leader['subscribers'].append(task)
+                task['leader'] = leader
+                # 대표 작업은 연결된 작업 중 가장 높은 우선순위와 가장 늦은 마감 시간을 따름
+                self.task_queue.promote(leader, task['priority'])
+                if leader['deadline'] is not None:
+                    leader['deadline'] = max(leader['deadline'], task['deadline']) if task['deadline'] else None
+            else:
+                task['dedup_key'] = key
+                task['subscribers'] = []
+                self._inflight[key] = task
+            self._tasks[task['id']] = task
+        self._reserve_session(task['id'], task_data.get('session_id'))
+        self._emit_stage(task, "queued")
+        if leader is not None:
+            logging.info(f"Task {task['id']} attached to in-flight task {leader['id']}")
+        else:
+            self.task_queue.put(task)
+            logging.info(f"Task added to queue: {task['id']}")
+
+    def _reserve_session(self, task_id, session_id):
+        """세션별 대기+처리 중 작업 수에 task_id를 더함 (이미 더했으면 무시)"""
+        with self._inflight_lock:
+            if task_id not in self._pending_sessions:
+                self._pending_sessions[task_id] = session_id
+                self._session_pending[session_id] = self._session_pending.get(session_id, 0) + 1
+
+    def _release_session(self, task_id):
+        """세션별 대기+처리 중 작업 수에서 task_id를 뺌"""
+        with self._inflight_lock:
+            if task_id in self._pending_sessions:
+                session_id = self._pending_sessions.pop(task_id)
+                self._session_pending[session_id] -= 1
+                if not self._session_pending[session_id]:
+                    del self._session_pending[session_id]
+
+    def cancel_task(self, task_id):
+        """작업 취소 - "cancelled"(대기 중이라 바로 취소), "cancelling"(처리 중, 다음 단계에서 중단), 없으면 None"""
+        with self._inflight_lock:
+            task = self._tasks.get(task_id)
+            if task is None or task['cancel_token'].is_set():
+                return None
+            task['cancel_token'].cancel("cancelled")
+            leader = task.get('leader')
+            if leader is not None:
+                # 동일 작업에 연결된 구독자: 연결만 끊음 (대표 작업은 계속)
+                leader['subscribers'].remove(task)
+            elif self.task_queue.cancel(task):
+                if self._inflight.get(task['dedup_key']) is task:
+                    del self._inflight[task['dedup_key']]
+            else:
+                leader = task     # 처리 중 - 취소 토큰으로 중단
+        if leader is task:
+            logging.info(f"Task {task_id} 취소 요청 (처리 중)")
+            return "cancelling"
+        logging.info(f"Task {task_id} 취소")
+        self._publish_result(task, self._cancelled_result(task))
+        return "cancelled"
+
+    @staticmethod
+    def _cancelled_result(task):
+        return {'task_id': task['id'], 'success': False, 'error': "사용자 요청으로 취소됨", 'cancelled': True}
+
+    def _emit_result(self, result):
+        with self._inflight_lock:
+            self._tasks.pop(result.get('task_id'), None)
+        self._release_session(result.get('task_id'))
+        self.result_log.append(result)
+
+    def add_stage_listener(self, listener):
+        """작업 단계가 바뀔 때마다 워커 스레드에서 listener(task_id, stage)를 호출하도록 등록
+
+        단계: queued, launching, preparing, computing, extracting, forwarding
+        (완료/실패는 결과 로그로 전달)
+        """
+        self._stage_listeners.append(listener)
+
+    def _emit_stage(self, task, stage):
+        """작업과 그 작업에 연결된 동일 작업들에 단계 변경 알림"""
+        run = self._active_runs.get(task['id'])
+        if run is not None and stage in STAGE_DEADLINE_SHARES:
+            run['stage'] = stage
+            run['deadline'] = run['started'] + self.task_timeout * STAGE_DEADLINE_SHARES[stage]
+        if not self._stage_listeners:
+            return
+        with self._inflight_lock:
+            attached = [task] + list(task.get('subscribers', []))
+        for attached_task in attached:
+            for listener in self._stage_listeners:
+                try:
+                    listener(attached_task['id'], stage)
+                except Exception as e:
+                    logging.error(f"단계 리스너 호출 실패: {e}")
+
+    def _estimate(self, task):
+        return self.durations.estimate(task['data']['water_system_name'], task['data']['dam_name'])
+
+    def running_tasks(self):
+        """처리 중인 (작업, 시작 시각) 목록 (로컬 슬롯 순서, 그 뒤로 원격 임대)"""
+        runs = list(self._runs) + list(self._leases.values())
+        return [(run['task'], run['started']) for run in runs if run['task'] is not None]
+
+    def active_agents(self):
+        """최근 AGENT_TTL초 안에 요청한 원격 워커 ID 목록"""
+        now = time.perf_counter()
+        return [agent_id for agent_id, seen in list(self._agents.items()) if now - seen < AGENT_TTL]
+
+    def _remaining(self, task, started):
+        return max(0.0, self._estimate(task) - (time.perf_counter() - started))
+
+    def _next_completion(self):
+        """처리 중인 작업 중 가장 먼저 끝날 때까지 예상 시간(초), 처리 중인 작업이 없으면 작업 1건 예상 시간"""
+        running = self.running_tasks()
+        if not running:
+            return self.durations.estimate(None, None)
+        return min(self._remaining(task, started) for task, started in running)
+
+    def estimate_wait(self, priority=None):
+        """처리 중인 작업과 대기 작업이 끝날 때까지 예상 시간(초)
+
+        priority가 주어지면 그 클래스 이상의 대기 작업만 센다 (에이징 무시).
+        작업별 시간은 댐별 최근 처리 시간의 중앙값 (DurationEstimator)이고,
+        슬롯/원격 워커가 여러 개면 남은 작업 시간 합을 그 수로 나눈다.
+        """
+        remaining = sum(self._estimate(task) for task in self.task_queue.queued_tasks(priority))
+        remaining += sum(self._remaining(task, started) for task, started in self.running_tasks())
+        return remaining / max(1, len(self.slots) + len(self.active_agents()))
+
+    def _resume_from_store(self):
+        """재시작 전 대기 중이던 작업을 제출 순서대로 다시 큐에 추가"""
+        queued_tasks = self.store.recover()
+        for stored in queued_tasks:
+            self._enqueue({
+                'id': stored['task_id'],
+                'timestamp': datetime.fromisoformat(stored['created_at']),
+                'data': stored['task_data']
+            })
+        if queued_tasks:
+            logging.info(f"저장소에서 대기 작업 {len(queued_tasks)}개 복구")
     
     def start_worker(self):
-        """워커 스레드 시작"""
+        """워커 스레드와 워치독 스레드 시작"""
         if not self.is_running:
             self.is_running = True
-            self.worker_thread = threading.Thread(target=self._worker_loop)
-            self.worker_thread.daemon = True
-            self.worker_thread.start()
-            logging.info("Worker thread started")
+            if self.outbox:
+                self.outbox.start()
+                self.outbox.recover()
+            for slot in self.slots:
+                self._start_worker_thread(slot)
+            self.watchdog_thread = threading.Thread(target=self._watchdog_loop, daemon=True)
+            self.watchdog_thread.start()
+            logging.info(f"Worker thread started ({len(self.slots)} slots)")
+
+    def _start_worker_thread(self, slot):
+        run = {'slot': slot, 'task': None, 'stage': None, 'started': None, 'deadline': None,
+               'handler': None, 'abort': threading.Event()}
+        run['thread'] = threading.Thread(target=self._worker_loop, args=(run,), daemon=True,
+                                         name=f"cosfim-worker-{slot['index']}")
+        self._runs.append(run)
+        run['thread'].start()
     
     def stop_worker(self):
-        """워커 스레드 중지"""
+        """워커 스레드 중지 (처리 중인 작업은 STOP_JOIN_TIMEOUT까지 기다린 뒤 강제 종료)"""
         self.is_running = False
-        self.task_queue.put(None)  # 종료 신호
-        if self.worker_thread:
-            self.worker_thread.join()
+        runs = list(self._runs)
+        for _ in runs:
+            self.task_queue.put(None)  # 종료 신호
+        for run in runs:
+            run['thread'].join(STOP_JOIN_TIMEOUT)
+            if run['thread'].is_alive():
+                logging.warning(f"워커가 {STOP_JOIN_TIMEOUT}초 안에 끝나지 않아 COSFIM 강제 종료 (작업 {run['task'] and run['task']['id']})")
+                self._abort_run(run)
+                run['thread'].join(WATCHDOG_INTERVAL * 5)
+        if self.watchdog_thread:
+            self.watchdog_thread.join()
+        if self.outbox:
+            # 전달하지 못한 결과는 작업 폴더의 기록으로 남아 재시작 때 전달
+            self.outbox.stop(timeout=STOP_JOIN_TIMEOUT)
+        for slot in self.slots:
+            if slot['session_pool']:
+                slot['session_pool'].shutdown(timeout=STOP_JOIN_TIMEOUT)
+        if self.store:
+            self.store.flush()
         logging.info("Worker thread stopped")
-    
-    def _worker_loop(self):
-        """워커 루프 - 순차적으로 작업 처리"""
+
+    def _watchdog_loop(self):
+        """처리 중인 작업의 단계 마감을 확인하고 넘긴 작업을 중단"""
         while self.is_running:
+            time.sleep(WATCHDOG_INTERVAL)
+            now = time.perf_counter()
+            for run in list(self._runs):
+                with self._runs_lock:
+                    # 워커가 결과를 내기 직전이면 중단하지 않음 (워커도 같은 잠금에서 확인)
+                    stalled = run['task'] is not None and not run['abort'].is_set() and now > run['deadline']
+                    if stalled:
+                        run['abort'].set()
+                if stalled:
+                    try:
+                        self._handle_stall(run)
+                    except Exception as e:
+                        logging.error(f"워치독 처리 실패: {e}")
+            for lease in list(self._leases.values()):
+                with self._runs_lock:
+                    # complete_lease()도 같은 잠금에서 임대를 꺼내므로 둘 중 하나만 처리
+                    lost = now > lease['expires']
+                    expired = lost or now > lease['deadline']
+                    if expired:
+                        del self._leases[lease['id']]
+                        self._active_runs.pop(lease['task']['id'], None)
+                if expired:
+                    try:
+                        self._handle_lease_expiry(lease, lost)
+                    except Exception as e:
+                        logging.error(f"임대 만료 처리 실패: {e}")
+
+    def _handle_stall(self, run):
+        """시간 예산을 넘긴 작업 중단: COSFIM 강제 종료, 새 워커 시작, 작업 재시도 또는 실패"""
+        self._abort_run(run)
+        # 멈춘 워커는 버리고 (작업이 끝나도 결과를 무시) 새 워커로 대기열 처리 계속
+        self._runs.remove(run)
+        self._active_runs.pop(run['task']['id'], None)
+        if self.is_running:
+            self._start_worker_thread(run['slot'])
+        self._retry_or_fail(run, "시간 예산을 넘김")
+
+    def _handle_lease_expiry(self, lease, lost):
+        """heartbeat가 끊기거나 단계 예산을 넘긴 원격 임대 회수 (원격 워커는 다음 heartbeat에서 중단)"""
+        lease['task']['cancel_token'].cancel("stalled")
+        reason = f"원격 워커 {lease['agent_id']}의 임대가 만료됨" if lost else "시간 예산을 넘김"
+        self._retry_or_fail(lease, reason)
+
+    def _retry_or_fail(self, run, reason):
+        """중단된 작업을 MAX_STALL_RETRIES번까지 다시 대기열에 넣고, 넘으면 실패 처리"""
+        task, stage = run['task'], run['stage'] or "launching"
+        task_data = task['data']
+        elapsed = time.perf_counter() - run['started']
+        retries = task.get('stall_retries', 0)
+        retry = retries < MAX_STALL_RETRIES and not (task.get('deadline') and datetime.now() > task['deadline'])
+        logging.error(f"Task {task['id']}: {stage} 단계에서 {reason} ({elapsed:.0f}초) - "
+                      f"{'재시도' if retry else '실패 처리'}")
+        STALLS.inc(stage, task_data['water_system_name'], task_data['dam_name'], "retry" if retry else "fail")
+
+        if retry:
+            task['stall_retries'] = retries + 1
+            task['cancel_token'] = CancellationToken()
+            self._emit_stage(task, "queued")
+            self.task_queue.put(task)
+            return
+        error = f"{stage} 단계에서 {reason} - 중단됨 ({elapsed:.0f}초)"
+        try:
+            self._create_forwarder(task_data).forward(success=False, err_msg=error)
+        except Exception as e:
+            logging.error(f"Task {task['id']} 중단 알림 실패: {e}")
+        result = {'task_id': task['id'], 'success': False, 'error': error, 'stalled': True}
+        self._observe_task(task, result, elapsed)
+        self._publish_result(task, result)
+
+    def _abort_run(self, run):
+        """처리 중인 작업 중단 표시 후 COSFIM 강제 종료 (멈춘 GUI 호출을 끊음)"""
+        run['abort'].set()
+        if run['task'] is not None:
+            run['task']['cancel_token'].cancel("stalled")
+        session_pool = run['slot']['session_pool']
+        if session_pool:
+            session_pool.abort()
+        handler = run['handler']
+        if handler is not None and handler.session is None and handler.driver is not None:
+            try:
+                handler.driver.kill()
+            except Exception as e:
+                logging.error(f"COSFIM 강제 종료 실패: {e}")
+    
+    def _worker_loop(self, run):
+        """워커 루프 - 순차적으로 작업 처리 (워치독이 중단시키면 루프 종료)"""
+        while self.is_running and not run['abort'].is_set():
             try:
                 task = self.task_queue.get(timeout=1)
                 if task is None:  # 종료 신호
                     break
                 
-                logging.info(f"Processing task: {task['id']}")
-                result = self._process_task(task)
-                self.result_queue.put(result)
+                self._begin_task(task)
+                started = time.perf_counter()
+                run.update(task=task, stage=None, started=started, deadline=started + self.task_timeout, handler=None)
+                self._active_runs[task['id']] = run
+                result = self._process_task(task, run['slot'])
+                elapsed = time.perf_counter() - started
+                with self._runs_lock:
+                    aborted = run['abort'].is_set()
+                    if not aborted:
+                        self._active_runs.pop(task['id'], None)
+                        run.update(task=None, handler=None)
+                if aborted:
+                    # 워치독이 이미 재시도/실패 처리한 작업
+                    logging.warning(f"중단된 작업 {task['id']}의 결과 무시 ({elapsed:.0f}초)")
+                    break
+                self._finish_task(task, result, elapsed)
                 self.task_queue.task_done()
-                
-                # 작업 간 간격 (프로세스 완전 종료 및 GUI 안정화 대기)
-                logging.info("다음 작업 시작 전 5초 대기...")
-                time.sleep(5)
+                # 프로세스 종료 확인은 cleanup()/세션 풀에서 조건 대기로 처리하므로 고정 대기 없음
                 
             except queue.Empty:
                 continue
@@ -107,72 +533,395 @@ class TaskQueue:
                     'success': False,
                     'error': str(e)
                 }
-                self.result_queue.put(error_result)
+                if 'task' in locals() and task is not None:
+                    self._publish_result(task, error_result)
+                else:
+                    self._save_result(error_result)
+                    self._emit_result(error_result)
+
+    def _begin_task(self, task):
+        """대기열에서 꺼낸 작업(과 연결된 동일 작업)의 대기 시간 기록, 저장소에 처리 중 표시"""
+        logging.info(f"Processing task: {task['id']}")
+        with self._inflight_lock:
+            attached = [task] + list(task.get('subscribers', []))
+        started_at = datetime.now()
+        for attached_task in attached:
+            QUEUE_WAIT_SECONDS.observe((started_at - attached_task['timestamp']).total_seconds(),
+                                       attached_task['data']['water_system_name'],
+                                       attached_task['data']['dam_name'])
+            if self.store:
+                self.store.mark_processing(attached_task['id'])
+
+    def _finish_task(self, task, result, elapsed):
+        """처리가 끝난 작업의 소요 시간을 기록하고 결과 발행"""
+        if task['cancel_token'].reason == "cancelled":
+            result = self._cancelled_result(task)
+        if not (result.get('cached') or result.get('expired') or result.get('cancelled')):
+            # COSFIM을 실제로 실행한 작업만 소요 시간 추정에 반영
+            self.durations.observe(task['data']['water_system_name'], task['data']['dam_name'], elapsed)
+        self._observe_task(task, result, elapsed)
+        self._publish_result(task, result)
+
+    @staticmethod
+    def _observe_task(task, result, elapsed):
+        status = ("completed" if result.get('success') else "expired" if result.get('expired')
+                  else "stalled" if result.get('stalled') else "cancelled" if result.get('cancelled') else "failed")
+        water_system_name, dam_name = task['data']['water_system_name'], task['data']['dam_name']
+        TASK_SECONDS.observe(elapsed, water_system_name, dam_name, status)
+        TASKS.inc(water_system_name, dam_name, status)
+
+    def _publish_result(self, task, result):
+        """대표 작업 결과를 기록하고 연결된 구독자들에게 같은 결과 전달"""
+        self._save_result(result)
+        self._emit_result(result)
+
+        with self._inflight_lock:
+            if self._inflight.get(task.get('dedup_key')) is task:
+                del self._inflight[task['dedup_key']]
+            subscribers = list(task.get('subscribers', []))
+        if result.get('cancelled'):
+            # 대표 작업만 취소된 것이므로 연결된 작업들은 다시 대기열로 (먼저 들어간 작업이 새 대표)
+            for subscriber in subscribers:
+                subscriber.pop('leader', None)
+                self._enqueue(subscriber)
+            return
+        for subscriber in subscribers:
+            if subscriber['cancel_token'].is_set():
+                continue    # 연결 중 취소된 작업 (취소 결과는 cancel_task()가 기록)
+            sub_result = self._deliver_to_subscriber(subscriber, task, result)
+            self._save_result(sub_result)
+            self._emit_result(sub_result)
+        task.pop('result_data', None)
+
+    def _deliver_to_subscriber(self, subscriber, leader, leader_result):
+        """대표 작업의 CSV(또는 실패)를 구독자의 Forwarder로 전달"""
+        task_data = subscriber['data']
+        sub_id = subscriber['id']
+        try:
+            forwarder = self._create_forwarder(task_data)
+            if not leader_result.get('success'):
+                forwarder.forward(success=False, err_msg=leader_result.get('error', 'Unknown error'))
+                raise RuntimeError(leader_result.get('error', 'Unknown error'))
+
+            work_dir = self._work_dir(sub_id)
+            handler = self._create_handler(subscriber, forwarder, work_dir)
+            handler.deliver_result(leader_result['csv_path'], data=leader.get('result_data'))
+            return {
+                'task_id': sub_id,
+                'success': True,
+                'message': f"Delivered {task_data['dam_name']} result of task {leader['id']}",
+                'work_dir': str(work_dir),
+                'coalesced_with': leader['id']
+            }
+        except Exception as e:
+            logging.error(f"Task {sub_id} (attached to {leader['id']}) failed: {e}")
+            return {
+                'task_id': sub_id,
+                'success': False,
+                'error': str(e),
+                'coalesced_with': leader['id']
+            }
     
-    def _process_task(self, task):
-        """단일 작업 처리"""
+    def _save_result(self, result):
+        """작업 결과를 저장소에 기록"""
+        if not self.store or result.get('task_id') in (None, 'unknown'):
+            return
+        if result.get('success'):
+            self.store.update_status(result['task_id'], "completed", result=result)
+        elif result.get('cancelled'):
+            self.store.update_status(result['task_id'], "cancelled", error_message=result['error'])
+        else:
+            self.store.update_status(result['task_id'], "failed", error_message=result.get('error', 'Unknown error'))
+
+    def _process_task(self, task, slot):
+        """단일 작업 처리 (slot의 COSFIM 인스턴스 사용)"""
         task_data = task['data']
         task_id = task['id']
+        session_pool = slot['session_pool']
+        session = None
+        session_broken = False
         
         try:
-            # 작업별 디렉토리 생성
-            work_dir = Path(f"./work_{task_id[:8]}")
-            work_dir.mkdir(exist_ok=True)
-            
-            forwarder = Forwarder(
-                task_data['api_end_point'],
-                task_data['water_system_name'],
-                task_data['dam_name'],
-                task_data['dam_code'],
-                task_data['template_id'],
-                task_data['session_id'],
-                task_data['widget_name']
-            )
-            
-            handler = CosfimHandler(
-                forwarder=forwarder,
-                water_system_name=task_data['water_system_name'],
-                dam_name=task_data['dam_name'],
-                user_id=task_data['user_id'],
-                user_pw=task_data['user_pw'],
-                opt_data=task_data['opt_data'],
-                work_dir=work_dir,
-                task_id=task_id[:8],
-                session_id=task_data['session_id'],
-            )
+            # 작업별 디렉토리
+            work_dir = self._work_dir(task_id)
+            forwarder = self._create_forwarder(task_data)
+
+            result = self._serve_without_cosfim(task, forwarder, work_dir)
+            if result is not None:
+                return result
+
+            self._emit_stage(task, "launching")
+            if session_pool:
+                # 로그인된 COSFIM 세션 재사용 (없으면 새로 실행)
+                session = session_pool.acquire(task_data['user_id'], task_data['user_pw'])
+
+            run = self._active_runs.get(task_id)
+            handler = self._create_handler(task, forwarder, work_dir, session, cancel_token=task['cancel_token'],
+                                           driver_factory=slot['driver_factory'])
+            if run is not None:
+                run['handler'] = handler
             
             # 작업 실행
-            handler.process()
+            csv_path = handler.process()
+            # 구독자 전달용 결과 (결과 dict는 저장소에 JSON으로 기록되므로 작업에 둠)
+            task['result_data'] = handler.result_data
+            self._cache_result(task_data, handler.result_data)
             
             return {
                 'task_id': task_id,
                 'success': True,
                 'message': f"Successfully processed {task_data['dam_name']}",
-                'work_dir': str(work_dir)
+                'work_dir': str(work_dir),
+                'csv_path': csv_path
             }
             
         except Exception as e:
             logging.error(f"Task {task_id} failed: {e}")
+            # OPT/데이터 오류(ValueError)는 GUI 상태와 무관하므로 세션 유지
+            session_broken = not isinstance(e, ValueError)
             return {
                 'task_id': task_id,
                 'success': False,
                 'error': str(e)
             }
-    
-    def get_results(self):
-        """결과 가져오기"""
-        results = []
-        while not self.result_queue.empty():
+        finally:
+            if session is not None:
+                session_pool.release(session, broken=session_broken)
+
+    def _cache_result(self, task_data, data):
+        """결과 캐시 저장은 보관 스레드에 맡김 (워커는 디스크 쓰기를 기다리지 않음)"""
+        if self.result_cache:
+            result_format = task_data.get('result_format') or DEFAULT_RESULT_FORMAT
+            get_archiver().submit(self.result_cache.put, self._cache_key(task_data), data,
+                                  RESULT_FORMATS[result_format]['extension'])
+
+    @staticmethod
+    def _work_dir(task_id):
+        """작업 폴더 경로 (폴더는 결과를 보관할 때 result_archive.write_atomic이 만듦)"""
+        return Path(f"./work_{task_id[:8]}")
+
+    @staticmethod
+    def _cache_key(task_data):
+        # 결과 형식이 다르면 다른 결과
+        result_format = task_data.get('result_format') or DEFAULT_RESULT_FORMAT
+        return make_result_key(task_data['water_system_name'], task_data['dam_name'], task_data['opt_data'],
+                               variant=result_format)
+
+    def _serve_without_cosfim(self, task, forwarder, work_dir):
+        """취소/마감 초과/캐시 적중 작업은 COSFIM 없이 결과 반환 (COSFIM 실행이 필요하면 None)"""
+        task_data = task['data']
+        task_id = task['id']
+        if task['cancel_token'].is_set():
+            return self._cancelled_result(task)
+        if task.get('deadline') and datetime.now() > task['deadline']:
+            return self._expire_task(task, forwarder)
+        if self.result_cache:
+            # 대기하는 동안 같은 (수계, 댐, OPT) 결과가 캐시에 들어왔으면 COSFIM 실행 없이 바로 전달
+            data = self.result_cache.read(self._cache_key(task_data))
+            if data is not None:
+                return self._deliver_cached(task, forwarder, work_dir, data)
+        return None
+
+    def _deliver_cached(self, task, forwarder, work_dir, data):
+        """캐시에서 읽은 결과(bytes)를 COSFIM 실행 없이 전달"""
+        logging.info(f"Task {task['id']} served from result cache")
+        handler = self._create_handler(task, forwarder, work_dir)
+        csv_path = handler.deliver_result(None, data=data)
+        task['result_data'] = data
+        return {
+            'task_id': task['id'],
+            'success': True,
+            'message': f"Served {task['data']['dam_name']} from result cache",
+            'work_dir': str(work_dir),
+            'csv_path': csv_path,
+            'cached': True
+        }
+
+    def lease_task(self, agent_id, lease_seconds=LEASE_SECONDS, timeout=0):
+        """원격 워커에게 다음 작업을 임대 (timeout초 안에 COSFIM을 실행할 작업이 없으면 None)
+
+        취소/마감 초과/캐시 적중 작업은 여기서 바로 처리하고 다음 작업을 꺼낸다.
+        반환한 임대는 lease_seconds 안에 heartbeat_lease()로 연장해야 한다.
+        """
+        self._agents[agent_id] = time.perf_counter()
+        give_up = time.monotonic() + timeout
+        while self.is_running:
             try:
-                result = self.result_queue.get_nowait()
-                results.append(result)
+                task = self.task_queue.get(timeout=max(0.0, give_up - time.monotonic()))
             except queue.Empty:
-                break
-        return results
+                return None
+            if task is None:
+                self.task_queue.put(None)     # 로컬 워커의 종료 신호는 돌려놓음
+                return None
+
+            self._begin_task(task)
+            started = time.perf_counter()
+            try:
+                result = self._serve_without_cosfim(task, self._create_forwarder(task['data']),
+                                                    self._work_dir(task['id']))
+            except Exception as e:
+                logging.error(f"Task {task['id']} failed: {e}")
+                result = {'task_id': task['id'], 'success': False, 'error': str(e)}
+            if result is not None:
+                self._finish_task(task, result, time.perf_counter() - started)
+                continue
+
+            lease = {'id': str(uuid.uuid4()), 'agent_id': agent_id, 'task': task, 'stage': None,
+                     'started': started, 'deadline': started + self.task_timeout,
+                     'lease_seconds': lease_seconds, 'expires': started + lease_seconds}
+            with self._runs_lock:
+                self._leases[lease['id']] = lease
+                self._active_runs[task['id']] = lease
+            self._emit_stage(task, "launching")
+            logging.info(f"Task {task['id']} leased to {agent_id} (lease {lease['id']})")
+            return lease
+        return None
+
+    def heartbeat_lease(self, lease_id, stage=None):
+        """임대 연장 (만료/회수된 임대면 None) - stage는 원격 워커의 현재 작업 단계
+
+        반환값의 cancel이 True면 원격 워커는 작업을 멈춰야 한다 (취소 요청).
+        """
+        now = time.perf_counter()
+        with self._runs_lock:
+            lease = self._leases.get(lease_id)
+            if lease is None:
+                return None
+            lease['expires'] = now + lease['lease_seconds']
+            self._agents[lease['agent_id']] = now
+        if stage in STAGE_DEADLINE_SHARES and stage != lease['stage']:
+            self._emit_stage(lease['task'], stage)
+        return {'cancel': lease['task']['cancel_token'].is_set(), 'lease_seconds': lease['lease_seconds']}
+
+    def complete_lease(self, lease_id, success, csv_data=None, error=None):
+        """원격 워커의 처리 결과 반영 - 성공이면 csv_data(bytes)를 저장해서 포워딩 (만료/회수된 임대면 None)"""
+        with self._runs_lock:
+            lease = self._leases.pop(lease_id, None)
+            if lease is None:
+                return None
+            task = lease['task']
+            self._active_runs.pop(task['id'], None)
+            self._agents[lease['agent_id']] = time.perf_counter()
+        task_data = task['data']
+        task_id = task['id']
+        try:
+            forwarder = self._create_forwarder(task_data)
+            if task['cancel_token'].is_set():
+                result = self._cancelled_result(task)
+            elif not success:
+                error = error or "Unknown error"
+                forwarder.forward(success=False, err_msg=error)
+                result = {'task_id': task_id, 'success': False, 'error': error, 'agent_id': lease['agent_id']}
+            else:
+                work_dir = self._work_dir(task_id)
+                extension = RESULT_FORMATS[forwarder.result_format]['extension']
+                csv_path = str(work_dir / f"table_data_{task_id[:8]}.{extension}")
+                current_time = OptDocument.parse(task_data['opt_data']).current_time
+                self._emit_stage(task, "forwarding")
+                if self.outbox:
+                    self.outbox.enqueue(work_dir, forwarder.delivery_record(csv_path, current_time, task_id),
+                                        data=csv_data)
+                else:
+                    if self.archive_results:
+                        get_archiver().archive(csv_path, csv_data)
+                    with time_stage("forward", task_data['water_system_name'], task_data['dam_name']):
+                        forwarder.forward(success=True, data_path=csv_path, current_time=current_time, data=csv_data)
+                task['result_data'] = csv_data
+                self._cache_result(task_data, csv_data)
+                result = {
+                    'task_id': task_id,
+                    'success': True,
+                    'message': f"Processed {task_data['dam_name']} on {lease['agent_id']}",
+                    'work_dir': str(work_dir),
+                    # 작업 폴더에 쓰지 않으면(보관/전달기 없음) 경로를 알리지 않음
+                    'csv_path': csv_path if self.outbox or self.archive_results else None,
+                    'agent_id': lease['agent_id']
+                }
+        except Exception as e:
+            logging.error(f"Task {task_id} failed: {e}")
+            result = {'task_id': task_id, 'success': False, 'error': str(e), 'agent_id': lease['agent_id']}
+        self._finish_task(task, result, time.perf_counter() - lease['started'])
+        return result
+
+    @staticmethod
+    def _expire_task(task, forwarder):
+        """마감 시간이 지난 작업은 COSFIM을 실행하지 않고 실패로 알림"""
+        error = f"마감 시간({task['deadline']:%Y-%m-%d %H:%M:%S})이 지나 작업을 건너뜀"
+        logging.warning(f"Task {task['id']}: {error}")
+        try:
+            forwarder.forward(success=False, err_msg=error)
+        except Exception as e:
+            logging.error(f"Task {task['id']} 마감 초과 알림 실패: {e}")
+        return {
+            'task_id': task['id'],
+            'success': False,
+            'error': error,
+            'expired': True
+        }
+
+    @staticmethod
+    def _deliver_record(record, data=None):
+        """DeliveryOutbox의 전달 기록 1건을 한 번 포워딩 (실패하면 예외 - 재시도는 DeliveryOutbox만 함)"""
+        forwarder = Forwarder(**record['forwarder'])
+        current_time = datetime.fromisoformat(record['current_time']) if record.get('current_time') else None
+        with time_stage("forward", forwarder.water_system_name, forwarder.dam_name):
+            forwarder.forward(success=True, data_path=record['csv_path'], current_time=current_time, data=data,
+                              max_attempts=1)
+
+    def _give_up_record(self, record, error):
+        """DeliveryOutbox가 전달을 포기한 결과: 위젯에 실패를 알리고 (완료로 기록된) 작업을 실패로 기록"""
+        task_id = record.get('task_id')
+        message = f"결과 전달 실패 ({record['attempts']}회 시도): {error}"
+        try:
+            Forwarder(**record['forwarder']).forward(success=False, err_msg=message, max_attempts=1)
+        except Exception as e:
+            logging.error(f"Task {task_id} 전달 실패 알림 실패: {e}")
+        result = {'task_id': task_id, 'success': False, 'error': message, 'delivery_failed': True}
+        self._save_result(result)
+        self._emit_result(result)
+
+    def _create_forwarder(self, task_data):
+        return Forwarder(
+            task_data['api_end_point'],
+            task_data['water_system_name'],
+            task_data['dam_name'],
+            task_data['dam_code'],
+            task_data['template_id'],
+            task_data['session_id'],
+            task_data['widget_name'],
+            result_format=task_data.get('result_format') or DEFAULT_RESULT_FORMAT,
+        )
+
+    def _create_handler(self, task, forwarder, work_dir, session=None, cancel_token=None, driver_factory=None):
+        task_data = task['data']
+        return CosfimHandler(
+            forwarder=forwarder,
+            water_system_name=task_data['water_system_name'],
+            dam_name=task_data['dam_name'],
+            user_id=task_data['user_id'],
+            user_pw=task_data['user_pw'],
+            opt_data=task_data['opt_data'],
+            work_dir=work_dir,
+            task_id=task['id'],
+            session_id=task_data['session_id'],
+            session=session,
+            driver_factory=driver_factory or (self.slots[0]['driver_factory'] if self.slots else None),
+            stage_callback=lambda stage: self._emit_stage(task, stage),
+            cancel_token=cancel_token,
+            outbox=self.outbox,
+            archive=self.archive_results,
+            result_format=task_data.get('result_format') or DEFAULT_RESULT_FORMAT,
+        )
+    
+    def get_results(self, consumer="default", timeout=None):
+        """consumer가 아직 읽지 않은 결과 가져오기 (다른 소비자의 결과는 그대로 남음)"""
+        return self.result_log.read(consumer, timeout=timeout)
 
 
 class Forwarder:
-    def __init__(self, end_point, water_system_name, dam_name, dam_code, template_id, session_id, widget_name):
+    """위젯 업로드 (결과 파일의 Content-Type/Content-Encoding은 result_format을 따름)"""
+    def __init__(self, end_point, water_system_name, dam_name, dam_code, template_id, session_id, widget_name,
+                 result_format=DEFAULT_RESULT_FORMAT):
         self.end_point = end_point
         self.dam_name = dam_name
         self.water_system_name = water_system_name
@@ -180,11 +929,29 @@ class Forwarder:
         self.template_id = template_id
         self.session_id = session_id
         self.widget_name = widget_name
+        self.result_format = result_format
 
-    def forward(self, success=True, data_path="table_data.csv", err_msg="", current_time=None):
-        create_call_back_message("createCosfimChart", "completed", self.session_id,  "분석된 결과를 더 쉽게 확인하실 수 있도록 차트를 생성하고 있습니다. 잠시만 기다려 주세요.")
+    def delivery_record(self, data_path, current_time=None, task_id=None):
+        """DeliveryOutbox에 넣을 전달 기록 (JSON으로 저장되고 재시작 후 Forwarder를 다시 만들 수 있음)"""
+        return {
+            'task_id': task_id,
+            'csv_path': str(data_path),
+            'current_time': current_time.isoformat() if current_time else None,
+            'forwarder': {
+                'end_point': self.end_point, 'water_system_name': self.water_system_name,
+                'dam_name': self.dam_name, 'dam_code': self.dam_code, 'template_id': self.template_id,
+                'session_id': self.session_id, 'widget_name': self.widget_name,
+                'result_format': self.result_format,
+            },
+        }
+
+    def forward(self, success=True, data_path="table_data.csv", err_msg="", current_time=None, data=None,
+                max_attempts=None):
+        """결과 업로드 (data가 주어지면 메모리의 CSV를 보내고 data_path는 파일 이름으로만 씀)
 
-        files = None
+        max_attempts는 업로드 시도 횟수이며 None이면 UploadClient 기본값이다 (DeliveryOutbox는
+        직접 재시도하므로 1). 차트 생성 완료 콜백은 업로드가 성공한 뒤에 한 번만 보낸다.
+        """
         try: 
             info_data = {
                 "damName": self.dam_name,
@@ -192,100 +959,85 @@ class Forwarder:
                 "damCode": self.dam_code,
                 "widgetName" : self.widget_name,
                 "error": "",
-                "currentTime" : current_time.strftime("%Y-%m-%d %H:%M:%S")
+                "currentTime" : current_time.strftime("%Y-%m-%d %H:%M:%S") if current_time else ""
             }
+            if self.result_format != DEFAULT_RESULT_FORMAT:
+                info_data["resultFormat"] = self.result_format
             query_params = {
                 "templateId": self.template_id,
                 "sessionId" : self.session_id
             }
-            
-            max_retries = 3
-            last_exception = None
-            
-            for attempt in range(1, max_retries + 1):
-                try:
-                    if success:
-                        message = "success"
-                        filename = os.path.basename(data_path)
-                        
-                        with open(data_path, "rb") as csv_file:
-                            files = {"file": (filename, csv_file, "text/csv")}
-                            response = requests.post(
-                                self.end_point, 
-                                files=files, 
-                                data=info_data,
-                                params=query_params
-                            )
-                    else:
-                        info_data["error"] = err_msg if err_msg else "unknown error"
-                        filename = None
-                        response = requests.post(
-                                self.end_point, 
-                                files=None, 
-                                data=info_data,
-                                params=query_params
-                            )
-
-                    # 요청/응답 정보 출력
-                    logging.info(f"[요청] {response.request.method} {response.request.url} | Data: {info_data}")
-                    response_body = getattr(response, 'text', '')[:200] if hasattr(response, 'text') else ''
-                    logging.info(f"[응답] {response.status_code} | Body: {response_body}")
-                
-                    if response.status_code == 200:
-                        logging.info("✅ 데이터를 서버에서 성공적으로 수신함")
-                        logging.info(f"포워딩 함수 실행 완료: 댐={self.dam_name}, 파일={filename if success else 'N/A'}")
 
-                        return  # 성공 시 함수 종료
-                    else:
-                        error_msg = f"데이터를 보냈으나 서버에서 실패 응답을 보냄: {response.status_code}, {response.text}"
-                        last_exception = Exception(error_msg)
-                        
-                        if attempt < max_retries:
-                            logging.warning(f"⚠️ 포워딩 실패 ({attempt}/{max_retries}), {max_retries - attempt}번 더 재시도.")
-
-                            time.sleep(1)  # 재시도 전 1초 대기
-                        else:
-                            logging.error(error_msg)
-                            raise last_exception
-                            
-                except Exception as e:
-                    last_exception = e
-                    if attempt < max_retries:
-                        logging.warning(f"⚠️ 포워딩 실패 ({attempt}/{max_retries}), {max_retries - attempt}번 더 재시도.")
-                        time.sleep(1)  # 재시도 전 1초 대기
-                    else:
-                        logging.error(f"포워딩 함수 실행중에 오류 발생 (최대 재시도 횟수 초과): {e}")
-                        raise
-            
-            # 모든 재시도 실패 시
-            if last_exception:
-                raise last_exception
-                
+            files = None
+            filename = None
+            if success:
+                filename = os.path.basename(data_path)
+                if data is None:
+                    # 재시도 때 다시 보낼 수 있도록 한 번만 읽어 둠
+                    with open(data_path, "rb") as csv_file:
+                        data = csv_file.read()
+                result_format = RESULT_FORMATS[self.result_format]
+                part_headers = {"Content-Encoding": result_format['encoding']} if result_format['encoding'] else {}
+                files = {"file": (filename, data, result_format['content_type'], part_headers)}
+            else:
+                info_data["error"] = err_msg if err_msg else "unknown error"
+
+            # 커넥션 풀 재사용, 타임아웃, 지수 백오프 재시도, 차단기는 UploadClient가 담당
+            response = get_upload_client().post(self.end_point, files=files, data=info_data, params=query_params,
+                                                max_attempts=max_attempts)
+
+            # 요청/응답 정보 출력
+            logging.info(f"[요청] {response.request.method} {response.request.url} | Data: {info_data}")
+            logging.info(f"[응답] {response.status_code} | Body: {response.text[:200]}")
+            logging.info("✅ 데이터를 서버에서 성공적으로 수신함")
+            logging.info(f"포워딩 함수 실행 완료: 댐={self.dam_name}, 파일={filename if success else 'N/A'}")
+
         except Exception as e:
             logging.error(f"포워딩 함수 실행중에 오류 발생: {e}")
             raise
 
+        create_call_back_message("createCosfimChart", "completed", self.session_id,  "분석된 결과를 더 쉽게 확인하실 수 있도록 차트를 생성하고 있습니다. 잠시만 기다려 주세요.")
+
 
 class CosfimHandler:
-    APP_PATH = r"C:\Program Files (x86)\KWater\댐군 홍수조절 연계 운영 시스템\COSFIM_GUI.exe"
-    BASE_FILE_DIR = r"C:\COSFIM\WRKSPACE"
-    WAIT_TIME = 0.1
-    WAIT_TIME_LONG = 0.5
-    WAIT_TIME_LONG_LONG = 1
-    
-    def __init__(self, forwarder, water_system_name, dam_name, user_id, user_pw,session_id, opt_data=None, work_dir=None, task_id=None):
+    """단일 작업 처리 (OPT 적용 → 연산 → 결과 저장/전달)
+
+    COSFIM GUI 조작은 드라이버가 담당한다 (cosfim_gui.PywinautoCosfimDriver 참고).
+    session이 주어지면 세션 풀의 로그인된 드라이버를 쓰고, 없으면
+    driver_factory로 드라이버를 만들어 작업마다 실행/종료한다.
+    cancel_token(CancellationToken)이 설정되면 다음 단계 경계나 GUI 대기
+    중에 멈추고, 포워딩 없이 정리(cleanup)만 한다.
+    결과는 result_format(result_table.RESULT_FORMATS)으로 직렬화해서
+    메모리(result_data)에서 바로 포워딩하고, archive면 작업 폴더에
+    비동기로 보관한다. outbox(DeliveryOutbox)가 주어지면 전달 기록만 남기고 바로 반환한다.
+    """
+    # 처리 단계(metrics 라벨) -> 외부에 알리는 작업 단계
+    TASK_STAGES = {
+        "get_elements": "preparing", "handle_opt_file": "preparing", "select_options": "preparing",
+        "compute": "computing", "extract": "extracting", "save_data": "extracting",
+        "forward": "forwarding",
+    }
+
+    def __init__(self, forwarder, water_system_name, dam_name, user_id, user_pw,session_id, opt_data=None, work_dir=None, task_id=None, session=None, driver_factory=None, stage_callback=None, cancel_token=None, outbox=None, archive=True,
+                 result_format=DEFAULT_RESULT_FORMAT):
         self.forwarder = forwarder
-        self.logger = logging.getLogger(f"CosfimHandler-{task_id or 'main'}")
-        
-        # 작업별 격리
-        self.task_id = task_id or str(uuid.uuid4())[:8]
-        self.work_dir = work_dir or Path(f"./work_{self.task_id}")
-        self.work_dir.mkdir(exist_ok=True)
+        self.outbox = outbox
+        self.archive = archive
+        self.result_format = result_format
+        self.result_data = None
+        self.session = session
+        self.driver_factory = driver_factory
+        self.stage_callback = stage_callback
+        self.cancel_token = cancel_token
+        self._task_stage = None
+        self.driver = session.driver if session is not None else None
+        self.logger = logging.getLogger(f"CosfimHandler-{task_id[:8] if task_id else 'main'}")
         
-        # 파일 경로 격리
-        self.FILE_DIR = str(self.work_dir / "workspace")
-        Path(self.FILE_DIR).mkdir(exist_ok=True)
-        self.csv_filename = f"table_data_{self.task_id}.csv"
+        # 작업별 격리 (폴더/파일 이름에는 작업 ID 앞 8자리, 전달 기록에는 전체 ID)
+        self.task_id = task_id or str(uuid.uuid4())
+        # 작업 폴더는 결과를 보관할 때 보관 스레드가 만든다 (보관하지 않으면 디스크에 쓰지 않음)
+        self.work_dir = Path(work_dir) if work_dir else Path(f"./work_{self.task_id[:8]}")
+        self.csv_filename = f"table_data_{self.task_id[:8]}.{RESULT_FORMATS[result_format]['extension']}"
         
         # 인자 및 데이터
         self.water_system_name = water_system_name
@@ -294,19 +1046,17 @@ class CosfimHandler:
         self.user_pw = user_pw
         self.opt_data = opt_data
         self.session_id = session_id
+        self.wait_recorder = WaitRecorder()
 
         if self.opt_data is None:
             return
         self.opt_data = self.set_opt_data(self.opt_data)
         self.logger.info(f"Opt data processed for task {self.task_id}")
-        self.start_time = self.get_start_time(self.opt_data)
-        self.time_interval = self.get_time_interval(self.opt_data, self.start_time_idx)
+        self.opt_document = OptDocument.parse(self.opt_data)
+        self.start_time = self.get_start_time(self.opt_document)
+        self.time_interval = self.get_time_interval(self.opt_document)
         self.time_interval_list = self.get_time_interval_list(self.time_interval)
-        self.is_new_instance = None
-
-        # start_time 튜플을 datetime 객체로 변환
-        year, month, day, hr, min = self.start_time
-        self.current_time = datetime(int(year), int(month), int(day), int(hr), int(min)) 
+        self.current_time = self.opt_document.current_time
 
         self.opt_name_map = {
             "낙동강": {
@@ -325,15 +1075,6 @@ class CosfimHandler:
                 },
         }
 
-        # UI 요소 초기화
-        self.app = None
-        self.main_win = None
-        self.tool_bar = None
-        self.save_btn = None
-        self.load_btn = None
-        self.water_system_box = None
-        self.dam_box = None
-
     def set_opt_data(self, opt_data):
         if self.opt_data is not None and os.path.exists(self.opt_data):
             with open(opt_data, "r") as f:
@@ -342,39 +1083,15 @@ class CosfimHandler:
         else:
             return self.opt_data
 
-    def get_start_time(self, opt_data):
-        cnt = 0
-        opt_data = opt_data.split("\n")
-        year = month = day = hr = min = None
-
-        for idx, line in enumerate(opt_data):
-            line_stripped = line.strip()
-            if line_stripped and line_stripped[:2] in("19","20"):
-                cnt += 1
-                self.logger.info(f"{cnt=}, {line=}")
-                if cnt == 2:
-                    ele = line.split(" ")
-                    if len(ele) >= 5:
-                        year, month, day, hr, min = ele[:5]
-                        self.logger.info(f"{year=} {month=} {day=} {hr=} {min=}")
-                        self.start_time_idx = idx
-                        # 두 번째 날짜도 찾아야 하므로 break 하지 않음
-                # elif cnt == 2:
-                #     # 두 번째 날짜에서 start_time_idx 저장 후 종료
-                        self.start_time_idx = idx
-                        break
-
-        if year is None:
-            raise ValueError("OPT 파일에서 시작 시간을 찾을 수 없습니다. 파일 형식을 확인하세요.")
-
+    def get_start_time(self, opt_document):
+        """OPT의 현재 시간 줄 (년, 월, 일, 시, 분)"""
+        year, month, day, hr, min = opt_document.current_time_fields
+        self.logger.info(f"{year=} {month=} {day=} {hr=} {min=}")
+        self.start_time_idx = opt_document.line_no["current_time"] - 1
         return year, month, day, hr, min
 
-    def get_time_interval(self, opt_data, start_time_idx):
-        opt_data = opt_data.split("\n")
-        ele = opt_data[start_time_idx+2].split(" ")
-        time_interval_int = ele[-1]
-        time_interval_map = {"10": "10분", "30": "30분", "60": "60분",  "1440": "24시간"}
-        time_interval = time_interval_map[time_interval_int]
+    def get_time_interval(self, opt_document):
+        time_interval = opt_document.time_interval
         self.logger.info(f"{time_interval=}")
         return time_interval
 
@@ -389,616 +1106,86 @@ class CosfimHandler:
             time_interval_list = ["00"]
         return time_interval_list
 
-#    def safe_close_existing_instances(self):
-#        """기존 COSFIM 인스턴스를 안전하게 종료"""
-#        try:
-#            existing_app = Application(backend='uia')
-#            existing_app.connect(title_re="COSFIM.*Web Service")
-#            
-#            # 기존 창들 정리
-#            for window in existing_app.windows():
-#                try:
-#                    window.close()
-#                    time.sleep(0.5)
-#                except:
-#                    pass
-#            
-#            self.logger.info("기존 COSFIM 인스턴스 정리 완료")
-#            time.sleep(2)  # 충분한 대기 시간
-#        except:
-#            self.logger.info("기존 COSFIM 인스턴스 없음")
-
-
-
-    def safe_close_existing_instances(self):
-        """기존 COSFIM 인스턴스를 안전하게 종료"""
-        self.logger.info("=== 기존 COSFIM 프로세스 정리 시작 ===")
-
-        # 1단계: UI를 통한 정상 종료 시도 (id.xml 권한 문제 우회)
-        try:
-            existing_app = Application(backend='uia')
-            existing_app.connect(title_re="COSFIM.*Web Service")
-
-            pids = []
-            for window in existing_app.windows():
-                try:
-                    pid = window.process_id()
-                    pids.append(pid)
-
-                    # UI 메뉴를 통한 정상 종료 시도 (파일 저장 프롬프트 회피)
-                    try:
-                        # 먼저 Alt+F4로 종료 시도
-                        window.set_focus()
-                        time.sleep(0.3)
-                        window.type_keys('%{F4}')  # Alt+F4
-                        self.logger.info(f"UI 종료 시도 (Alt+F4): PID {pid}")
-                        time.sleep(1)
-
-                        # 저장 확인 창이 뜨면 "아니요" 선택
-                        try:
-                            confirm_win = window.child_window(title_re="선택|저장|알림", control_type="Window")
-                            if confirm_win.exists(timeout=2):
-                                no_btn = confirm_win.child_window(title_re="아니요|No", control_type="Button")
-                                if no_btn.exists(timeout=1):
-                                    no_btn.click_input()
-                                    self.logger.info(f"저장 확인 창 '아니요' 클릭: PID {pid}")
-                                    time.sleep(0.5)
-                        except:
-                            pass
-
-                    except Exception as e:
-                        self.logger.warning(f"UI 종료 시도 실패: {e}")
-                        # 실패하면 기존 방식 사용
-                        window.close()
-
-                    self.logger.info(f"기존 창 닫기: PID {pid}")
-                    time.sleep(0.5)
-
-                except Exception as e:
-                    self.logger.warning(f"기존 창 닫기 실패: {e}")
-
-            time.sleep(2)
-
-            # 1.5단계: 여전히 살아있는 프로세스는 강제 종료
-            for pid in set(pids):
-                try:
-                    # 프로세스가 아직 살아있는지 확인
-                    result = subprocess.run(['tasklist', '/FI', f'PID eq {pid}'],
-                                          capture_output=True, text=True, timeout=5)
-                    if str(pid) in result.stdout:
-                        subprocess.run(['taskkill', '/F', '/PID', str(pid)],
-                                     capture_output=True, timeout=5)
-                        self.logger.info(f"기존 프로세스 강제 종료: PID {pid}")
-                except Exception as e:
-                    self.logger.warning(f"프로세스 종료 실패 (PID {pid}): {e}")
-
-            time.sleep(2)
-        except Exception as e:
-            self.logger.info(f"UI 기반 정리 스킵 (기존 인스턴스 없음): {e}")
-            
-        # 2단계: 프로세스 이름으로 강제 정리
-        try:
-            result = subprocess.run(['tasklist', '/FI', 'IMAGENAME eq COSFIM_GUI.exe'], 
-                                  capture_output=True, text=True, timeout=5)
-            if 'COSFIM_GUI.exe' in result.stdout:
-                self.logger.warning("⚠️ 남아있는 COSFIM_GUI.exe 발견! 강제 종료...")
-                subprocess.run(['taskkill', '/F', '/IM', 'COSFIM_GUI.exe'], 
-                             capture_output=True, timeout=5)
-                self.logger.info("COSFIM_GUI.exe 강제 종료 완료")
-                time.sleep(3)
-            else:
-                self.logger.info("남아있는 COSFIM_GUI.exe 프로세스 없음")
-        except Exception as e:
-            self.logger.warning(f"프로세스 이름 기반 정리 오류: {e}")
-        
-        # 3단계: 최종 확인
-        for attempt in range(10):  # 최대 10초 대기
-            try:
-                result = subprocess.run(['tasklist', '/FI', 'IMAGENAME eq COSFIM_GUI.exe'],
-                                      capture_output=True, text=True, timeout=5)
-                if 'COSFIM_GUI.exe' not in result.stdout:
-                    self.logger.info(f"✅ 기존 프로세스 정리 완료 확인 ({attempt+1}초)")
-                    time.sleep(3)  # 추가 안전 마진 증가 (1초 -> 3초)
-                    return
-            except:
-                pass
-            time.sleep(1)
-
-        self.logger.warning("❌ 프로세스 정리 확인 시간 초과 - 계속 진행")
-
-
-        
-
-
-
-    def launch_app(self):
-        """앱 실행 - 기존 인스턴스 정리 후 새로 시작"""
-        try:
-            # 기존 인스턴스 정리
-            self.safe_close_existing_instances()
-
-            # 방법 1: subprocess로 직접 실행 (pywinauto.start() 대신)
-            self.logger.info("코스핌 실행 시작 (subprocess 방식)...")
+    def _stage(self, stage):
+        """처리 단계 소요 시간을 수계/댐 라벨로 기록 (metrics.STAGE_SECONDS), 작업 단계가 바뀌면 알림"""
+        if self.cancel_token is not None and self.cancel_token.is_set():
+            raise TaskAborted(f"작업이 중단되어({self.cancel_token.reason}) {stage} 단계를 실행하지 않음")
+        self._notify_stage(stage)
+        return time_stage(stage, self.water_system_name, self.dam_name)
 
-            # 프로세스 시작
-            import subprocess
-            subprocess.Popen([self.APP_PATH], shell=True)
-            self.logger.info("코스핌 프로세스 시작됨 (subprocess)")
-
-            # 프로세스가 완전히 시작될 때까지 대기
-            time.sleep(3)
-
-            # 실행된 프로세스에 연결
-            self.logger.info("실행된 코스핌 프로세스에 연결 시도...")
-            max_connect_attempts = 5
-            for connect_attempt in range(1, max_connect_attempts + 1):
-                try:
-                    self.app = Application(backend="uia").connect(path=self.APP_PATH, timeout=5)
-                    self.logger.info(f"코스핌 프로세스 연결 성공 (시도 {connect_attempt}/{max_connect_attempts})")
-                    break
-                except Exception as e:
-                    if connect_attempt < max_connect_attempts:
-                        self.logger.warning(f"연결 실패 (시도 {connect_attempt}/{max_connect_attempts}): {e}")
-                        time.sleep(2)
-                    else:
-                        self.logger.error(f"프로세스 연결 실패: {e}")
-                        raise
-
-            # 로그인 창이 나타날 때까지 대기
-            max_attempts = 3
-            for attempt in range(1, max_attempts + 1):
-                try:
-                    self.logger.info(f"로그인 창 대기 중... (시도 {attempt}/{max_attempts})")
-
-                    # 모든 창 확인
-                    try:
-                        all_windows = self.app.windows()
-                        self.logger.info(f"현재 코스핌 창 개수: {len(all_windows)}")
-                        for idx, win in enumerate(all_windows):
-                            try:
-                                self.logger.info(f"  창 {idx+1}: {win.window_text()}")
-                            except:
-                                pass
-                    except:
-                        pass
-
-                    self.login_win = self.app.window(title_re="로그인")
-                    self.login_win.wait("visible", timeout=15)
-                    self.logger.info("새 COSFIM 인스턴스 실행 성공")
-                    self.is_new_instance = True
-                    break
-
-                except Exception as e:
-                    if attempt < max_attempts:
-                        self.logger.warning(f"로그인 창 찾기 실패 (시도 {attempt}/{max_attempts}): {e}")
-                        time.sleep(2)
-                    else:
-                        self.logger.error(f"로그인 창을 찾을 수 없음: {e}")
-                        raise
-
-            self._login()
-            self._update_check()
-
-        except Exception as e:
-            self.logger.error(f"앱 실행 실패: {e}")
-            raise
-
-    def _login(self):
-        self.login_win.set_focus()
-        time.sleep(self.WAIT_TIME_LONG_LONG)
-
-        self.login_win.child_window(auto_id="textBox_ID", control_type="Edit").type_keys(self.user_id)
-        self.login_win.child_window(auto_id="textBox_PWD", control_type="Edit").type_keys(self.user_pw)
-        #login_box = self.login_win.child_window(auto_id="textBox_ID", control_type="Edit")
-        #login_box.set_edit_text(self.user_id)
-
-        #pwd_box = self.login_win.child_window(auto_id="textBox_PWD", control_type="Edit")
-        #pwd_box.set_edit_text(self.user_pw)
-
-        self.login_win.child_window(auto_id="button_Accept", control_type="Button").click_input()
-        self.logger.info("로그인 성공")
-        time.sleep(self.WAIT_TIME_LONG_LONG)
-    
-    def _update_check(self):
-        try: 
-            update_win = self.app.window(title_re="선택")
-            update_win.wait("visible", timeout=5)
-            update_win.child_window(auto_id="7", control_type="Button").click_input()
-            self.logger.info("업데이트 요청 무시")
-        except:
-            self.logger.info("업데이트 요청 없음")
-            return
-
-    def get_elements(self):
-        self.main_win = self._main_win()
-        self._close_residue_windows()
-        self.tool_bar, self.save_btn, self.load_btn = self._tool_bar()   
-        self.water_system_box, self.dam_box, self.time_interval_box, self.time_picker_start = self._select_box()
-
-    def _main_win(self):
-        main_win = self.app.window(title_re="COSFIM.*Web Service", control_type="Window")
-        main_win.wait("visible", timeout=10)
-        self.logger.info("메인 창 로딩 완료")
-        main_win.set_focus()
-        time.sleep(self.WAIT_TIME)
-        return main_win
-
-    def _close_windows(self, window):
-        """에러 무시하고 윈도우 제거"""
-        with suppress(Exception):
-            if window.exists():
-                self.logger.info(f"윈도우 제거: {window.window_text()}")
-                window.close()
-            time.sleep(self.WAIT_TIME)
-
-    def _close_residue_windows(self):
-        """이전 실행에서 남은 윈도우가 있다면 제거"""
-        self.logger.info("불필요한 윈도우 정리 시작...")
-        data_output_wins = [
-            self.app.window(auto_id="GraphForm", control_type="Window"),            
-            self.app.window(auto_id="AnalysisForm", control_type="Window"),
-            self.app.window(auto_id="DiagramSlideForm", control_type="Window")
-        ]
-        for window in data_output_wins:
-            self._close_windows(window)
-
-        self.main_win.set_focus()
-        time.sleep(self.WAIT_TIME)
-        error_wins = [
-            self.main_win.child_window(title="선택", control_type="Window"),
-            self.main_win.child_window(title="알림", control_type="Window"),
-        ]
-        for window in error_wins:            
-            with suppress(Exception):
-                if window.exists():
-                    self.logger.info(f"윈도우 제거: {window.window_text()}")
-                    window.child_window(title="아니요(N)", auto_id="7", control_type="Button").click_input()
-                time.sleep(self.WAIT_TIME)
-
-        self.logger.info("불필요한 윈도우 정리 완료")
-
-    def _focus_main_win(self):
-        self.main_win.set_focus()
-        time.sleep(self.WAIT_TIME)
-
-    def _tool_bar(self):
-        tool_bar = self.main_win.child_window(auto_id="toolBar", control_type="ToolBar")
-        save_btn = tool_bar.child_window(title="현재 모의를 저장 합니다.", control_type="SplitButton")
-        load_btn = tool_bar.child_window(title="기존 모의를 읽어 옵니다.", control_type="SplitButton")
-        return tool_bar, save_btn, load_btn
-
-    def _select_box(self):
-        water_system_box = self.main_win.child_window(auto_id="comboBox_waterSystem", control_type="ComboBox")
-        dam_box = self.main_win.child_window(auto_id="comboBox_DamName", control_type="ComboBox")
-        time_interval_box = self.main_win.child_window(auto_id="comboBox_TimeInterval", control_type="ComboBox")
-        time_picker_start = self.main_win.child_window(auto_id="timePicker_Current", control_type="Pane")
-        return water_system_box, dam_box, time_interval_box, time_picker_start
-
-    def _select_water_system(self):
-        self._focus_main_win()
-        self.water_system_box.click_input()
-        time.sleep(self.WAIT_TIME)
-        self.water_system_box.child_window(title=self.water_system_name, control_type="ListItem").click_input()
-        time.sleep(self.WAIT_TIME_LONG)
-        self.logger.info(f"수계 선택 {self.water_system_name=}")
-    
-    def _select_dam(self):
-        self._focus_main_win()
-        self.dam_box.click_input()
-        time.sleep(self.WAIT_TIME)
-        self.dam_box.child_window(title=self.dam_name, control_type="ListItem").click_input()
-        time.sleep(self.WAIT_TIME_LONG)
-        self.logger.info(f"댐 선택 {self.dam_name=}")
-    
-    def _check_error_window(self):
-        """에러 창을 확인하는 함수"""
-        try:
-            error_win = self.main_win.child_window(title="선택", control_type="Window")
-            error_win.wait("visible", timeout=2)
-            error_win.set_focus()
-            time.sleep(self.WAIT_TIME)
-
-            self.logger.info("OPT 파일 불러오기 중 에러 발생")
-            
-            error_title = "OPT 파일 불러오기 중 에러 발생"
-            try:
-                error_text_win = error_win.child_window(control_type="Text")
-                error_title = error_text_win.window_text()
-            except:
-                pass 
-            error_win.child_window(title="아니요(N)", control_type="Button").click_input()
-            time.sleep(self.WAIT_TIME)
-            raise ValueError(f"에러 창 발생: {error_title}")
-        except ValueError as e:
-            raise 
-        except (ElementNotFoundError, TimeoutError):
-            self.logger.info("에러 창 없음 - 정상 진행")
-        except Exception as e:
-            self.logger.error(f"에러 창 확인 중 예상치 못한 에러: {e}")
-
-    def select_options(self):
-        try:
-            self._focus_main_win()
-            self._select_water_system()
-            self._select_dam()
-            self.load_btn.click_input()
-            time.sleep(self.WAIT_TIME_LONG_LONG)
-            self._check_error_window()
-            self.logger.info("OPT 파일 불러오기 완료")
-            #
-            # # OPT에서 안 불러와지는 항목들 수동 설정
-            # self._select_time_interval()
-            # self._select_time_picker_start_date()
-            # if self.time_interval in ["10분", "30분", "60분"]:
-            #     self._select_time_picker_start_hr_min()
-
-        except Exception as e:
-            self.logger.error(f"옵션 선택 중 에러 발생: {e}")
-            raise
-
-    # def _select_time_interval(self):
-    #     time_interval = self.time_interval
-    #     self._focus_main_win()
-    #     self.time_interval_box.click_input()
-    #     time.sleep(self.WAIT_TIME)
-    #     self.time_interval_box.child_window(title=time_interval, control_type="ListItem").click_input()
-    #     time.sleep(self.WAIT_TIME_LONG)
-    #     self.logger.info(f"시간 간격 선택 {time_interval=}")
-    #
-    # def _select_time_picker_start_date(self):
-    #     year, month, day = self.start_time[:3]
-    #     self._focus_main_win()
-    #     time_picker_start_date = self.time_picker_start.child_window(auto_id="dateTimePicker", control_type="Pane")
-    #
-    #     # 날짜-연
-    #     pywinauto.mouse.click(coords=(time_picker_start_date.rectangle().left+2, time_picker_start_date.rectangle().top+2))
-    #     time.sleep(self.WAIT_TIME_LONG)
-    #     pywinauto.keyboard.send_keys(year)
-    #     time.sleep(self.WAIT_TIME_LONG)
-    #
-    #     # 날짜-월
-    #     pywinauto.mouse.click(coords=(time_picker_start_date.rectangle().left+37, time_picker_start_date.rectangle().top+2))
-    #     time.sleep(self.WAIT_TIME_LONG)
-    #     pywinauto.keyboard.send_keys(month)
-    #     time.sleep(self.WAIT_TIME_LONG)
-    #
-    #     # 날짜-일
-    #     pywinauto.mouse.click(coords=(time_picker_start_date.rectangle().left+55, time_picker_start_date.rectangle().top+2))
-    #     time.sleep(self.WAIT_TIME_LONG)
-    #     pywinauto.keyboard.send_keys(day)
-    #     time.sleep(self.WAIT_TIME_LONG)
-    #     self.logger.info(f"시작 날짜 선택:{year}-{month}-{day}")
-    #
-    # def _select_time_picker_start_hr_min(self):
-    #     hr, min = self.start_time[-2:]
-    #     self._focus_main_win()
-    #     time_picker_start_hr = self.time_picker_start.child_window(auto_id="comboBox_Hour", control_type="ComboBox")
-    #     time_picker_start_min = self.time_picker_start.child_window(auto_id="comboBox_Minute", control_type="ComboBox")
-    #
-    #     # 시간
-    #     time_picker_start_hr.click_input()
-    #     time.sleep(self.WAIT_TIME_LONG_LONG)
-    #     time_picker_start_hr.child_window(title=hr, control_type="ListItem").click_input()
-    #     time.sleep(self.WAIT_TIME_LONG)
-    #     # 분
-    #     time_picker_start_min.click_input()
-    #     time.sleep(self.WAIT_TIME_LONG_LONG)
-    #     time_picker_start_min.child_window(title=min, control_type="ListItem").click_input()
-    #     time.sleep(self.WAIT_TIME_LONG)
-    #
-    #     self.logger.info(f"시작 시간 선택:{hr}:{min}")
-
-    def _check_opt_file(self): 
-        opt_name = self.opt_name_map[self.water_system_name][self.dam_name]
-        opt_file_path = os.path.join(self.BASE_FILE_DIR, f"{opt_name}.OPT")
-        self.logger.info(f"옵션 파일 경로 {opt_file_path=}")
-        
-        if not os.path.exists(opt_file_path):
-            with open(opt_file_path, "w") as f:
-                pass
-            self.logger.info("OPT 파일 생성 완료")
-        else:
-            self.logger.info("OPT 파일 존재")
-        return opt_file_path
-        
-    def _save_opt_file(self, opt_file_path, opt_data):
-        if opt_data is None:
-            self.logger.info("OPT 데이터가 제공되지 않음")
-            return
-        
-        with open(opt_file_path, "w") as f:
-            f.write(opt_data)
-        self.logger.info("OPT 파일 적용 완료")
+    def _notify_stage(self, stage):
+        """처리 단계에 해당하는 작업 단계로 바뀌면 stage_callback 호출"""
+        task_stage = self.TASK_STAGES.get(stage)
+        if task_stage and task_stage != self._task_stage and self.stage_callback:
+            self._task_stage = task_stage
+            self.stage_callback(task_stage)
 
     def handle_opt_file(self):
-        opt_file_path = self._check_opt_file()
-        self._save_opt_file(opt_file_path, self.opt_data)
-
-    def _get_data(self):
-        self.main_win.set_focus()
-        time.sleep(self.WAIT_TIME)
-        keyboard.send_keys("{F5}")
-
-        graph_win = self.app.window(auto_id="GraphForm", control_type="Window")
-        graph_win.wait("visible", timeout=300)
-        graph_win.set_focus()
-        time.sleep(self.WAIT_TIME)
-        table_tap = graph_win.child_window(auto_id="tabControl", control_type="Tab").child_window(title="테이블", control_type="TabItem")
-        table_tap.click_input()
-        time.sleep(self.WAIT_TIME)
-
-        table_area = graph_win.child_window(title="테이블", auto_id="tabPage_Table", control_type="Pane")
-        table_sheet = table_area.child_window(auto_id="sheet_DetailView", control_type="Pane")
-
-        pywinauto.mouse.click(coords=(table_sheet.rectangle().left+2, table_sheet.rectangle().top+2))
-        time.sleep(self.WAIT_TIME)
-
-        for _ in range(8):
-            pywinauto.keyboard.send_keys("+{RIGHT}")
-            time.sleep(self.WAIT_TIME)
-        
-        pywinauto.keyboard.send_keys("^c")
-        time.sleep(self.WAIT_TIME_LONG)
-        table_data = pyperclip.paste()
-
-        analysis_win = self.app.window(auto_id="AnalysisForm", control_type="Window")
-        diagram_win = self.app.window(auto_id="DiagramSlideForm", control_type="Window")
-
-        graph_win.close()
-        analysis_win.close()
-        diagram_win.close()
-        time.sleep(self.WAIT_TIME_LONG)
+        opt_name = self.opt_name_map[self.water_system_name][self.dam_name]
+        self.driver.write_opt(opt_name, self.opt_data)
 
-        return table_data
-    
     def _save_data(self, clipboard_data):
         try:
-            data_io = StringIO(clipboard_data)
-            df = pd.read_csv(data_io, sep='\t', encoding='utf-8')
-            # .copy()를 사용하여 독립적인 DataFrame 생성
-            filtered_df = df[["월일시분", "관측우량(mm)", "유효우량(mm)", "관측유입(㎥/s)", "계산유입(㎥/s)", "댐수위(El. m)", "총방류(㎥/s)"]].copy()
-            filtered_df.rename(columns={
-                "월일시분": "obsrdt", 
-                "관측우량(mm)": "obsrf", 
-                "유효우량(mm)": "effrf", 
-                "관측유입(㎥/s)": "obsinflow", 
-                "계산유입(㎥/s)": "calcinflow", 
-                "댐수위(El. m)": "lowlevel", 
-                "총방류(㎥/s)": "totdcwtrqy"
-            }, inplace=True)
-
-            filtered_df["obsrdt"] = filtered_df["obsrdt"].apply(lambda x: str(x).replace(" ", "").replace(":", "").replace("-", ""))
-            
-            # 작업별 CSV 파일 저장
-            csv_path = self.work_dir / self.csv_filename
-            filtered_df.to_csv(csv_path, index=False, encoding='utf-8-sig')
-            self.logger.info(f"데이터를 {csv_path} 파일로 저장했습니다.")
+            # 필요한 열만 자료형을 지정해 읽고 월일시분은 한 번에 정규화 (result_table 참고)
+            filtered_df = parse_result_table(clipboard_data)
+
+            # 한 번만 직렬화해서 메모리에서 바로 업로드 (파일 보관은 forward_result에서 선택적으로)
+            csv_data = serialize_result(filtered_df, self.result_format)
+            self.logger.info(f"결과 {self.result_format} {len(csv_data)} bytes 생성")
             create_call_back_message("dataAnalysis", "completed", self.session_id,  "설정값을 기반으로 데이터를 분석하고 있습니다. 잠시만 기다려 주세요.")
             create_call_back_message("createCosfimChart", "processing", self.session_id,  "분석된 결과를 더 쉽게 확인하실 수 있도록 차트를 생성하고 있습니다. 잠시만 기다려 주세요.")
 
-            return str(csv_path)
+            return csv_data
 
         except Exception as e:
             self.logger.error(f"데이터프레임 변환 중 오류 발생: {e}")
             raise
 
+    def deliver_result(self, csv_path, data=None):
+        """이미 만들어진 결과 CSV(캐시/동일 작업)를 COSFIM 실행 없이 바로 포워딩 (data가 있으면 파일을 읽지 않음)"""
+        self.logger.info(f"기존 결과 전달: {csv_path or '메모리'}")
+        create_call_back_message("dataAnalysis", "completed", self.session_id,  "설정값을 기반으로 데이터를 분석하고 있습니다. 잠시만 기다려 주세요.")
+        create_call_back_message("createCosfimChart", "processing", self.session_id,  "분석된 결과를 더 쉽게 확인하실 수 있도록 차트를 생성하고 있습니다. 잠시만 기다려 주세요.")
+        if data is None:
+            with open(csv_path, "rb") as csv_file:
+                data = csv_file.read()
+        return self.forward_result(data)
+
+    def forward_result(self, data):
+        """결과 CSV(bytes) 포워딩 후 작업 폴더의 CSV 경로 반환 (작업 폴더에 쓰지 않으면 None)
+
+        outbox가 있으면 전달은 DeliveryOutbox가 하고, CSV와 전달 기록은 보관 스레드가 작업 폴더에 쓴다.
+        없으면 메모리에서 바로 업로드하고, archive면 CSV를 비동기로 보관한다.
+        """
+        self.result_data = data
+        csv_path = str(self.work_dir / self.csv_filename)
+        if self.outbox is not None:
+            # 전달은 DeliveryOutbox가 하지만 작업은 여기서 forwarding 단계로 넘어감 (끝나면 done)
+            self._notify_stage("forward")
+            self.outbox.enqueue(self.work_dir, self.forwarder.delivery_record(csv_path, self.current_time, self.task_id),
+                                data=data)
+            return csv_path
+        if self.archive:
+            get_archiver().archive(csv_path, data)
+        with self._stage("forward"):
+            self.forwarder.forward(success=True, data_path=csv_path, current_time=self.current_time, data=data)
+        return csv_path if self.archive else None
+
     def handle_data(self):
         try:
-            clipboard_data = self._get_data()
-            csv_path = self._save_data(clipboard_data)
-            self.forwarder.forward(success=True, data_path=csv_path, current_time=self.current_time)
-            return csv_path
-        except TimeoutError as e:
+            with self._stage("compute"):
+                self.driver.compute()
+            with self._stage("extract"):
+                table_data = self.driver.read_table()
+            with self._stage("save_data"):
+                csv_data = self._save_data(table_data)
+            return self.forward_result(csv_data)
+        except TimeoutError:
             raise
         except Exception as e:
             self.logger.error(f"데이터 처리 중 에러 발생: {e}")
             raise
 
-#    def cleanup(self):
-#        """리소스 정리"""
-#        try:
-#            if self.app:
-#                for window in self.app.windows():
-#                    try:
-#                        window.close()
-#                    except:
-#                        pass
-#            self.logger.info("앱 정리 완료")
-#        except Exception as e:
-#            self.logger.error(f"정리 중 에러: {e}")
-
-    def cleanup(self):
-        """리소스 정리 - UI 기반 정상 종료 우선"""
-        pids = []
-
-        try:
-            # 1단계: 앱 객체를 통한 UI 기반 정상 종료 시도
-            if self.app:
-                self.logger.info("앱 객체를 통한 프로세스 정리 시작...")
-                for window in self.app.windows():
-                    try:
-                        pid = window.process_id()
-                        pids.append(pid)
-
-                        # UI 메뉴를 통한 정상 종료 시도
-                        try:
-                            window.set_focus()
-                            time.sleep(0.3)
-                            window.type_keys('%{F4}')  # Alt+F4
-                            self.logger.info(f"UI 종료 시도 (Alt+F4): PID {pid}")
-                            time.sleep(1)
-
-                            # 저장 확인 창이 뜨면 "아니요" 선택
-                            try:
-                                confirm_win = window.child_window(title_re="선택|저장|알림", control_type="Window")
-                                if confirm_win.exists(timeout=2):
-                                    no_btn = confirm_win.child_window(title_re="아니요|No", control_type="Button")
-                                    if no_btn.exists(timeout=1):
-                                        no_btn.click_input()
-                                        self.logger.info(f"저장 확인 창 '아니요' 클릭: PID {pid}")
-                                        time.sleep(0.5)
-                            except:
-                                pass
-
-                        except Exception as e:
-                            self.logger.warning(f"UI 종료 시도 실패: {e}")
-                            window.close()
-
-                        self.logger.info(f"창 닫기 완료: PID {pid}")
-
-                    except Exception as e:
-                        self.logger.warning(f"창 닫기 실패: {e}")
-
-                time.sleep(2)
-
-                # 수집된 PID 중 아직 살아있는 프로세스만 강제 종료
-                for pid in set(pids):
-                    try:
-                        result = subprocess.run(['tasklist', '/FI', f'PID eq {pid}'],
-                                              capture_output=True, text=True, timeout=5)
-                        if str(pid) in result.stdout:
-                            subprocess.run(['taskkill', '/F', '/PID', str(pid)],
-                                         capture_output=True, timeout=5)
-                            self.logger.info(f"프로세스 강제 종료 완료: PID {pid}")
-                    except Exception as e:
-                        self.logger.warning(f"프로세스 강제 종료 실패 (PID {pid}): {e}")
-
-                time.sleep(1)
-
-        except Exception as e:
-            self.logger.error(f"앱 객체 정리 중 에러: {e}")
-        
-        # 2단계: 프로세스 이름으로 강제 정리 (안전장치)
-        try:
-            self.logger.info("프로세스 이름 기반 정리 시작...")
-            result = subprocess.run(['tasklist', '/FI', 'IMAGENAME eq COSFIM_GUI.exe'], 
-                                  capture_output=True, text=True, timeout=5)
-            
-            if 'COSFIM_GUI.exe' in result.stdout:
-                self.logger.warning("⚠️ 남아있는 COSFIM_GUI.exe 프로세스 발견! 강제 종료 시도...")
-                subprocess.run(['taskkill', '/F', '/IM', 'COSFIM_GUI.exe'], 
-                             capture_output=True, timeout=5)
-                self.logger.info("COSFIM_GUI.exe 프로세스 강제 종료 완료")
-                time.sleep(2)
-            else:
-                self.logger.info("남아있는 COSFIM_GUI.exe 프로세스 없음")
-                
-        except Exception as e:
-            self.logger.error(f"프로세스 이름 기반 정리 중 에러: {e}")
-        
-        # 3단계: 최종 확인 및 대기
-        try:
-            result = subprocess.run(['tasklist', '/FI', 'IMAGENAME eq COSFIM_GUI.exe'], 
-                                  capture_output=True, text=True, timeout=5)
-            if 'COSFIM_GUI.exe' not in result.stdout:
-                self.logger.info("✅ 모든 COSFIM 프로세스 정리 완료")
-            else:
-                self.logger.error("❌ 일부 COSFIM 프로세스가 여전히 남아있을 수 있습니다")
-        except:
-            pass
-        
-        time.sleep(2)  # 프로세스 완전 종료 대기
-
     def process(self):
         """전체 처리 프로세스"""
         try:
@@ -1007,20 +1194,29 @@ class CosfimHandler:
 
             create_call_back_message("launchApp", "processing", self.session_id,  "최적의 설정값을 생성 후 분석을 진행하기 위해 COSFIM을 실행하고 있습니다. 잠시만 기다려 주세요.")
 
-            self.launch_app()
+            if self.session is None:
+                self.driver = (self.driver_factory or load_driver_factory())(self.user_id, self.user_pw)
+                self.driver.bind(self.water_system_name, self.dam_name, self.wait_recorder, self.cancel_token)
+                self.driver.launch()
+            else:
+                # 세션 풀에서 받은 로그인된 인스턴스 재사용
+                self.driver.bind(self.water_system_name, self.dam_name, self.wait_recorder, self.cancel_token)
             self.logger.info("===런치 완료===")
             create_call_back_message("launchApp", "completed", self.session_id,  "최적의 설정값을 생성 후 분석을 진행하기 위해 COSFIM을 실행하고 있습니다. 잠시만 기다려 주세요.")
             create_call_back_message("dataAnalysis", "processing", self.session_id,  "설정값을 기반으로 데이터를 분석하고 있습니다. 잠시만 기다려 주세요.")
 
 
 
-            self.get_elements()
+            with self._stage("get_elements"):
+                self.driver.prepare()
             self.logger.info("===요소 처리 완료===")
 
-            self.handle_opt_file()
+            with self._stage("handle_opt_file"):
+                self.handle_opt_file()
             self.logger.info("===옵션 처리 완료===")
 
-            self.select_options()
+            with self._stage("select_options"):
+                self.driver.load_opt()
             self.logger.info("===항목 선택 완료===")
 
             csv_path = self.handle_data()
@@ -1029,27 +1225,95 @@ class CosfimHandler:
             
             return csv_path
 
+        except TaskAborted as e:
+            # 취소는 알리지 않고, 시간 초과 재시도/실패 알림은 워치독이 담당
+            self.logger.warning(f"작업 중단: {e}")
+            raise
         except Exception as e:
+            if self.cancel_token is not None and self.cancel_token.is_set():
+                # 취소/강제 종료로 생긴 에러 (WaitCancelled 등) - 포워딩하지 않음
+                self.logger.warning(f"작업 중단({self.cancel_token.reason}): {e}")
+                raise
             self.logger.error(f"처리 중 에러 발생: {e}", exc_info=True)
             # 에러 포워딩 시도 (실패해도 cleanup은 실행되도록)
             try:
-                self.forwarder.forward(success=False, err_msg=str(e))
+                self.forwarder.forward(success=False, err_msg=str(e), current_time=getattr(self, 'current_time', None))
             except Exception as forward_err:
                 self.logger.error(f"에러 보고 포워딩 실패: {forward_err}")
             raise
         finally:
-            self.cleanup()
+            # 세션 재사용 시 프로세스 종료는 세션 풀이 담당
+            if self.session is None and self.driver is not None:
+                # 취소된 작업도 COSFIM은 종료해야 하므로 취소 확인 없이 시간만 기록
+                with time_stage("cleanup", self.water_system_name, self.dam_name):
+                    self.driver.shutdown()
+            elif self.session is not None and self.cancel_token is not None and self.cancel_token.is_set():
+                # 단계 도중 취소된 세션은 GUI 상태를 알 수 없으므로 풀에 돌려보내지 않고 재시작
+                self.session.invalidate()
+            self.logger.info(f"GUI 대기 시간 합계: {self.wait_recorder.total():.1f}초")
+
+
+def make_slots(driver_factory, workers=1, reuse_session=True, max_tasks_per_session=20,
+               workspace_root=None, workspace_template=BASE_WORKSPACE_DIR):
+    """워커 슬롯 목록 생성
+
+    workspace_root가 주어지거나 workers가 2 이상이면 슬롯마다 workspace_root/slot_<n>
+    작업 폴더(workspace_template 사본)를 만들고 드라이버에 workspace로 넘긴다.
+    슬롯마다 세션 풀이 따로 있으므로 COSFIM 인스턴스도 슬롯 수만큼 뜬다.
+    """
+    if workers == 0:
+        return []       # 원격 워커만으로 처리 (worker_agent.py)
+    if workers > 1 and not getattr(driver_factory, "SLOT_WORKSPACES", True):
+        raise ValueError(f"{driver_factory.__name__}는 슬롯별 작업 폴더를 지원하지 않아 workers는 1이어야 합니다")
+    workspaces = [None]
+    if workers > 1 or workspace_root:
+        workspaces = make_workspaces(workers, workspace_root or SLOT_WORKSPACE_ROOT, template_dir=workspace_template)
+    slots = []
+    for index, workspace in enumerate(workspaces):
+        slot_factory = driver_factory if workspace is None else partial(driver_factory, workspace=workspace)
+        slots.append({
+            'index': index,
+            'workspace': workspace,
+            'driver_factory': slot_factory,
+            'session_pool': CosfimSessionPool(slot_factory, max_tasks_per_session) if reuse_session else None,
+        })
+    return slots
 
 
 class MultiCosfimManager:
-    """다중 COSFIM 작업 관리자"""
-    def __init__(self):
-        self.task_queue = TaskQueue()
+    """다중 COSFIM 작업 관리자
+
+    workers개의 COSFIM 인스턴스를 슬롯별 작업 폴더에서 병렬로 실행한다 (make_slots 참고).
+    workers=0이면 COSFIM을 직접 실행하지 않고 원격 워커의 임대 요청으로만 처리한다.
+    결과 포워딩은 delivery_concurrency개의 전달 스레드가 따로 한다 (0이면 워커가 직접).
+    archive_results=False면 (전달 스레드 없이) 결과 CSV를 디스크에 쓰지 않는다.
+    """
+    def __init__(self, reuse_session=True, max_tasks_per_session=20, store=None, result_cache=None, driver_factory=None,
+                 max_queue_size=None, max_pending_per_session=None, task_timeout=TASK_TIMEOUT,
+                 workers=1, workspace_root=None, workspace_template=BASE_WORKSPACE_DIR,
+                 delivery_concurrency=DELIVERY_CONCURRENCY, archive_results=True):
+        if workers:
+            driver_factory = driver_factory or load_driver_factory()
+        slots = make_slots(driver_factory, workers, reuse_session, max_tasks_per_session,
+                           workspace_root=workspace_root, workspace_template=workspace_template)
+        self.task_queue = TaskQueue(store=store, result_cache=result_cache, max_queue_size=max_queue_size,
+                                    max_pending_per_session=max_pending_per_session, task_timeout=task_timeout,
+                                    slots=slots, delivery_concurrency=delivery_concurrency,
+                                    archive_results=archive_results)
         self.results = []
         
     def add_dam_task(self, water_system_name, dam_name, dam_code, template_id, 
-                     user_id, user_pw, opt_data, api_end_point, session_id, widget_name):
-        """댐 작업 추가"""
+                     user_id, user_pw, opt_data, api_end_point, session_id, widget_name,
+                     priority=DEFAULT_PRIORITY, deadline=None, result_format=DEFAULT_RESULT_FORMAT):
+        """댐 작업 추가
+
+        priority는 PRIORITY_CLASSES 중 하나(emergency, normal, batch)이고
+        deadline(datetime)이 지난 뒤 차례가 온 작업은 실행하지 않고 실패 처리한다.
+        result_format은 위젯으로 보낼 결과 형식이다 (result_table.RESULT_FORMATS).
+        """
+        if priority not in PRIORITY_CLASSES:
+            raise ValueError(f"알 수 없는 우선순위입니다: {priority} (가능: {', '.join(PRIORITY_CLASSES)})")
+        check_result_format(result_format)
         task_data = {
             'water_system_name': water_system_name,
             'dam_name': dam_name,
@@ -1060,7 +1324,10 @@ class MultiCosfimManager:
             'opt_data': opt_data,
             'api_end_point': api_end_point,
             'session_id' : session_id,
-            'widget_name' : widget_name
+            'widget_name' : widget_name,
+            'priority': priority,
+            'deadline': deadline.isoformat() if deadline else None,
+            'result_format': result_format
         }
         
         task_id = self.task_queue.add_task(task_data)
@@ -1087,7 +1354,7 @@ class MultiCosfimManager:
             time.sleep(1)
         
         # 최종 결과 수집
-        final_results = self.task_queue.get_results()
+        final_results = self.task_queue.get_results(consumer="manager")
         self.results.extend(final_results)
         return self.results
     
@@ -1096,8 +1363,8 @@ class MultiCosfimManager:
         return {
             'queue_size': self.task_queue.task_queue.qsize(),
             'is_running': self.task_queue.is_running,
-            'completed_tasks': len(self.results),
-            'recent_results': self.task_queue.get_results()
+            'completed_tasks': self.task_queue.result_log.stats()['next_offset'],
+            'recent_results': self.task_queue.get_results(consumer="status")
         }
     
     def save_results_to_file(self, filename="multi_cosfim_results.json"):
@@ -0,0 +1,269 @@
+from datetime import datetime
+
+# OPT 분석단위(분) -> COSFIM 시간 간격 표기
+TIME_INTERVAL_MAP = {"10": "10분", "30": "30분", "60": "60분", "1440": "24시간"}
+
+# 수계별 매개변수 행 수와 기저유량 항목 수 (sample_opt 기준, 없는 수계는 검사 생략)
+WATER_SYSTEM_LAYOUT = {
+    "낙동강": {"parameter_rows": 5, "baseflow_columns": 7},
+    "거제권": {"parameter_rows": 2, "baseflow_columns": 4},
+    "태화강": {"parameter_rows": 2, "baseflow_columns": 4},
+}
+PARAMETER_COLUMNS = 8
+FORECAST_RAIN_FIELDS = 8
+
+
+class OptParseError(ValueError):
+    """OPT 구조 오류 (line_no는 1부터 시작)"""
+    def __init__(self, message, line_no=None):
+        super().__init__(f"{line_no}번째 줄: {message}" if line_no else message)
+        self.message = message
+        self.line_no = line_no
+
+
+class OptValidationError(ValueError):
+    """OPT 검증 실패 (errors: [(줄 번호, 메시지)])"""
+    def __init__(self, errors):
+        super().__init__("; ".join(f"{line_no}번째 줄: {message}" if line_no else message
+                                   for line_no, message in errors))
+        self.errors = errors
+
+
+def _is_date_tokens(tokens):
+    return (len(tokens) >= 5 and len(tokens[0]) == 4 and tokens[0][:2] in ("19", "20")
+            and all(t.isdigit() for t in tokens[:5]))
+
+
+def _floats(tokens, line_no):
+    try:
+        return tuple(float(t) for t in tokens)
+    except ValueError:
+        raise OptParseError(f"숫자가 아닌 값이 있습니다: {' '.join(tokens)}", line_no)
+
+
+class OptDocument:
+    """COSFIM OPT 파일 모델
+
+    텍스트를 한 번만 줄 단위로 토큰화하여 각 항목을 타입이 있는 필드로
+    보관한다. 원본 줄은 그대로 유지하므로 to_text()는 입력과 바이트 단위로
+    같은 텍스트를 돌려준다. 항목 순서는 backup/OPT_file_info.py 참고.
+    """
+    __slots__ = (
+        "lines",
+        "analysis_type", "analysis_year", "analysis_start", "analysis_end", "header_flag",
+        "region_flag",
+        "parameters",
+        "start_time", "current_time",
+        "rain_correction",
+        "total_steps", "interval",
+        "baseflow",
+        "forecast_rain",
+        "rain_options",
+        "discharge_pattern_count", "discharge_patterns",
+        "fsa_sections",
+        "line_no",
+    )
+
+    def __init__(self, lines):
+        self.lines = lines
+        self.line_no = {}
+
+    @classmethod
+    def parse(cls, text):
+        doc = cls(text.split("\n"))
+        doc._parse()
+        return doc
+
+    def to_text(self):
+        return "\n".join(self.lines)
+
+    @property
+    def time_interval(self):
+        """COSFIM 콤보박스 표기 (예: "30분")"""
+        return TIME_INTERVAL_MAP[str(self.interval)]
+
+    @property
+    def current_time_fields(self):
+        """현재 시간 줄의 (년, 월, 일, 시, 분) 원본 문자열"""
+        return tuple(self.lines[self.line_no["current_time"] - 1].split()[:5])
+
+    def _parse(self):
+        tokenized = [line.split() for line in self.lines]
+        n_lines = len(tokenized)
+
+        def need(idx, name):
+            if idx >= n_lines or not tokenized[idx]:
+                raise OptParseError(f"{name} 항목이 없습니다", idx + 1)
+            self.line_no[name] = idx + 1
+            return tokenized[idx]
+
+        # 1줄: 분석 유형, 년, 시작(MMDDHH), 종료(MMDDHH), 플래그
+        header = need(0, "header")
+        self.analysis_type = header[0]
+        self.analysis_year = header[1] if len(header) > 1 else None
+        self.analysis_start = header[2] if len(header) > 2 else None
+        self.analysis_end = header[3] if len(header) > 3 else None
+        self.header_flag = header[4] if len(header) > 4 else None
+
+        # 2줄: 적용권역 (전체 N, 중권역별 Y)
+        self.region_flag = need(1, "region_flag")[0]
+
+        # 매개변수 행렬 (시작 시간 줄 전까지)
+        idx = 2
+        parameters = []
+        while idx < n_lines and not _is_date_tokens(tokenized[idx]):
+            if tokenized[idx]:
+                parameters.append(_floats(tokenized[idx], idx + 1))
+            idx += 1
+        self.parameters = tuple(parameters)
+        if idx >= n_lines:
+            raise OptParseError("시작 시간을 찾을 수 없습니다. 파일 형식을 확인하세요.")
+        self.line_no["parameters"] = 3
+
+        # 시작 시간, 현재 시간
+        self.start_time = self._parse_time(need(idx, "start_time"), idx + 1)
+        tokens = need(idx + 1, "current_time")
+        if not _is_date_tokens(tokens):
+            raise OptParseError("현재 시간 형식이 올바르지 않습니다", idx + 2)
+        self.current_time = self._parse_time(tokens, idx + 2)
+        idx += 2
+
+        # 예측강우 보정방법 (RDS 1, AVG 2)
+        self.rain_correction = need(idx, "rain_correction")[0]
+        idx += 1
+
+        # 총연산시간, 분석단위
+        tokens = need(idx, "interval")
+        self.line_no["total_steps"] = idx + 1
+        try:
+            self.total_steps = int(tokens[0])
+            self.interval = int(tokens[-1])
+        except ValueError:
+            raise OptParseError(f"총연산시간/분석단위가 정수가 아닙니다: {' '.join(tokens)}", idx + 1)
+        idx += 1
+
+        # 기저유량/감소계수
+        self.baseflow = _floats(need(idx, "baseflow"), idx + 1)
+        idx += 1
+
+        # 예측 강우 (갯수, 항목별 강우량 지속시간 패턴 년 월 일 시 분)
+        self.forecast_rain = _floats(need(idx, "forecast_rain"), idx + 1)
+        idx += 1
+
+        self.rain_options = tuple(need(idx, "rain_options"))
+        idx += 1
+
+        # 방류 패턴 갯수와 패턴 값
+        tokens = need(idx, "discharge_pattern_count")
+        try:
+            self.discharge_pattern_count = int(tokens[0])
+        except ValueError:
+            raise OptParseError(f"방류 패턴 갯수가 정수가 아닙니다: {tokens[0]}", idx + 1)
+        idx += 1
+
+        self.line_no["discharge_patterns"] = idx + 1
+        patterns = []
+        while idx < n_lines and not (tokenized[idx] and tokenized[idx][0].startswith("#")):
+            if tokenized[idx]:
+                patterns.append(_floats(tokenized[idx], idx + 1))
+            idx += 1
+        self.discharge_patterns = tuple(patterns)
+
+        # 선택 항목 (#Fsa# 등)
+        sections = {}
+        current = None
+        while idx < n_lines:
+            tokens = tokenized[idx]
+            if tokens and tokens[0].startswith("#") and tokens[0].endswith("#") and len(tokens[0]) > 2:
+                current = tokens[0].strip("#")
+                sections[current] = []
+                self.line_no[f"#{current}#"] = idx + 1
+            elif tokens and current is not None:
+                sections[current].append(_floats(tokens, idx + 1))
+            idx += 1
+        self.fsa_sections = {name: tuple(rows) for name, rows in sections.items()}
+
+    @staticmethod
+    def _parse_time(tokens, line_no):
+        if not _is_date_tokens(tokens):
+            raise OptParseError(f"날짜 형식이 올바르지 않습니다: {' '.join(tokens)}", line_no)
+        year, month, day, hr, minute = (int(t) for t in tokens[:5])
+        try:
+            return datetime(year, month, day, hr, minute)
+        except ValueError as e:
+            raise OptParseError(f"잘못된 날짜입니다: {' '.join(tokens)} ({e})", line_no)
+
+
+def validate_opt(text, water_system_name=None):
+    """COSFIM 실행 전 OPT 구조/값 검증, 통과 시 OptDocument 반환"""
+    try:
+        doc = OptDocument.parse(text)
+    except OptParseError as e:
+        raise OptValidationError([(e.line_no, e.message)])
+
+    errors = []
+    line_no = doc.line_no
+
+    # 1줄: 분석 유형, 년, 시작/종료(MMDDHH), 플래그
+    header = doc.lines[0].split()
+    if len(header) != 5:
+        errors.append((line_no["header"], f"항목이 5개여야 합니다 (현재 {len(header)}개)"))
+    if doc.analysis_type not in ("O", "Y", "N"):
+        errors.append((line_no["header"], f"분석 유형은 O/Y/N 중 하나여야 합니다: {doc.analysis_type}"))
+    if doc.analysis_year is not None and not (len(doc.analysis_year) == 4 and doc.analysis_year.isdigit()):
+        errors.append((line_no["header"], f"분석 년도가 올바르지 않습니다: {doc.analysis_year}"))
+    for value in (doc.analysis_start, doc.analysis_end):
+        if value is not None and not (len(value) == 6 and value.isdigit()):
+            errors.append((line_no["header"], f"분석 기간은 MMDDHH 형식이어야 합니다: {value}"))
+    if (doc.analysis_start and doc.analysis_end and doc.analysis_start.isdigit() and doc.analysis_end.isdigit()
+            and doc.analysis_start > doc.analysis_end):
+        errors.append((line_no["header"], f"분석 시작이 종료보다 늦습니다: {doc.analysis_start} > {doc.analysis_end}"))
+    if doc.header_flag is not None and doc.header_flag not in ("N", "Y"):
+        errors.append((line_no["header"], f"플래그는 N/Y 중 하나여야 합니다: {doc.header_flag}"))
+
+    if doc.region_flag not in ("N", "Y"):
+        errors.append((line_no["region_flag"], f"적용권역은 N/Y 중 하나여야 합니다: {doc.region_flag}"))
+
+    # 매개변수 행렬
+    layout = WATER_SYSTEM_LAYOUT.get(water_system_name)
+    for offset, row in enumerate(doc.parameters):
+        if len(row) != PARAMETER_COLUMNS:
+            errors.append((line_no["parameters"] + offset,
+                           f"매개변수는 {PARAMETER_COLUMNS}개여야 합니다 (현재 {len(row)}개)"))
+    if layout and len(doc.parameters) != layout["parameter_rows"]:
+        errors.append((line_no["parameters"],
+                       f"{water_system_name} 매개변수 행은 {layout['parameter_rows']}개여야 합니다 (현재 {len(doc.parameters)}개)"))
+
+    # 시작/현재 시간
+    if doc.start_time > doc.current_time:
+        errors.append((line_no["current_time"], f"현재 시간이 시작 시간보다 이릅니다: {doc.current_time} < {doc.start_time}"))
+
+    # 총연산시간, 분석단위
+    if str(doc.interval) not in TIME_INTERVAL_MAP:
+        errors.append((line_no["interval"],
+                       f"분석단위는 {', '.join(TIME_INTERVAL_MAP)} 중 하나여야 합니다: {doc.interval}"))
+    if doc.total_steps <= 0:
+        errors.append((line_no["total_steps"], f"총연산시간은 0보다 커야 합니다: {doc.total_steps}"))
+
+    if layout and len(doc.baseflow) != layout["baseflow_columns"]:
+        errors.append((line_no["baseflow"],
+                       f"{water_system_name} 기저유량 항목은 {layout['baseflow_columns']}개여야 합니다 (현재 {len(doc.baseflow)}개)"))
+
+    # 예측 강우: 갯수 + 항목별 8개 값
+    rain_count = doc.forecast_rain[0]
+    if rain_count != int(rain_count) or rain_count < 0:
+        errors.append((line_no["forecast_rain"], f"예측 강우 갯수가 올바르지 않습니다: {rain_count}"))
+    elif len(doc.forecast_rain) != 1 + int(rain_count) * FORECAST_RAIN_FIELDS:
+        errors.append((line_no["forecast_rain"],
+                       f"예측 강우 {int(rain_count)}개에는 값 {1 + int(rain_count) * FORECAST_RAIN_FIELDS}개가 필요합니다 "
+                       f"(현재 {len(doc.forecast_rain)}개)"))
+
+    # 방류 패턴
+    if doc.discharge_pattern_count < 1:
+        errors.append((line_no["discharge_pattern_count"], f"방류 패턴 갯수는 1 이상이어야 합니다: {doc.discharge_pattern_count}"))
+    if not doc.discharge_patterns:
+        errors.append((line_no["discharge_patterns"], "방류 패턴 값이 없습니다"))
+
+    if errors:
+        raise OptValidationError(errors)
+    return doc
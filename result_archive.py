@@ -0,0 +1,103 @@
+import os
+import queue
+import logging
+import threading
+from pathlib import Path
+
+# 보관을 기다릴 수 있는 결과 수 (넘으면 보관하지 않고 버림 - 전달에는 영향 없음)
+ARCHIVE_MAX_PENDING = 256
+
+
+class ResultArchiver:
+    """결과 CSV 비동기 보관
+
+    archive()는 대기열에 넣고 바로 반환한다. 전용 스레드 하나가 임시 파일에
+    쓰고 교체해서 보관하므로 워커는 디스크 쓰기를 기다리지 않는다. 보관은
+    선택 사항이라 대기열이 차거나 쓰기에 실패하면 로그만 남긴다.
+    submit()으로 다른 디스크 쓰기(결과 캐시, 전달 기록)도 같은 스레드에서 순서대로 한다.
+    """
+    def __init__(self, max_pending=ARCHIVE_MAX_PENDING):
+        self.logger = logging.getLogger("ResultArchiver")
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = None
+        self.archived_count = 0
+        self.dropped_count = 0
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._worker_loop, name="result-archiver", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=5):
+        """남은 결과를 timeout 동안 보관한 뒤 중지"""
+        if self._thread is None:
+            return
+        try:
+            self._queue.put(None, timeout=timeout)  # 종료 신호
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+        self._thread = None
+        self.logger.info(f"결과 보관기 중지 (보관 {self.archived_count}건, 버림 {self.dropped_count}건)")
+
+    def archive(self, path, data):
+        """data(bytes)를 path에 보관하도록 대기열에 추가 (블로킹 없음)"""
+        return self.submit(write_atomic, Path(path), data)
+
+    def submit(self, write, *args):
+        """write(*args)를 보관 스레드에서 실행하도록 대기열에 추가 (블로킹 없음, 가득 차면 False)"""
+        try:
+            self._queue.put_nowait((write, args))
+            return True
+        except queue.Full:
+            self.dropped_count += 1
+            self.logger.warning(f"보관 대기열이 가득 차 쓰기를 건너뜀: {write.__name__} {args[0] if args else ''}")
+            return False
+
+    def stats(self):
+        return {'pending': self._queue.qsize(), 'archived': self.archived_count, 'dropped': self.dropped_count}
+
+    def _worker_loop(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            write, args = item
+            try:
+                write(*args)
+                self.archived_count += 1
+            except Exception as e:
+                self.logger.error(f"결과 보관 실패 ({write.__name__} {args[0] if args else ''}): {e}")
+
+
+def write_atomic(path, data):
+    """임시 파일에 쓰고 교체 (쓰는 도중 종료되어도 반쯤 쓴 파일이 남지 않음, 폴더가 없으면 만듦)"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+_archiver = None
+_archiver_lock = threading.Lock()
+
+
+def get_archiver():
+    """프로세스 공용 결과 보관기 (최초 호출 시 시작)"""
+    global _archiver
+    with _archiver_lock:
+        if _archiver is None:
+            _archiver = ResultArchiver()
+            _archiver.start()
+        return _archiver
+
+
+def shutdown_archiver(timeout=5):
+    """공용 결과 보관기의 남은 결과 보관 후 중지"""
+    global _archiver
+    with _archiver_lock:
+        archiver, _archiver = _archiver, None
+    if archiver is not None:
+        archiver.stop(timeout)
@@ -0,0 +1,122 @@
+import os
+import time
+import shutil
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from collections import OrderedDict
+
+
+def make_result_key(water_system_name, dam_name, opt_data, variant=None):
+    """(수계, 댐, 정규화된 OPT) 내용 해시
+
+    variant는 같은 입력의 다른 결과 표현(예: 결과 형식)이며 None이면 넣지 않는다.
+    """
+    digest = hashlib.sha256()
+    for part in (water_system_name, dam_name, opt_data) + ((variant,) if variant else ()):
+        digest.update((part or "").encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """내용 주소 기반 결과 캐시
+
+    항목은 {key}.{suffix} 파일 하나이며 suffix는 결과 형식의 확장자다.
+    디스크 사용량이 max_bytes를 넘으면 가장 오래 사용되지 않은 항목부터
+    제거하고, ttl_seconds가 지난 항목은 조회 시 만료시킨다.
+    """
+    def __init__(self, root="result_cache", max_bytes=512 * 1024 * 1024, ttl_seconds=3600):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.logger = logging.getLogger("ResultCache")
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # key -> (path, size, created_at), LRU 순서
+        self._total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._load_index()
+
+    def _load_index(self):
+        """재시작 시 디스크의 캐시 파일로 인덱스 재구성 (수정 시각 순, 쓰다 남은 .tmp는 무시)"""
+        files = sorted((p for p in self.root.iterdir() if p.is_file() and p.suffix != ".tmp"),
+                       key=lambda p: p.stat().st_mtime)
+        for path in files:
+            stat = path.stat()
+            self._entries[path.name.split(".", 1)[0]] = (path, stat.st_size, stat.st_mtime)
+            self._total_bytes += stat.st_size
+        if files:
+            self.logger.info(f"결과 캐시 {len(files)}개 적재 ({self._total_bytes} bytes)")
+
+    def get(self, key):
+        """캐시된 결과 파일 경로 반환 (없거나 만료 시 None)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl_seconds and time.time() - entry[2] > self.ttl_seconds:
+                self._remove(key)
+                entry = None
+            if entry is None or not entry[0].exists():
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return str(entry[0])
+
+    def read(self, key):
+        """캐시된 결과 내용(bytes) 반환 (없거나 만료됐거나 읽기 전에 제거되었으면 None)"""
+        path = self.get(key)
+        if path is None:
+            return None
+        try:
+            return Path(path).read_bytes()
+        except FileNotFoundError:
+            # get()과 읽기 사이에 다른 스레드가 용량 초과로 제거 - 적중이 아니라 누락
+            with self._lock:
+                self.hits -= 1
+                self.misses += 1
+            return None
+
+    def put(self, key, source, suffix="csv"):
+        """결과 파일(경로 또는 내용 bytes)을 {key}.{suffix}로 캐시에 저장 (원자적 교체)"""
+        target = self.root / f"{key}.{suffix}"
+        tmp_path = self.root / f"{key}.{suffix}.tmp"
+        if isinstance(source, bytes):
+            tmp_path.write_bytes(source)
+        else:
+            shutil.copyfile(source, tmp_path)
+        os.replace(tmp_path, target)
+        size = target.stat().st_size
+
+        with self._lock:
+            if key in self._entries:
+                self._total_bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (target, size, time.time())
+            self._total_bytes += size
+            while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+        return str(target)
+
+    def _remove(self, key):
+        path, size, _ = self._entries.pop(key)
+        self._total_bytes -= size
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self._total_bytes,
+            }
@@ -0,0 +1,91 @@
+import logging
+import threading
+from collections import deque
+
+
+class ResultLog:
+    """추가 전용 작업 결과 로그 (소비자별 커서)
+
+    결과마다 단조 증가하는 오프셋이 붙고, 소비자는 이름별로 다음에 읽을
+    오프셋(커서)을 가진다. 한 소비자가 읽어도 다른 소비자의 결과는
+    사라지지 않는다. 모든 소비자가 읽은 항목은 컴팩션으로 제거하고,
+    max_entries를 넘으면 읽지 않은 항목도 오래된 것부터 버린다 (뒤처진
+    소비자의 유실 수는 stats()의 lost에 기록).
+    """
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self.logger = logging.getLogger("ResultLog")
+        self._cond = threading.Condition()
+        self._entries = deque()
+        self._first_offset = 0      # _entries[0]의 오프셋
+        self._next_offset = 0
+        self._cursors = {}          # 소비자 이름 -> 다음에 읽을 오프셋
+        self._lost = {}             # 소비자 이름 -> 컴팩션으로 유실된 결과 수
+
+    def append(self, result):
+        """결과 추가 후 오프셋 반환"""
+        with self._cond:
+            offset = self._next_offset
+            self._entries.append(result)
+            self._next_offset += 1
+            self._compact()
+            self._cond.notify_all()
+            return offset
+
+    def register(self, consumer, from_start=True):
+        """소비자 등록 (from_start면 남아 있는 가장 오래된 결과부터, 아니면 이후 결과만)"""
+        with self._cond:
+            if consumer not in self._cursors:
+                self._cursors[consumer] = self._first_offset if from_start else self._next_offset
+                self._lost[consumer] = 0
+
+    def unregister(self, consumer):
+        with self._cond:
+            self._cursors.pop(consumer, None)
+            self._lost.pop(consumer, None)
+            self._compact()
+
+    def read(self, consumer, max_items=None, timeout=None):
+        """consumer의 커서 이후 결과를 반환하고 커서 이동 (처음 읽으면 자동 등록)
+
+        timeout이 주어지면 새 결과가 없을 때 최대 timeout초 대기한다.
+        """
+        self.register(consumer)
+        with self._cond:
+            if timeout and self._cursors[consumer] >= self._next_offset:
+                self._cond.wait_for(lambda: self._cursors.get(consumer, 0) < self._next_offset, timeout)
+            cursor = self._cursors[consumer]
+            if cursor < self._first_offset:
+                self._lost[consumer] += self._first_offset - cursor
+                self.logger.warning(f"소비자 {consumer}: 결과 {self._first_offset - cursor}개 유실 (컴팩션)")
+                cursor = self._first_offset
+            end = self._next_offset if max_items is None else min(self._next_offset, cursor + max_items)
+            start_idx = cursor - self._first_offset
+            results = [self._entries[idx] for idx in range(start_idx, end - self._first_offset)]
+            self._cursors[consumer] = end
+            self._compact()
+            return results
+
+    def _compact(self):
+        # 모든 소비자가 읽은 항목 제거 (소비자가 없으면 max_entries까지 보관)
+        if self._cursors:
+            min_cursor = min(self._cursors.values())
+            while self._entries and self._first_offset < min_cursor:
+                self._entries.popleft()
+                self._first_offset += 1
+        while len(self._entries) > self.max_entries:
+            self._entries.popleft()
+            self._first_offset += 1
+
+    def __len__(self):
+        with self._cond:
+            return len(self._entries)
+
+    def stats(self):
+        with self._cond:
+            return {
+                'entries': len(self._entries),
+                'next_offset': self._next_offset,
+                'consumers': {name: {'lag': self._next_offset - cursor, 'lost': self._lost[name]}
+                              for name, cursor in self._cursors.items()},
+            }
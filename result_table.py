@@ -0,0 +1,114 @@
+import gzip
+from io import StringIO
+
+import pandas as pd
+
+# COSFIM 결과 테이블 열 -> 위젯 CSV 열 (이 순서로 내보냄)
+RESULT_COLUMNS = {
+    "월일시분": "obsrdt",
+    "관측우량(mm)": "obsrf",
+    "유효우량(mm)": "effrf",
+    "관측유입(㎥/s)": "obsinflow",
+    "계산유입(㎥/s)": "calcinflow",
+    "댐수위(El. m)": "lowlevel",
+    "총방류(㎥/s)": "totdcwtrqy",
+}
+# 파싱할 때 지정하는 자료형 (월일시분은 normalize_timestamps가 변환하므로 문자열로 읽음)
+# 값 열은 자료형을 추론해서 정수 열은 정수로, 실수 열은 원래 자릿수 그대로 CSV에 나가게 함
+RESULT_DTYPES = {"월일시분": str}
+# COSFIM이 내보내는 월일시분 형식과 길이 (다르면 구분 문자만 지우는 방식으로 처리)
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M"
+TIMESTAMP_LENGTH = len("2025-08-05 13:00")
+# 월일시분에서 지우는 구분 문자 (공백, 콜론, 하이픈)
+TIMESTAMP_SEPARATORS = str.maketrans("", "", " :-")
+
+# 작업별로 고를 수 있는 결과 형식 (arrow/parquet는 pyarrow 필요)
+RESULT_FORMATS = {
+    "csv": {"extension": "csv", "content_type": "text/csv", "encoding": None},
+    "csv.gz": {"extension": "csv.gz", "content_type": "text/csv", "encoding": "gzip"},
+    "ndjson": {"extension": "ndjson", "content_type": "application/x-ndjson", "encoding": None},
+    "arrow": {"extension": "arrow", "content_type": "application/vnd.apache.arrow.file", "encoding": None},
+    "parquet": {"extension": "parquet", "content_type": "application/vnd.apache.parquet", "encoding": None},
+}
+# 위젯 백엔드가 받던 BOM 포함 CSV
+DEFAULT_RESULT_FORMAT = "csv"
+
+
+def parse_result_table(text):
+    """클립보드 TSV를 위젯 CSV 열의 DataFrame으로 변환
+
+    필요한 열만 읽고(usecols) 월일시분은 normalize_timestamps로 한 번에
+    변환한다. 값 열은 전체 테이블을 읽던 때와 같이 자료형을 추론하므로
+    CSV는 그때와 같다. 필요한 열이 없으면 KeyError를 낸다.
+    """
+    columns = list(RESULT_COLUMNS)
+    try:
+        df = pd.read_csv(StringIO(text), sep="\t", usecols=columns, dtype=RESULT_DTYPES)
+    except ValueError:
+        df = pd.read_csv(StringIO(text), sep="\t", dtype=RESULT_DTYPES)
+    # usecols는 원래 열 순서를 따르므로 내보낼 순서로 다시 고름
+    df = df[columns].rename(columns=RESULT_COLUMNS)
+    df["obsrdt"] = normalize_timestamps(df["obsrdt"])
+    return df
+
+
+def normalize_timestamps(values):
+    """월일시분 문자열을 YYYYMMDDHHMM으로 변환
+
+    모두 0으로 채운 TIMESTAMP_FORMAT이면 to_datetime으로 한 번에 파싱해서
+    int64로 계산하고 (CSV에는 같은 숫자 문자열로 기록됨), 형식이 다르거나
+    빈 값이 있으면 구분 문자만 지운 문자열을 반환한다.
+    """
+    parsed = None
+    if values.str.len().eq(TIMESTAMP_LENGTH).all():
+        try:
+            parsed = pd.to_datetime(values, format=TIMESTAMP_FORMAT)
+        except (ValueError, TypeError):
+            pass
+    if parsed is None or parsed.isna().any():
+        # 빈 값은 벡터화 이전(str(x))과 같이 "nan"
+        return values.astype(str).fillna("nan").str.translate(TIMESTAMP_SEPARATORS)
+    parts = [parsed.dt.year, parsed.dt.month, parsed.dt.day, parsed.dt.hour, parsed.dt.minute]
+    result = parts[0].astype("int64")
+    for part in parts[1:]:
+        result = result * 100 + part.astype("int64")
+    return result
+
+
+def check_result_format(result_format):
+    """알 수 없는 결과 형식이거나 필요한 패키지가 없으면 ValueError"""
+    if result_format not in RESULT_FORMATS:
+        raise ValueError(f"알 수 없는 결과 형식입니다: {result_format} (가능: {', '.join(RESULT_FORMATS)})")
+    if result_format in ("arrow", "parquet"):
+        _import_pyarrow()
+
+
+def _import_pyarrow():
+    """pyarrow는 arrow/parquet 형식을 쓸 때만 불러옴"""
+    try:
+        import pyarrow
+    except ImportError as e:
+        raise ValueError("arrow/parquet 결과 형식에는 pyarrow가 필요합니다 (pip install pyarrow)") from e
+    return pyarrow
+
+
+def serialize_result(df, result_format=DEFAULT_RESULT_FORMAT):
+    """parse_result_table 결과를 result_format의 bytes로 직렬화"""
+    if result_format == "csv":
+        return df.to_csv(index=False).encode("utf-8-sig")
+    if result_format == "csv.gz":
+        # 압축을 풀면 csv 형식과 같은 내용
+        return gzip.compress(df.to_csv(index=False).encode("utf-8-sig"), compresslevel=6)
+    if result_format == "ndjson":
+        return df.to_json(orient="records", lines=True, force_ascii=False).encode("utf-8")
+    check_result_format(result_format)
+    pa = _import_pyarrow()
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    if result_format == "arrow":
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    else:
+        import pyarrow.parquet as pq
+        pq.write_table(table, sink)
+    return sink.getvalue().to_pybytes()
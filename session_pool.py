@@ -0,0 +1,130 @@
+import time
+import logging
+import threading
+from contextlib import suppress
+
+
+class CosfimSession:
+    """작업 간 재사용되는 로그인된 COSFIM 인스턴스"""
+    def __init__(self, driver, user_id):
+        self.driver = driver
+        self.user_id = user_id
+        self.task_count = 0
+        self.created_at = time.time()
+        self.broken = False
+
+    def invalidate(self):
+        """GUI 상태를 믿을 수 없는 세션 (예: 연산 도중 취소) - 반환/다음 사용 시 재시작"""
+        self.broken = True
+
+
+class CosfimSessionPool:
+    """로그인된 COSFIM 인스턴스를 작업 간 유지하는 세션 관리자
+
+    driver_factory(user_id, user_pw)는 launch(), health_check(), shutdown(),
+    kill()을 제공하는 드라이버를 반환해야 한다. 세션은 max_tasks_per_session개 작업을
+    처리했거나 복구 불가능한 에러가 발생했을 때만 재시작된다.
+    """
+    def __init__(self, driver_factory, max_tasks_per_session=20):
+        self.driver_factory = driver_factory
+        self.max_tasks_per_session = max_tasks_per_session
+        self.logger = logging.getLogger("CosfimSessionPool")
+        self._session = None
+        self._launching = None
+        self._lock = threading.Lock()
+        self.launch_count = 0
+        self.recycle_count = 0
+
+    def acquire(self, user_id, user_pw):
+        """작업에 사용할 세션 반환 (필요 시 새로 실행)"""
+        with self._lock:
+            session = self._session
+            if session is not None and session.user_id != user_id:
+                self.logger.info("로그인 계정 변경 - 세션 재시작")
+                self._recycle()
+                session = None
+
+            if session is not None and session.broken:
+                self.logger.warning("무효화된 세션 - 재시작")
+                self._recycle()
+                session = None
+
+            if session is not None:
+                # 작업 사이 헬스 체크 (잔여 윈도우 정리)
+                healthy = False
+                try:
+                    healthy = session.driver.health_check()
+                except Exception as e:
+                    self.logger.warning(f"세션 헬스 체크 실패: {e}")
+                if not healthy:
+                    self.logger.warning("비정상 세션 - 재시작")
+                    self._recycle()
+                    session = None
+
+            if session is None:
+                session = self._launch(user_id, user_pw)
+            return session
+
+    def release(self, session, broken=False):
+        """작업 종료 후 세션 반환"""
+        with self._lock:
+            session.task_count += 1
+            if session is not self._session:
+                return
+            if broken or session.broken:
+                self.logger.warning("복구 불가능한 에러 또는 무효화된 세션 - 세션 재시작 예정")
+                self._recycle()
+            elif self.max_tasks_per_session and session.task_count >= self.max_tasks_per_session:
+                self.logger.info(f"세션 작업 수 한도 도달 ({session.task_count}) - 세션 재시작 예정")
+                self._recycle()
+
+    def shutdown(self, timeout=None):
+        """유지 중인 세션 종료 (timeout 안에 잠금을 얻지 못하면 종료하지 않고 반환)"""
+        if not self._lock.acquire(timeout=-1 if timeout is None else timeout):
+            self.logger.error("세션을 사용 중인 작업이 끝나지 않아 세션 종료 생략")
+            return
+        try:
+            self._recycle()
+        finally:
+            self._lock.release()
+
+    def abort(self):
+        """실행 중이거나 사용 중인 COSFIM 강제 종료 (워치독용 - 잠금 없이 다른 스레드에서 호출)
+
+        멈춘 GUI 호출이 에러로 끝나게 하고, 세션은 다음 헬스 체크/반환 때 재시작된다.
+        """
+        session = self._session
+        for driver in (self._launching, session.driver if session is not None else None):
+            if driver is None:
+                continue
+            try:
+                driver.kill()
+            except Exception as e:
+                self.logger.error(f"COSFIM 강제 종료 중 에러: {e}")
+
+    def _launch(self, user_id, user_pw):
+        driver = self.driver_factory(user_id, user_pw)
+        self._launching = driver
+        try:
+            driver.launch()
+        except Exception:
+            with suppress(Exception):
+                driver.shutdown()
+            raise
+        finally:
+            self._launching = None
+        self.launch_count += 1
+        self._session = CosfimSession(driver, user_id)
+        self.logger.info(f"새 COSFIM 세션 시작 (누적 {self.launch_count}회)")
+        return self._session
+
+    def _recycle(self):
+        session, self._session = self._session, None
+        if session is None:
+            return
+        self.recycle_count += 1
+        try:
+            session.driver.shutdown()
+        except Exception as e:
+            self.logger.error(f"세션 종료 중 에러: {e}")
+        self.logger.info(f"COSFIM 세션 종료 (처리 작업 {session.task_count}개)")
@@ -0,0 +1,102 @@
+import time
+import logging
+
+# UI Automation 속성/범위 ID (UIAutomationClient.h)
+UIA_NAME_PROPERTY_ID = 30005
+UIA_VALUE_VALUE_PROPERTY_ID = 30045
+UIA_GRID_ITEM_ROW_PROPERTY_ID = 30064
+UIA_GRID_ITEM_COLUMN_PROPERTY_ID = 30065
+TREE_SCOPE_DESCENDANTS = 4
+
+# 클립보드 방식과 동일하게 왼쪽부터 9개 열만 추출 (클릭 + Shift+Right 8회)
+DEFAULT_MAX_COLUMNS = 9
+
+
+def cells_to_tsv(headers, cells, max_columns=DEFAULT_MAX_COLUMNS):
+    """열 헤더와 (행, 열, 값) 셀 목록을 클립보드 복사 결과와 같은 TSV로 변환"""
+    headers = list(headers)[:max_columns]
+    n_cols = len(headers)
+    rows = {}
+    for row, col, value in cells:
+        if col >= n_cols:
+            continue
+        rows.setdefault(row, [""] * n_cols)[col] = value
+    lines = ["\t".join(headers)]
+    for row in sorted(rows):
+        lines.append("\t".join(rows[row]))
+    return "\r\n".join(lines) + "\r\n"
+
+
+class UiaGridProvider:
+    """pywinauto UIA 요소에서 GridPattern/ValuePattern 셀 값을 캐시 요청으로 일괄 조회"""
+    def __init__(self, element):
+        self.element = element
+
+    def column_headers(self):
+        table = self.element.iface_table
+        header_array = table.GetCurrentColumnHeaders()
+        return [header_array.GetElement(i).CurrentName for i in range(header_array.Length)]
+
+    def cells(self):
+        from pywinauto.uia_defines import IUIA
+
+        iuia = IUIA()
+        cache_request = iuia.iuia.CreateCacheRequest()
+        for property_id in (UIA_NAME_PROPERTY_ID, UIA_VALUE_VALUE_PROPERTY_ID,
+                            UIA_GRID_ITEM_ROW_PROPERTY_ID, UIA_GRID_ITEM_COLUMN_PROPERTY_ID):
+            cache_request.AddProperty(property_id)
+
+        # 셀 하나마다 프로세스 간 호출을 하지 않도록 한 번에 가져옴
+        root = self.element.element_info.element
+        found = root.FindAllBuildCache(TREE_SCOPE_DESCENDANTS, iuia.true_condition, cache_request)
+        cells = []
+        for i in range(found.Length):
+            item = found.GetElement(i)
+            row = item.GetCachedPropertyValue(UIA_GRID_ITEM_ROW_PROPERTY_ID)
+            col = item.GetCachedPropertyValue(UIA_GRID_ITEM_COLUMN_PROPERTY_ID)
+            if not isinstance(row, int) or not isinstance(col, int):
+                continue
+            value = item.GetCachedPropertyValue(UIA_VALUE_VALUE_PROPERTY_ID)
+            if not isinstance(value, str) or value == "":
+                value = item.GetCachedPropertyValue(UIA_NAME_PROPERTY_ID) or ""
+            cells.append((row, col, str(value)))
+        return cells
+
+
+class FakeGridProvider:
+    """리눅스 단위 테스트/벤치마크용 가짜 그리드 제공자"""
+    def __init__(self, headers, rows, call_latency=0.0):
+        self.headers = list(headers)
+        self.rows = [list(row) for row in rows]
+        self.call_latency = call_latency
+
+    @classmethod
+    def from_tsv(cls, tsv, call_latency=0.0):
+        lines = [line for line in tsv.replace("\r\n", "\n").split("\n") if line]
+        return cls(lines[0].split("\t"), [line.split("\t") for line in lines[1:]], call_latency)
+
+    def column_headers(self):
+        time.sleep(self.call_latency)
+        return list(self.headers)
+
+    def cells(self):
+        time.sleep(self.call_latency)
+        return [(r, c, value) for r, row in enumerate(self.rows) for c, value in enumerate(row)]
+
+
+class GridTableReader:
+    """접근성 트리에서 결과 테이블을 읽어 _save_data가 기대하는 TSV 반환"""
+    def __init__(self, provider, max_columns=DEFAULT_MAX_COLUMNS):
+        self.provider = provider
+        self.max_columns = max_columns
+        self.logger = logging.getLogger("GridTableReader")
+
+    def read(self):
+        headers = self.provider.column_headers()
+        if not headers:
+            raise ValueError("테이블 열 헤더를 읽을 수 없습니다")
+        cells = self.provider.cells()
+        if not cells:
+            raise ValueError("테이블 셀을 읽을 수 없습니다")
+        self.logger.info(f"접근성 트리에서 테이블 읽기 완료: 셀 {len(cells)}개")
+        return cells_to_tsv(headers, cells, self.max_columns)
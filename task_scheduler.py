@@ -0,0 +1,173 @@
+import queue
+import threading
+from bisect import bisect_right
+from collections import deque
+from datetime import datetime
+
+# 우선순위 클래스 (순위가 낮을수록 먼저 처리)
+PRIORITY_CLASSES = {"emergency": 0, "normal": 1, "batch": 2}
+DEFAULT_PRIORITY = "normal"
+# 이 시간(초)을 기다릴 때마다 한 단계 높은 클래스와 같은 순위로 취급 (기아 방지)
+AGING_SECONDS = 600
+
+
+class PriorityTaskQueue:
+    """우선순위 클래스와 에이징을 적용한 작업 큐
+
+    TaskQueue가 쓰던 queue.Queue와 같은 put/get/qsize/empty/task_done을
+    제공한다. 작업(dict)의 'priority'는 PRIORITY_CLASSES의 키이고
+    'timestamp'(제출 시각)부터 기다린 시간만큼 순위가 올라간다.
+    클래스별 FIFO 안에서는 앞에 있는 작업이 항상 더 오래 기다렸으므로
+    get()은 각 클래스의 맨 앞 작업만 비교한다. None은 종료 신호로 가장
+    먼저 꺼낸다. cancel()은 작업에 표시만 하고(O(1)) 실제 제거는 get()이
+    맨 앞에서 만났을 때 한다.
+    """
+    def __init__(self, aging_seconds=AGING_SECONDS):
+        self.aging_seconds = aging_seconds
+        self._cond = threading.Condition()
+        self._classes = {name: deque() for name in PRIORITY_CLASSES}
+        self._stop_signals = 0
+        self._cancelled = 0             # 표시만 되고 아직 deque에 남은 취소 작업 수
+
+    @staticmethod
+    def _priority(task):
+        priority = task.get('priority', DEFAULT_PRIORITY)
+        if priority not in PRIORITY_CLASSES:
+            raise ValueError(f"알 수 없는 우선순위입니다: {priority} (가능: {', '.join(PRIORITY_CLASSES)})")
+        return priority
+
+    def _effective_rank(self, task, now):
+        waited = max(0.0, (now - task['timestamp']).total_seconds())
+        return PRIORITY_CLASSES[task['priority']] - waited / self.aging_seconds
+
+    def put(self, task):
+        with self._cond:
+            if task is None:
+                self._stop_signals += 1
+            else:
+                task['priority'] = self._priority(task)
+                task['queued'] = True
+                self._insert(self._classes[task['priority']], task)
+            self._cond.notify()
+
+    @staticmethod
+    def _insert(tasks, task):
+        # 제출 시각 순서 유지 (복구/승격된 작업이 뒤늦게 들어와도 대기 시간 순)
+        if not tasks or tasks[-1]['timestamp'] <= task['timestamp']:
+            tasks.append(task)
+        else:
+            tasks.insert(bisect_right([t['timestamp'] for t in tasks], task['timestamp']), task)
+
+    def promote(self, task, priority):
+        """대기 중인 작업을 더 높은 클래스로 옮김 (이미 꺼내졌거나 순위가 같거나 높으면 False)"""
+        with self._cond:
+            if not task.get('queued') or PRIORITY_CLASSES[priority] >= PRIORITY_CLASSES[task['priority']]:
+                return False
+            tasks = self._classes[task['priority']]
+            idx = next((i for i, queued in enumerate(tasks) if queued is task), None)
+            if idx is None:
+                return False
+            del tasks[idx]
+            task['priority'] = priority
+            self._insert(self._classes[priority], task)
+            return True
+
+    def get(self, timeout=None):
+        """다음 작업 반환 (timeout 동안 없으면 queue.Empty)"""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._stop_signals or self._size(), timeout):
+                raise queue.Empty
+            if self._stop_signals:
+                self._stop_signals -= 1
+                return None
+            for tasks in self._classes.values():
+                while tasks and tasks[0].get('cancelled'):
+                    tasks.popleft()
+                    self._cancelled -= 1
+            now = datetime.now()
+            heads = [tasks for tasks in self._classes.values() if tasks]
+            task = min(heads, key=lambda tasks: self._effective_rank(tasks[0], now)).popleft()
+            task['queued'] = False
+            return task
+
+    def cancel(self, task):
+        """대기 중인 작업을 취소 표시 (이미 꺼내진 작업이면 False)"""
+        with self._cond:
+            if not task.get('queued'):
+                return False
+            task['queued'] = False
+            task['cancelled'] = True
+            self._cancelled += 1
+            return True
+
+    def _size(self):
+        return sum(len(tasks) for tasks in self._classes.values()) - self._cancelled
+
+    def qsize(self):
+        with self._cond:
+            return self._size()
+
+    def empty(self):
+        return self.qsize() == 0
+
+    def queued_tasks(self, priority=None):
+        """대기 중인 작업 목록 (priority가 주어지면 그 클래스 이상, 에이징은 무시)"""
+        with self._cond:
+            limit = PRIORITY_CLASSES[priority] if priority else max(PRIORITY_CLASSES.values())
+            return [task for name, tasks in self._classes.items() if PRIORITY_CLASSES[name] <= limit
+                    for task in tasks if not task.get('cancelled')]
+
+    def depth_by_priority(self):
+        with self._cond:
+            return {name: sum(not task.get('cancelled') for task in tasks) for name, tasks in self._classes.items()}
+
+    def task_done(self):
+        pass
+
+
+# 처리 기록이 없을 때 작업 1건 예상 소요 시간 (초)
+DEFAULT_TASK_SECONDS = 60
+# 댐별로 보관하는 최근 처리 시간 수
+DURATION_WINDOW = 50
+
+
+class DurationEstimator:
+    """댐별 최근 처리 시간으로 작업 1건의 소요 시간 추정
+
+    (수계, 댐)마다 최근 window개의 처리 시간을 두고 중앙값을 예상값으로
+    쓴다. 해당 댐 기록이 없으면 전체 최근 기록의 중앙값, 그것도 없으면
+    default를 쓴다.
+    """
+    def __init__(self, window=DURATION_WINDOW, default=DEFAULT_TASK_SECONDS):
+        self.window = window
+        self.default = default
+        self._lock = threading.Lock()
+        self._by_dam = {}
+        self._all = deque(maxlen=window)
+
+    def observe(self, water_system_name, dam_name, seconds):
+        with self._lock:
+            key = (water_system_name, dam_name)
+            if key not in self._by_dam:
+                self._by_dam[key] = deque(maxlen=self.window)
+            self._by_dam[key].append(seconds)
+            self._all.append(seconds)
+
+    @staticmethod
+    def _median(values):
+        values = sorted(values)
+        mid = len(values) // 2
+        return values[mid] if len(values) % 2 else (values[mid - 1] + values[mid]) / 2
+
+    def estimate(self, water_system_name, dam_name):
+        with self._lock:
+            durations = self._by_dam.get((water_system_name, dam_name)) or self._all
+            return self._median(durations) if durations else self.default
+
+
+class AdmissionError(Exception):
+    """대기열 용량 또는 세션별 한도 초과 (retry_after: 다시 시도할 때까지 권장 대기 초)"""
+    def __init__(self, message, reason, retry_after):
+        super().__init__(message)
+        self.reason = reason
+        self.retry_after = retry_after
@@ -0,0 +1,215 @@
+import json
+import queue
+import logging
+import sqlite3
+import threading
+from datetime import datetime
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    task_id       TEXT PRIMARY KEY,
+    status        TEXT NOT NULL,
+    session_id    TEXT,
+    water_system  TEXT,
+    dam_name      TEXT,
+    created_at    TEXT NOT NULL,
+    started_at    TEXT,
+    completed_at  TEXT,
+    error_message TEXT,
+    result        TEXT,
+    task_data     TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status);
+CREATE INDEX IF NOT EXISTS idx_tasks_session_id ON tasks(session_id);
+CREATE INDEX IF NOT EXISTS idx_tasks_dam_name ON tasks(dam_name);
+CREATE INDEX IF NOT EXISTS idx_tasks_created_at ON tasks(created_at);
+"""
+
+# 더 이상 바뀌지 않는 작업 상태
+FINISHED_STATUSES = ("completed", "failed", "interrupted", "cancelled")
+# 저장소에 남기지 않는 작업 데이터 키 (복구할 때 credentials로 다시 채움)
+CREDENTIAL_KEYS = ("user_id", "user_pw")
+
+class TaskStore:
+    """SQLite(WAL) 기반 작업 저장소
+
+    쓰기는 전용 스레드가 모아서 한 트랜잭션으로 커밋하므로(그룹 커밋)
+    제출이 몰려도 행마다 fsync하지 않는다. wait=True인 쓰기는 해당
+    배치가 커밋될 때까지 기다린다. 작업 데이터의 COSFIM 계정(CREDENTIAL_KEYS)은
+    저장하지 않고 recover()가 credentials로 다시 채운다.
+    """
+    def __init__(self, path="cosfim_tasks.db", batch_size=256, batch_interval=0.005, credentials=None):
+        self.path = str(path)
+        self.credentials = dict(credentials or {})
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self.logger = logging.getLogger("TaskStore")
+
+        self._write_conn = self._connect()
+        self._write_conn.executescript(SCHEMA)
+        self._read_conn = self._connect()
+        self._read_lock = threading.Lock()
+
+        self._writes = queue.Queue()
+        self._writer = threading.Thread(target=self._writer_loop, name="task-store-writer", daemon=True)
+        self._writer.start()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def close(self):
+        """남은 쓰기를 커밋하고 연결 종료"""
+        self._writes.put(None)
+        self._writer.join()
+        self._write_conn.close()
+        self._read_conn.close()
+
+    # ----- 쓰기 -----
+
+    def _submit(self, sql, params, wait):
+        done = threading.Event() if wait else None
+        item = [sql, params, done, None]
+        self._writes.put(item)
+        if done is not None:
+            done.wait()
+            if item[3] is not None:
+                raise item[3]
+
+    def _writer_loop(self):
+        while True:
+            item = self._writes.get()
+            if item is None:
+                return
+            batch = [item]
+            stop = False
+            # 짧은 시간 동안 들어온 쓰기를 모아서 한 번에 커밋
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._writes.get(timeout=self.batch_interval)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            self._commit_batch(batch)
+            if stop:
+                return
+
+    def _commit_batch(self, batch):
+        conn = self._write_conn
+        try:
+            conn.execute("BEGIN")
+            for item in batch:
+                try:
+                    conn.execute(item[0], item[1])
+                except sqlite3.Error as e:
+                    item[3] = e
+                    self.logger.error(f"작업 저장소 쓰기 실패: {e}")
+            conn.execute("COMMIT")
+        except sqlite3.Error as e:
+            self.logger.error(f"작업 저장소 커밋 실패: {e}")
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            for item in batch:
+                item[3] = item[3] or e
+        for item in batch:
+            if item[2] is not None:
+                item[2].set()
+
+    def insert_task(self, task_id, task_data, created_at=None, wait=True):
+        """대기 작업 저장 (기본적으로 커밋될 때까지 대기)"""
+        created_at = created_at or datetime.now()
+        stored_data = {key: value for key, value in task_data.items() if key not in CREDENTIAL_KEYS}
+        self._submit(
+            "INSERT OR REPLACE INTO tasks (task_id, status, session_id, water_system, dam_name, created_at, task_data) "
+            "VALUES (?, 'queued', ?, ?, ?, ?, ?)",
+            (task_id, task_data.get('session_id'), task_data.get('water_system_name'), task_data.get('dam_name'),
+             created_at.isoformat(), json.dumps(stored_data, ensure_ascii=False, default=str)),
+            wait,
+        )
+
+    def mark_processing(self, task_id):
+        self._submit(
+            "UPDATE tasks SET status = 'processing', started_at = ? WHERE task_id = ?",
+            (datetime.now().isoformat(), task_id),
+            False,
+        )
+
+    def update_status(self, task_id, status, error_message=None, result=None, wait=False):
+        completed_at = datetime.now().isoformat() if status in FINISHED_STATUSES else None
+        self._submit(
+            "UPDATE tasks SET status = ?, completed_at = COALESCE(?, completed_at), "
+            "error_message = COALESCE(?, error_message), result = COALESCE(?, result) WHERE task_id = ?",
+            (status, completed_at, error_message,
+             json.dumps(result, ensure_ascii=False, default=str) if result is not None else None, task_id),
+            wait,
+        )
+
+    def flush(self):
+        """지금까지 요청된 쓰기가 커밋될 때까지 대기"""
+        self._submit("SELECT 1", (), True)
+
+    # ----- 읽기 -----
+
+    def _row_to_dict(self, row):
+        task = dict(row)
+        for key in ("result", "task_data"):
+            if task.get(key):
+                task[key] = json.loads(task[key])
+        return task
+
+    def get_task(self, task_id):
+        with self._read_lock:
+            row = self._read_conn.execute("SELECT * FROM tasks WHERE task_id = ?", (task_id,)).fetchone()
+        return self._row_to_dict(row) if row else None
+
+    def list_tasks(self, status=None, session_id=None, limit=None):
+        sql = "SELECT * FROM tasks"
+        conditions, params = [], []
+        if status:
+            conditions.append("status = ?")
+            params.append(status)
+        if session_id:
+            conditions.append("session_id = ?")
+            params.append(session_id)
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY created_at"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._read_lock:
+            rows = self._read_conn.execute(sql, params).fetchall()
+        return [self._row_to_dict(row) for row in rows]
+
+    def list_recent(self, limit):
+        """끝나지 않은 작업 전부와 최근에 끝난 작업 limit개 (작업 데이터 제외, 제출 순서)"""
+        placeholders = ", ".join("?" * len(FINISHED_STATUSES))
+        sql = (
+            "SELECT task_id, status, session_id, water_system, dam_name, created_at, started_at, completed_at, "
+            f"error_message, result FROM tasks WHERE status NOT IN ({placeholders}) OR task_id IN "
+            f"(SELECT task_id FROM tasks WHERE status IN ({placeholders}) ORDER BY created_at DESC LIMIT ?) "
+            "ORDER BY created_at"
+        )
+        with self._read_lock:
+            rows = self._read_conn.execute(sql, (*FINISHED_STATUSES, *FINISHED_STATUSES, limit)).fetchall()
+        return [self._row_to_dict(row) for row in rows]
+
+    def recover(self):
+        """재시작 시 복구: 처리 중이던 작업은 interrupted로 표시하고 대기 작업 목록 반환"""
+        self.flush()
+        interrupted = self.list_tasks(status="processing")
+        for task in interrupted:
+            self.update_status(task['task_id'], "interrupted", error_message="서버 재시작으로 처리 중단")
+        self.flush()
+        if interrupted:
+            self.logger.warning(f"처리 중 중단된 작업 {len(interrupted)}개를 interrupted로 표시")
+        queued_tasks = self.list_tasks(status="queued")
+        for task in queued_tasks:
+            task['task_data'].update(self.credentials)
+        return queued_tasks
@@ -0,0 +1,21 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(autouse=True)
+def no_callbacks(monkeypatch):
+    """채팅 콜백은 보내지 않음"""
+    import multi
+    monkeypatch.setattr(multi, "create_call_back_message", lambda *args, **kwargs: None)
+
+
+@pytest.fixture(autouse=True)
+def flush_archiver(monkeypatch):
+    """남은 보관 쓰기는 테스트가 바꾼 작업 디렉토리(monkeypatch.chdir)를 되돌리기 전에 마침"""
+    yield
+    from result_archive import shutdown_archiver
+    shutdown_archiver()
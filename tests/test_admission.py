@@ -0,0 +1,74 @@
+import time
+import threading
+
+import pytest
+
+from multi import TaskQueue
+from task_store import TaskStore
+from task_scheduler import AdmissionError
+
+
+def make_task_data(session_id, dam_name="합천댐"):
+    return {'water_system_name': "낙동강", 'dam_name': dam_name, 'session_id': session_id, 'opt_data': dam_name}
+
+
+def add_concurrently(queue, task_datas):
+    results = []
+    barrier = threading.Barrier(len(task_datas))
+
+    def add(task_data):
+        barrier.wait()
+        try:
+            results.append(queue.add_task(task_data))
+        except AdmissionError as e:
+            results.append(e)
+
+    threads = [threading.Thread(target=add, args=(task_data,)) for task_data in task_datas]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_store_commits_do_not_serialize_admission(tmp_path):
+    store = TaskStore(tmp_path / "tasks.db", batch_interval=0.05)
+    try:
+        queue = TaskQueue(store=store)
+        start = time.perf_counter()
+        results = add_concurrently(queue, [make_task_data(f"s{idx}", f"댐{idx}") for idx in range(20)])
+        elapsed = time.perf_counter() - start
+    finally:
+        store.close()
+    assert all(isinstance(result, str) for result in results)
+    # 잠금 안에서 커밋을 기다리면 20 x 50ms 이상 걸림
+    assert elapsed < 0.5
+
+
+def test_session_quota_counts_tasks_waiting_for_commit(tmp_path):
+    store = TaskStore(tmp_path / "tasks.db", batch_interval=0.05)
+    try:
+        queue = TaskQueue(store=store, max_pending_per_session=3)
+        results = add_concurrently(queue, [make_task_data("s1", f"댐{idx}") for idx in range(10)])
+    finally:
+        store.close()
+    assert sum(isinstance(result, str) for result in results) == 3
+    assert queue.task_queue.qsize() == 3
+
+
+class FailingStore:
+    def recover(self):
+        return []
+
+    def insert_task(self, task_id, task_data, created_at=None, wait=True):
+        raise OSError("disk full")
+
+
+def test_failed_insert_releases_admission_slot():
+    queue = TaskQueue(store=FailingStore(), max_queue_size=1, max_pending_per_session=1)
+    for _ in range(2):
+        with pytest.raises(OSError):
+            queue.add_task(make_task_data("s1"))
+    assert queue._session_pending == {}
+    assert queue._admitting == 0
+    assert queue.task_queue.qsize() == 0
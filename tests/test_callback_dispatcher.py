@@ -0,0 +1,49 @@
+import threading
+import time
+
+from callback_dispatcher import CallbackDispatcher
+
+
+class RecordingDispatcher(CallbackDispatcher):
+    """HTTP 대신 전송 순서와 세션별 동시 전송 여부를 기록"""
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.sent = []
+        self.overlaps = 0
+        self._sending = set()
+        self._record_lock = threading.Lock()
+
+    def _send(self, session_id, message):
+        with self._record_lock:
+            self.overlaps += session_id in self._sending
+            self._sending.add(session_id)
+        time.sleep(0.005)
+        with self._record_lock:
+            self._sending.discard(session_id)
+            self.sent.append((session_id, message['seq']))
+        return True
+
+
+def test_callbacks_keep_per_session_order_under_concurrency():
+    dispatcher = RecordingDispatcher(max_concurrency=4)
+    dispatcher.start()
+    for seq in range(10):
+        for session_id in ("a", "b", "c"):
+            dispatcher.enqueue(session_id, {'type': "t", 'seq': seq})
+    dispatcher.stop(timeout=10)
+
+    for session_id in ("a", "b", "c"):
+        assert [seq for sent_session, seq in dispatcher.sent if sent_session == session_id] == list(range(10))
+    assert dispatcher.overlaps == 0
+    assert dispatcher.stats()['sent'] == 30 and dispatcher.queue_depth() == 0
+
+
+def test_enqueue_does_not_wait_for_slow_sends():
+    dispatcher = RecordingDispatcher(max_concurrency=1)
+    dispatcher._send = lambda session_id, message: time.sleep(0.5) or True
+    dispatcher.start()
+    started = time.monotonic()
+    for seq in range(5):
+        dispatcher.enqueue("a", {'type': "t", 'seq': seq})
+    assert time.monotonic() - started < 0.1
+    dispatcher.stop(timeout=0)
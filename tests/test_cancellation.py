@@ -0,0 +1,79 @@
+import os
+import threading
+
+import pytest
+
+import multi
+from cosfim_sim import SimulatedCosfimDriver
+from session_pool import CosfimSessionPool
+from wait_engine import CancellationToken
+
+SAMPLE_OPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                          "sample_opt", "낙동강-합천댐-0805-30.OPT")
+
+
+class RecordingForwarder:
+    def __init__(self):
+        self.calls = []
+
+    def forward(self, **kwargs):
+        self.calls.append(kwargs)
+
+
+def test_cancel_during_compute_still_shuts_down_cosfim(tmp_path):
+    driver = SimulatedCosfimDriver(latencies={"compute": 5.0})
+    cancel_token = CancellationToken()
+    forwarder = RecordingForwarder()
+    with open(SAMPLE_OPT, encoding="utf-8") as f:
+        opt_data = f.read()
+    handler = multi.CosfimHandler(
+        forwarder=forwarder, water_system_name="낙동강", dam_name="합천댐", user_id="u", user_pw="p",
+        session_id="s", opt_data=opt_data, work_dir=tmp_path, task_id="cancel01",
+        driver_factory=lambda *args, **kwargs: driver, cancel_token=cancel_token, outbox=None, archive=False,
+    )
+    timer = threading.Timer(0.2, cancel_token.cancel, args=("cancelled",))
+    timer.start()
+    try:
+        with pytest.raises(Exception) as excinfo:
+            handler.process()
+    finally:
+        timer.cancel()
+
+    # 원래 예외(연산 대기 취소)가 그대로 올라오고 COSFIM은 종료됨
+    assert not isinstance(excinfo.value, multi.TaskAborted)
+    assert driver.shutdown_count == 1
+    assert driver.app is None
+    assert forwarder.calls == []
+
+
+def test_pooled_session_cancelled_during_compute_is_not_reused(tmp_path):
+    drivers = []
+
+    def driver_factory(*args, **kwargs):
+        drivers.append(SimulatedCosfimDriver(latencies={"compute": 5.0}))
+        return drivers[-1]
+
+    pool = CosfimSessionPool(driver_factory)
+    session = pool.acquire("u", "p")
+    cancel_token = CancellationToken()
+    with open(SAMPLE_OPT, encoding="utf-8") as f:
+        opt_data = f.read()
+    handler = multi.CosfimHandler(
+        forwarder=RecordingForwarder(), water_system_name="낙동강", dam_name="합천댐", user_id="u", user_pw="p",
+        session_id="s", opt_data=opt_data, work_dir=tmp_path, task_id="cancel02", session=session,
+        cancel_token=cancel_token, outbox=None, archive=False,
+    )
+    timer = threading.Timer(0.2, cancel_token.cancel, args=("cancelled",))
+    timer.start()
+    try:
+        with pytest.raises(Exception):
+            handler.process()
+    finally:
+        timer.cancel()
+
+    # 반환할 때 broken을 넘기지 않아도 무효화된 세션은 재시작됨
+    assert session.broken
+    pool.release(session, broken=False)
+    assert drivers[0].shutdown_count == 1
+    assert pool.acquire("u", "p") is not session
+    assert pool.launch_count == 2
@@ -0,0 +1,103 @@
+import threading
+import time
+
+import pytest
+
+import multi
+
+OPT_DATA = "opt"
+
+
+class FakeForwarder:
+    """위젯 업로드 대신 실패 전달만 기록"""
+    failures = []
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def forward(self, success=True, err_msg="", **kwargs):
+        if not success:
+            FakeForwarder.failures.append(err_msg)
+
+
+class FakeHandler:
+    """COSFIM 대신 release될 때까지 멈춰 있는 핸들러 (실행/전달한 세션 기록)"""
+    runs = []
+    delivered = []
+    release = None
+    fail = False
+
+    def __init__(self, session_id=None, **kwargs):
+        self.session_id = session_id
+        self.result_data = None
+
+    def process(self):
+        FakeHandler.runs.append(self.session_id)
+        FakeHandler.release.wait(5)
+        if FakeHandler.fail:
+            raise RuntimeError("COSFIM 실패")
+        self.result_data = b"csv"
+        return "table_data.csv"
+
+    def deliver_result(self, csv_path, data=None):
+        FakeHandler.delivered.append((self.session_id, csv_path))
+
+
+@pytest.fixture
+def task_queue(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(multi, "CosfimHandler", FakeHandler)
+    monkeypatch.setattr(multi, "Forwarder", FakeForwarder)
+    FakeHandler.runs, FakeHandler.delivered, FakeHandler.release, FakeHandler.fail = [], [], threading.Event(), False
+    FakeForwarder.failures = []
+    task_queue = multi.TaskQueue()
+    task_queue.start_worker()
+    yield task_queue
+    FakeHandler.release.set()
+    task_queue.stop_worker()
+
+
+def make_task_data(session_id, dam_name="합천댐"):
+    return {
+        'water_system_name': "낙동강", 'dam_name': dam_name, 'dam_code': "2015110", 'template_id': "t",
+        'user_id': "u", 'user_pw': "p", 'opt_data': OPT_DATA, 'api_end_point': "http://127.0.0.1:9/upload",
+        'session_id': session_id, 'widget_name': "w",
+    }
+
+
+def wait_results(task_queue, count):
+    results, deadline = [], time.monotonic() + 5
+    while len(results) < count and time.monotonic() < deadline:
+        results += task_queue.get_results()
+        time.sleep(0.01)
+    return {result['task_id']: result for result in results}
+
+
+def test_identical_submissions_share_one_run(task_queue):
+    leader_id = task_queue.add_task(make_task_data("s1"))
+    while not FakeHandler.runs:
+        time.sleep(0.01)
+    # 실행 중인 작업과 같은 (수계, 댐, OPT)는 연결, 다른 댐은 따로 실행
+    sub_ids = [task_queue.add_task(make_task_data(session_id)) for session_id in ("s2", "s3")]
+    other_id = task_queue.add_task(make_task_data("s4", dam_name="남강댐"))
+    FakeHandler.release.set()
+
+    results = wait_results(task_queue, 4)
+    assert FakeHandler.runs == ["s1", "s4"]
+    assert sorted(FakeHandler.delivered) == [("s2", "table_data.csv"), ("s3", "table_data.csv")]
+    assert all(results[sub_id]['success'] and results[sub_id]['coalesced_with'] == leader_id for sub_id in sub_ids)
+    assert results[leader_id]['success'] and 'coalesced_with' not in results[other_id]
+
+
+def test_leader_failure_fans_out_to_subscribers(task_queue):
+    FakeHandler.fail = True
+    task_queue.add_task(make_task_data("s1"))
+    while not FakeHandler.runs:
+        time.sleep(0.01)
+    sub_id = task_queue.add_task(make_task_data("s2"))
+    FakeHandler.release.set()
+
+    results = wait_results(task_queue, 2)
+    assert FakeHandler.runs == ["s1"] and FakeHandler.delivered == []
+    assert not results[sub_id]['success'] and "COSFIM 실패" in results[sub_id]['error']
+    assert FakeForwarder.failures == ["COSFIM 실패"]
@@ -0,0 +1,168 @@
+import time
+from types import SimpleNamespace
+
+import multi
+import delivery_outbox
+from delivery_outbox import DeliveryOutbox, RECORD_NAME
+from task_store import TaskStore
+
+
+class DeferredArchiver:
+    """보관 스레드 대신 쓰기를 모아 두었다가 테스트에서 실행"""
+    def __init__(self):
+        self.jobs = []
+
+    def submit(self, write, *args):
+        self.jobs.append((write, args))
+        return True
+
+    def run(self):
+        for write, args in self.jobs:
+            write(*args)
+        self.jobs = []
+
+
+def wait_for(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_enqueue_leaves_disk_writes_to_the_archiver(tmp_path, monkeypatch):
+    archiver = DeferredArchiver()
+    monkeypatch.setattr(delivery_outbox, "get_archiver", lambda: archiver)
+    outbox = DeliveryOutbox(lambda record, data: None)
+
+    outbox.enqueue(tmp_path, {'task_id': "t1", 'csv_path': str(tmp_path / "result.csv")}, data=b"csv")
+
+    assert list(tmp_path.iterdir()) == []
+    archiver.run()
+    assert (tmp_path / "result.csv").read_bytes() == b"csv"
+    assert (tmp_path / RECORD_NAME).exists()
+
+
+def test_result_delivered_before_persist_leaves_no_record(tmp_path, monkeypatch):
+    archiver = DeferredArchiver()
+    monkeypatch.setattr(delivery_outbox, "get_archiver", lambda: archiver)
+    delivered = []
+    outbox = DeliveryOutbox(lambda record, data: delivered.append(data), concurrency=1)
+    outbox.start()
+    try:
+        outbox.enqueue(tmp_path, {'task_id': "t1", 'csv_path': str(tmp_path / "result.csv")}, data=b"csv")
+        wait_for(lambda: outbox.delivered_count == 1)
+    finally:
+        outbox.stop(timeout=1)
+    archiver.run()
+
+    assert delivered == [b"csv"]
+    assert (tmp_path / "result.csv").exists()
+    assert not (tmp_path / RECORD_NAME).exists()
+
+
+def test_failed_delivery_is_persisted_for_restart(tmp_path, monkeypatch):
+    archiver = DeferredArchiver()
+    monkeypatch.setattr(delivery_outbox, "get_archiver", lambda: archiver)
+
+    attempts = []
+
+    def fail(record, data):
+        attempts.append(record['task_id'])
+        raise ConnectionError("upload down")
+
+    work_dir = tmp_path / "work_t1"
+    work_dir.mkdir()
+    outbox = DeliveryOutbox(fail, concurrency=1, retry_base=60)
+    outbox.start()
+    try:
+        outbox.enqueue(work_dir, {'task_id': "t1", 'csv_path': str(work_dir / "result.csv")}, data=b"csv")
+        wait_for(lambda: attempts and outbox.depth() == 1 and not outbox._in_flight)
+        archiver.run()
+    finally:
+        outbox.stop(timeout=0)
+
+    restarted = DeliveryOutbox(lambda record, data: None)
+    assert restarted.recover(tmp_path) == 1
+
+
+def test_given_up_delivery_is_reported_and_not_replayed(tmp_path, monkeypatch):
+    archiver = DeferredArchiver()
+    monkeypatch.setattr(delivery_outbox, "get_archiver", lambda: archiver)
+    given_up = []
+
+    def fail(record, data):
+        raise ConnectionError("upload down")
+
+    outbox = DeliveryOutbox(fail, concurrency=1, max_attempts=2, retry_base=0,
+                            give_up=lambda record, error: given_up.append((record['task_id'], str(error))))
+    outbox.start()
+    try:
+        outbox.enqueue(tmp_path, {'task_id': "t1", 'csv_path': str(tmp_path / "result.csv")}, data=b"csv")
+        wait_for(lambda: outbox.gave_up_count == 1)
+    finally:
+        outbox.stop(timeout=1)
+    archiver.run()
+
+    assert given_up == [("t1", "upload down")]
+    assert (tmp_path / "result.csv").exists()
+    assert DeliveryOutbox(lambda record, data: None).recover(tmp_path) == 0
+
+
+def make_record(task_id="t1"):
+    forwarder = multi.Forwarder("http://127.0.0.1:9/upload", "낙동강", "합천댐", "2015110", "t", "s1", "w")
+    return dict(forwarder.delivery_record("result.csv", task_id=task_id), attempts=0)
+
+
+class FlakyUploadClient:
+    """처음 failures번은 연결 실패, 그 뒤로 성공하는 업로드 클라이언트"""
+    def __init__(self, failures):
+        self.failures = failures
+        self.posts = []
+
+    def post(self, url, max_attempts=None, **kwargs):
+        self.posts.append(max_attempts)
+        if len(self.posts) <= self.failures:
+            raise ConnectionError("upload down")
+        request = SimpleNamespace(method="POST", url=url)
+        return SimpleNamespace(request=request, status_code=200, text="ok")
+
+
+def test_outbox_retries_send_one_upload_each_and_one_chart_callback(tmp_path, monkeypatch):
+    monkeypatch.setattr(delivery_outbox, "get_archiver", DeferredArchiver)
+    client = FlakyUploadClient(failures=2)
+    callbacks = []
+    monkeypatch.setattr(multi, "get_upload_client", lambda: client)
+    monkeypatch.setattr(multi, "create_call_back_message", lambda *args: callbacks.append(args[:2]))
+    outbox = DeliveryOutbox(multi.TaskQueue._deliver_record, concurrency=1, retry_base=0)
+    outbox.start()
+    try:
+        outbox.enqueue(tmp_path, make_record(), data=b"csv")
+        wait_for(lambda: outbox.delivered_count == 1)
+    finally:
+        outbox.stop(timeout=1)
+
+    # 재시도는 DeliveryOutbox만 하고 (업로드마다 1회 시도) 완료 콜백은 성공한 뒤 한 번
+    assert client.posts == [1, 1, 1]
+    assert callbacks == [("createCosfimChart", "completed")]
+
+
+def test_given_up_delivery_fails_the_completed_task(tmp_path, monkeypatch):
+    client = FlakyUploadClient(failures=0)
+    monkeypatch.setattr(multi, "get_upload_client", lambda: client)
+    store = TaskStore(tmp_path / "tasks.db")
+    queue = multi.TaskQueue(store=store, delivery_concurrency=1)
+    try:
+        store.insert_task("t1", {'water_system_name': "낙동강", 'dam_name': "합천댐"})
+        store.update_status("t1", "completed")
+        record = make_record()
+        record['attempts'] = delivery_outbox.DELIVERY_MAX_ATTEMPTS
+
+        queue._give_up_record(record, ConnectionError("upload down"))
+
+        (result,) = queue.get_results(timeout=0)
+        assert result['task_id'] == "t1" and not result['success'] and result['delivery_failed']
+        store.flush()
+        assert store.get_task("t1")["status"] == "failed"
+        assert client.posts == [1]      # 실패 알림도 한 번만 시도
+    finally:
+        store.close()
@@ -0,0 +1,78 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+import app as app_module
+
+
+def test_lease_endpoints_are_closed_without_token(monkeypatch):
+    monkeypatch.setattr(app_module, "AGENT_TOKEN", None)
+    with pytest.raises(HTTPException) as excinfo:
+        app_module.check_agent_token(None)
+    assert excinfo.value.status_code == 503
+
+
+def test_lease_endpoints_require_matching_token(monkeypatch):
+    monkeypatch.setattr(app_module, "AGENT_TOKEN", "secret")
+    with pytest.raises(HTTPException) as excinfo:
+        app_module.check_agent_token("wrong")
+    assert excinfo.value.status_code == 401
+    app_module.check_agent_token("secret")
+
+
+def test_lease_response_has_no_credentials():
+    assert not {"user_id", "user_pw"} & set(app_module.LeaseResponse.model_fields)
+
+
+class IdleQueue:
+    """대기열이 비어 있다가 ready가 되면 작업 하나를 임대하는 TaskQueue 대역"""
+    is_running = True
+
+    def __init__(self):
+        self.ready = False
+        self.polls = 0
+
+    def lease_task(self, agent_id, lease_seconds=None, timeout=0):
+        assert timeout == 0    # 스레드풀 스레드에서 기다리지 않음
+        self.polls += 1
+        if not self.ready:
+            return None
+        return {'id': "l1", 'lease_seconds': lease_seconds, 'task': {'id': "t1", 'data': {
+            'water_system_name': "낙동강", 'dam_name': "합천댐", 'session_id': "s", 'opt_data': "opt"}}}
+
+
+def run_lease(monkeypatch, task_queue, wait, on_idle=None):
+    monkeypatch.setattr(app_module, "manager", SimpleNamespace(task_queue=task_queue))
+    monkeypatch.setattr(app_module, "LEASE_POLL_SECONDS", 60)
+
+    async def scenario():
+        app_module.lease_wakeup = asyncio.Event()
+        request = asyncio.create_task(app_module.lease_task(app_module.LeaseRequest(agent_id="a"), wait=wait))
+        await asyncio.sleep(0.05)
+        if on_idle:
+            on_idle()
+        started = time.monotonic()
+        return await request, time.monotonic() - started
+
+    monkeypatch.setattr(app_module, "lease_wakeup", None)
+    return asyncio.run(scenario())
+
+
+def test_waiting_lease_wakes_when_a_task_is_queued(monkeypatch):
+    task_queue = IdleQueue()
+
+    def enqueue():
+        task_queue.ready = True
+        app_module.wake_lease_waiters()
+
+    response, waited = run_lease(monkeypatch, task_queue, wait=30, on_idle=enqueue)
+    assert response["task_id"] == "t1"
+    assert waited < 1 and task_queue.polls == 2
+
+
+def test_lease_wait_times_out_with_no_content(monkeypatch):
+    response, _ = run_lease(monkeypatch, IdleQueue(), wait=0.2)
+    assert response.status_code == 204
@@ -0,0 +1,57 @@
+import pytest
+
+from metrics import MetricsRegistry
+
+
+def test_registry_renders_openmetrics_text():
+    registry = MetricsRegistry()
+    tasks = registry.counter("cosfim_tasks", "처리 완료된 작업 수", ("dam", "status"))
+    depth = registry.gauge("cosfim_queue_depth", "처리 대기 중인 작업 수")
+    stage = registry.histogram("cosfim_stage_seconds", "단계별 소요 시간", ("stage",), buckets=(1, 5))
+    tasks.inc("합천댐", "completed")
+    tasks.inc("합천댐", "completed")
+    depth.set(3)
+    stage.observe(0.5, "compute")
+    stage.observe(2, "compute")
+    stage.observe(10, "compute")
+
+    assert registry.render() == "\n".join([
+        "# TYPE cosfim_tasks counter",
+        "# HELP cosfim_tasks 처리 완료된 작업 수",
+        'cosfim_tasks_total{dam="합천댐",status="completed"} 2',
+        "# TYPE cosfim_queue_depth gauge",
+        "# HELP cosfim_queue_depth 처리 대기 중인 작업 수",
+        "cosfim_queue_depth 3",
+        "# TYPE cosfim_stage_seconds histogram",
+        "# HELP cosfim_stage_seconds 단계별 소요 시간",
+        'cosfim_stage_seconds_bucket{stage="compute",le="1.0"} 1',
+        'cosfim_stage_seconds_bucket{stage="compute",le="5.0"} 2',
+        'cosfim_stage_seconds_bucket{stage="compute",le="+Inf"} 3',
+        'cosfim_stage_seconds_count{stage="compute"} 3',
+        'cosfim_stage_seconds_sum{stage="compute"} 12.5',
+        "# EOF",
+    ]) + "\n"
+
+
+def test_label_values_are_escaped():
+    registry = MetricsRegistry()
+    registry.counter("errors", "에러", ("message",)).inc('a "b"\\c\nd')
+    assert 'errors_total{message="a \\"b\\"\\\\c\\nd"} 1' in registry.render()
+
+
+def test_histogram_timer_records_even_on_error():
+    registry = MetricsRegistry()
+    stage = registry.histogram("stage_seconds", "단계", ("stage",))
+    with pytest.raises(RuntimeError):
+        with stage.time("launch"):
+            raise RuntimeError("실패")
+    assert 'stage_seconds_count{stage="launch"} 1' in registry.render()
+
+
+def test_wrong_label_count_and_duplicate_names_are_rejected():
+    registry = MetricsRegistry()
+    counter = registry.counter("tasks", "작업", ("dam",))
+    with pytest.raises(ValueError):
+        counter.inc()
+    with pytest.raises(ValueError):
+        registry.gauge("tasks", "중복")
@@ -0,0 +1,55 @@
+import os
+
+import pytest
+
+from opt_document import OptDocument, OptValidationError, validate_opt
+
+SAMPLE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "sample_opt")
+VALID_SAMPLES = {
+    "낙동강-합천댐-0805-30.OPT": "낙동강",
+    "거제권-구천댐-0203-0207-24.OPT": "거제권",
+    "태화강-대암댐-0707-0712-60.OPT": "태화강",
+}
+
+
+def read_sample(name):
+    with open(os.path.join(SAMPLE_DIR, name), encoding="utf-8") as f:
+        return f.read()
+
+
+@pytest.mark.parametrize("name, water_system_name", VALID_SAMPLES.items())
+def test_sample_opts_pass(name, water_system_name):
+    assert isinstance(validate_opt(read_sample(name), water_system_name), OptDocument)
+
+
+def test_invalid_sample_reports_header_line():
+    with pytest.raises(OptValidationError) as excinfo:
+        validate_opt(read_sample("태화강-대암댐-invalid.OPT"), "태화강")
+    assert excinfo.value.errors == [(1, "항목이 5개여야 합니다 (현재 4개)")]
+
+
+@pytest.mark.parametrize("old, new, line_no, message", [
+    ("Y 2025", "X 2025", 1, "분석 유형"),
+    ("1.00 1.00 1.00 1.00 1.00 1.00 1.00 1.00", "1.00 1.00", 3, "매개변수는 8개"),
+    ("1.00 1.00", "1.00 abc", 3, "숫자가 아닌 값"),
+    ("24 30", "24 45", 11, "분석단위"),
+])
+def test_bad_values_are_rejected_with_line_numbers(old, new, line_no, message):
+    text = read_sample("낙동강-합천댐-0805-30.OPT").replace(old, new, 1)
+    with pytest.raises(OptValidationError) as excinfo:
+        validate_opt(text, "낙동강")
+    ((error_line, error_message),) = excinfo.value.errors
+    assert error_line == line_no and message in error_message
+
+
+def test_layout_is_checked_per_water_system():
+    with pytest.raises(OptValidationError) as excinfo:
+        validate_opt(read_sample("낙동강-합천댐-0805-30.OPT"), "태화강")
+    assert [line_no for line_no, _ in excinfo.value.errors] == [3, 12]
+
+
+def test_truncated_opt_is_rejected():
+    text = "\n".join(read_sample("낙동강-합천댐-0805-30.OPT").split("\n")[:6])
+    with pytest.raises(OptValidationError) as excinfo:
+        validate_opt(text, "낙동강")
+    assert "시작 시간" in str(excinfo.value)
@@ -0,0 +1,53 @@
+import os
+
+import multi
+from cosfim_sim import SimulatedCosfimDriver
+from result_archive import ResultArchiver, shutdown_archiver
+
+SAMPLE_OPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                          "sample_opt", "낙동강-합천댐-0805-30.OPT")
+
+
+class RecordingForwarder:
+    def __init__(self):
+        self.calls = []
+
+    def forward(self, **kwargs):
+        self.calls.append(kwargs)
+
+
+def make_handler(archive):
+    with open(SAMPLE_OPT, encoding="utf-8") as f:
+        opt_data = f.read()
+    forwarder = RecordingForwarder()
+    handler = multi.CosfimHandler(
+        forwarder=forwarder, water_system_name="낙동강", dam_name="합천댐", user_id="u", user_pw="p",
+        session_id="s", opt_data=opt_data, task_id="archive01",
+        driver_factory=lambda *args, **kwargs: SimulatedCosfimDriver(), outbox=None, archive=archive,
+    )
+    return handler, forwarder
+
+
+def test_archiver_creates_missing_work_dir(tmp_path):
+    archiver = ResultArchiver()
+    archiver.start()
+    path = tmp_path / "work_abc" / "table_data_abc.csv"
+    archiver.archive(path, b"a,b\n")
+    archiver.stop()
+    assert path.read_bytes() == b"a,b\n"
+
+
+def test_handler_without_archive_creates_no_work_dir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    handler, forwarder = make_handler(archive=False)
+    handler.process()
+    assert forwarder.calls[-1]["success"] is True
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_handler_with_archive_writes_work_dir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    handler, _ = make_handler(archive=True)
+    handler.process()
+    shutdown_archiver()
+    assert (tmp_path / "work_archive0" / handler.csv_filename).exists()
@@ -0,0 +1,67 @@
+import os
+
+import multi
+from multi import TaskQueue
+from result_cache import ResultCache
+
+SAMPLE_OPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                          "sample_opt", "낙동강-합천댐-0805-30.OPT")
+
+
+def make_task_data():
+    with open(SAMPLE_OPT, encoding="utf-8") as f:
+        opt_data = f.read()
+    return {
+        'water_system_name': "낙동강", 'dam_name': "합천댐", 'dam_code': "2015110", 'template_id': "t",
+        'user_id': "u", 'user_pw': "p", 'opt_data': opt_data, 'api_end_point': "http://127.0.0.1:9/upload",
+        'session_id': "s1", 'widget_name': "w",
+    }
+
+
+def test_cache_hit_is_served_on_submit_without_queueing(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    forwarded = []
+    monkeypatch.setattr(multi.Forwarder, "forward",
+                        lambda self, success=True, data_path=None, data=None, **kwargs: forwarded.append(data))
+    cache = ResultCache(tmp_path / "cache")
+    queue = TaskQueue(result_cache=cache)
+    csv_path = tmp_path / "result.csv"
+    csv_path.write_bytes(b"obsrdt\n202508051300\n")
+    cache.put(queue._cache_key(make_task_data()), str(csv_path))
+
+    task_id = queue.add_task(make_task_data())
+
+    (result,) = queue.get_results()
+    assert result['task_id'] == task_id and result['success'] and result['cached']
+    assert forwarded == [b"obsrdt\n202508051300\n"]
+    assert queue.task_queue.qsize() == 0
+    # 캐시에 없는 작업은 그대로 큐에 들어감
+    queue.add_task(dict(make_task_data(), dam_name="남강댐"))
+    assert queue.task_queue.qsize() == 1
+
+
+def test_entry_evicted_before_read_is_a_miss(tmp_path, monkeypatch):
+    cache = ResultCache(tmp_path / "cache")
+    source = tmp_path / "result.csv"
+    source.write_bytes(b"data")
+    path = cache.put("key", str(source))
+    monkeypatch.setattr(cache, "get", lambda key: path)
+    os.remove(path)
+
+    assert cache.read("key") is None
+
+
+def test_formats_are_cached_separately_with_their_suffix(tmp_path):
+    cache = ResultCache(tmp_path / "cache")
+    csv_key = TaskQueue._cache_key(make_task_data())
+    gz_key = TaskQueue._cache_key(dict(make_task_data(), result_format="csv.gz"))
+    assert csv_key != gz_key
+    cache.put(csv_key, b"csv")
+    cache.put(gz_key, b"gzip", "csv.gz")
+    (tmp_path / "cache" / "partial.arrow.tmp").write_bytes(b"x")
+
+    # 재시작 후에도 확장자와 관계없이 모든 항목이 인덱스에 들어감
+    reloaded = ResultCache(tmp_path / "cache")
+    assert reloaded.get(gz_key).endswith(f"{gz_key}.csv.gz")
+    assert reloaded.read(csv_key) == b"csv"
+    assert reloaded.stats()['entries'] == 2
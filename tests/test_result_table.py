@@ -0,0 +1,77 @@
+import json
+from datetime import datetime
+from io import StringIO
+
+import pandas as pd
+import pytest
+
+from cosfim_sim import make_result_tsv
+from result_table import RESULT_COLUMNS, parse_result_table, serialize_result
+
+HEADER = "\t".join(list(RESULT_COLUMNS) + ["발전방류(㎥/s)"])
+
+
+def legacy_csv(table_data):
+    """벡터화 이전 _save_data (전체 열 파싱 + 행마다 apply)"""
+    df = pd.read_csv(StringIO(table_data), sep='\t', encoding='utf-8')
+    filtered_df = df[list(RESULT_COLUMNS)].copy()
+    filtered_df.rename(columns=RESULT_COLUMNS, inplace=True)
+    filtered_df["obsrdt"] = filtered_df["obsrdt"].apply(lambda x: str(x).replace(" ", "").replace(":", "").replace("-", ""))
+    return filtered_df.to_csv(index=False).encode('utf-8-sig')
+
+
+def make_table(*rows):
+    return "\r\n".join([HEADER] + ["\t".join(row) for row in rows]) + "\r\n"
+
+
+TABLES = {
+    "simulated": make_result_tsv(datetime(2025, 8, 5, 13, 0), 500, interval_minutes=10),
+    "integer_columns": make_table(
+        ("2025-08-05 13:00", "0", "0", "50", "48", "170", "40", "25"),
+        ("2025-08-05 14:00", "3", "2", "53", "51", "171", "42", "26"),
+    ),
+    "mixed_integer_and_float": make_table(
+        ("2025-08-05 13:00", "0", "0.0", "50", "48.5", "170.00", "40", "25"),
+        ("2025-08-05 14:00", "3", "2.1", "53", "51.65", "170.01", "42", "26"),
+    ),
+    "high_precision": make_table(
+        ("2025-08-05 13:00", "0.123456789", "0", "12345.6789", "1234567.891", "170.000001", "40", "25"),
+    ),
+    "non_numeric": make_table(
+        ("2025-08-05 13:00", "-", "0.0", "50.00", "48.50", "170.00", "40.00", "25.00"),
+        ("2025-08-05 14:00", "1.5", "", "N/A", "51.65", "170.01", "42.60", "26.62"),
+    ),
+    "unpadded_timestamps": make_table(
+        ("2025-8-5 13:00", "0.0", "0.0", "50.00", "48.50", "170.00", "40.00", "25.00"),
+        ("2025-8-5 9:05", "1.5", "0.9", "56.50", "54.80", "170.02", "45.20", "28.25"),
+    ),
+    "timestamps_with_seconds": make_table(
+        ("2025-08-05 13:00:00", "0.0", "0.0", "50.00", "48.50", "170.00", "40.00", "25.00"),
+    ),
+    "month_day_timestamps": make_table(
+        ("08-05 13:00", "0.0", "0.0", "50.00", "48.50", "170.00", "40.00", "25.00"),
+    ),
+    "missing_timestamp": make_table(
+        ("2025-08-05 13:00", "0.0", "0.0", "50.00", "48.50", "170.00", "40.00", "25.00"),
+        ("", "1.5", "0.9", "56.50", "54.80", "170.02", "45.20", "28.25"),
+    ),
+}
+
+
+@pytest.mark.parametrize("name", TABLES)
+def test_csv_is_byte_identical_to_legacy_transform(name):
+    table = TABLES[name]
+    assert serialize_result(parse_result_table(table), "csv") == legacy_csv(table)
+
+
+def test_ndjson_keeps_integer_and_float_values():
+    lines = serialize_result(parse_result_table(TABLES["mixed_integer_and_float"]), "ndjson").decode("utf-8").splitlines()
+    first = json.loads(lines[1])
+    assert first["obsrf"] == 3 and isinstance(first["obsrf"], int)
+    assert first["calcinflow"] == 51.65
+    assert first["obsrdt"] == 202508051400
+
+
+def test_missing_column_raises_key_error():
+    with pytest.raises(KeyError):
+        parse_result_table("월일시분\t관측우량(mm)\r\n2025-08-05 13:00\t0\r\n")
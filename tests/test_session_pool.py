@@ -0,0 +1,61 @@
+from cosfim_sim import SimulatedCosfimDriver
+from session_pool import CosfimSessionPool
+
+
+def make_pool(max_tasks_per_session=20):
+    drivers = []
+
+    def driver_factory(user_id, user_pw):
+        drivers.append(SimulatedCosfimDriver(user_id, user_pw))
+        return drivers[-1]
+
+    return CosfimSessionPool(driver_factory, max_tasks_per_session), drivers
+
+
+def test_session_is_reused_across_tasks():
+    pool, drivers = make_pool()
+    for _ in range(3):
+        session = pool.acquire("u", "p")
+        pool.release(session)
+
+    assert pool.launch_count == 1
+    assert drivers[0].launch_count == 1 and drivers[0].shutdown_count == 0
+    assert session.task_count == 3
+
+
+def test_session_is_recycled_after_max_tasks():
+    pool, drivers = make_pool(max_tasks_per_session=2)
+    for _ in range(3):
+        pool.release(pool.acquire("u", "p"))
+
+    assert pool.launch_count == 2 and pool.recycle_count == 1
+    assert drivers[0].shutdown_count == 1
+
+
+def test_broken_session_is_not_reused():
+    pool, drivers = make_pool()
+    session = pool.acquire("u", "p")
+    pool.release(session, broken=True)
+
+    assert drivers[0].shutdown_count == 1
+    assert pool.acquire("u", "p") is not session
+
+
+def test_unhealthy_session_is_relaunched_on_acquire():
+    pool, drivers = make_pool()
+    session = pool.acquire("u", "p")
+    pool.release(session)
+    drivers[0].healthy = False
+
+    assert pool.acquire("u", "p") is not session
+    assert drivers[0].health_check_count == 1 and drivers[0].shutdown_count == 1
+
+
+def test_login_change_relaunches_session():
+    pool, drivers = make_pool()
+    pool.release(pool.acquire("u1", "p1"))
+    session = pool.acquire("u2", "p2")
+
+    assert session.user_id == "u2"
+    assert [driver.user_id for driver in drivers] == ["u1", "u2"]
+    assert drivers[0].shutdown_count == 1
@@ -0,0 +1,13 @@
+import pytest
+
+from multi import make_slots
+
+
+class UnconfirmedDriver:
+    SLOT_WORKSPACES = False
+
+
+def test_unconfirmed_driver_is_limited_to_one_slot(tmp_path):
+    with pytest.raises(ValueError):
+        make_slots(UnconfirmedDriver, workers=2, workspace_root=tmp_path, workspace_template=None)
+    assert len(make_slots(UnconfirmedDriver, workers=1)) == 1
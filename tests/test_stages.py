@@ -0,0 +1,30 @@
+import os
+
+import multi
+from cosfim_sim import SimulatedCosfimDriver
+
+SAMPLE_OPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                          "sample_opt", "낙동강-합천댐-0805-30.OPT")
+
+
+def test_outbox_delivery_reports_forwarding_stage(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(multi.TaskQueue, "_deliver_record", staticmethod(lambda record, data=None: None))
+    with open(SAMPLE_OPT, encoding="utf-8") as f:
+        opt_data = f.read()
+    queue = multi.TaskQueue(driver_factory=SimulatedCosfimDriver, delivery_concurrency=1)
+    stages = []
+    queue.add_stage_listener(lambda task_id, stage: stages.append(stage))
+    queue.start_worker()
+    try:
+        queue.add_task({
+            'water_system_name': "낙동강", 'dam_name': "합천댐", 'dam_code': "2015110", 'template_id': "t",
+            'user_id': "u", 'user_pw': "p", 'opt_data': opt_data, 'api_end_point': "http://127.0.0.1:9/upload",
+            'session_id': "s1", 'widget_name': "w",
+        })
+        (result,) = queue.get_results(timeout=10)
+    finally:
+        queue.stop_worker()
+    assert result['success']
+    assert stages[-1] == "forwarding"
+    assert stages.index("extracting") < stages.index("forwarding")
@@ -0,0 +1,96 @@
+import queue
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+import multi
+from task_scheduler import PriorityTaskQueue
+
+
+def make_task(name, priority="normal", waited=0):
+    return {'id': name, 'priority': priority, 'timestamp': datetime.now() - timedelta(seconds=waited)}
+
+
+def drain(task_queue):
+    names = []
+    while True:
+        try:
+            names.append(task_queue.get(timeout=0)['id'])
+        except queue.Empty:
+            return names
+
+
+def test_classes_are_served_in_order_and_fifo_within_a_class():
+    task_queue = PriorityTaskQueue()
+    for name, priority in [("b1", "batch"), ("n1", "normal"), ("e1", "emergency"), ("n2", "normal")]:
+        task_queue.put(make_task(name, priority))
+
+    assert task_queue.depth_by_priority() == {"emergency": 1, "normal": 2, "batch": 1}
+    assert drain(task_queue) == ["e1", "n1", "n2", "b1"]
+
+
+def test_aging_lets_a_long_waiting_task_overtake_a_higher_class():
+    task_queue = PriorityTaskQueue(aging_seconds=60)
+    task_queue.put(make_task("fresh-normal", "normal"))
+    task_queue.put(make_task("old-batch", "batch", waited=90))      # 1.5단계 승격 -> normal보다 앞
+    task_queue.put(make_task("fresh-emergency", "emergency"))
+
+    assert drain(task_queue) == ["fresh-emergency", "old-batch", "fresh-normal"]
+
+
+def test_stop_signal_is_served_first_and_unknown_priority_is_rejected():
+    task_queue = PriorityTaskQueue()
+    task_queue.put(make_task("n1"))
+    task_queue.put(None)
+    assert task_queue.get(timeout=0) is None
+    with pytest.raises(ValueError):
+        task_queue.put(make_task("x", "urgent"))
+
+
+def test_promote_moves_a_queued_task_to_a_higher_class():
+    task_queue = PriorityTaskQueue()
+    batch = make_task("b1", "batch")
+    task_queue.put(make_task("n1"))
+    task_queue.put(batch)
+
+    assert task_queue.promote(batch, "emergency")
+    assert not task_queue.promote(batch, "normal")
+    assert drain(task_queue) == ["b1", "n1"]
+
+
+class FailureForwarder:
+    failures = []
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def forward(self, success=True, err_msg="", **kwargs):
+        FailureForwarder.failures.append((success, err_msg))
+
+
+def test_task_dequeued_after_its_deadline_skips_cosfim(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(multi, "Forwarder", FailureForwarder)
+    FailureForwarder.failures = []
+    launches = []
+    task_queue = multi.TaskQueue(driver_factory=lambda *args, **kwargs: launches.append(args))
+    task_id = task_queue.add_task({
+        'water_system_name': "낙동강", 'dam_name': "합천댐", 'dam_code': "2015110", 'template_id': "t",
+        'user_id': "u", 'user_pw': "p", 'opt_data': "opt", 'api_end_point': "http://127.0.0.1:9/upload",
+        'session_id': "s1", 'widget_name': "w", 'priority': "normal",
+        'deadline': (datetime.now() - timedelta(seconds=1)).isoformat(),
+    })
+    task_queue.start_worker()
+    try:
+        results, deadline = [], time.monotonic() + 5
+        while not results and time.monotonic() < deadline:
+            results = task_queue.get_results()
+            time.sleep(0.01)
+    finally:
+        task_queue.stop_worker()
+
+    (result,) = results
+    assert result['task_id'] == task_id and result['expired'] and not result['success']
+    assert launches == []
+    assert [success for success, _ in FailureForwarder.failures] == [False]
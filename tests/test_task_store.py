@@ -0,0 +1,45 @@
+import sqlite3
+from datetime import datetime, timedelta
+
+from task_store import TaskStore
+
+CREDENTIALS = {"user_id": "tester", "user_pw": "secret"}
+
+
+def make_task_data(dam_name):
+    return dict(CREDENTIALS, water_system_name="낙동강", dam_name=dam_name, session_id="s1", opt_data="OPT")
+
+
+def test_credentials_are_not_stored_and_restored_on_recover(tmp_path):
+    path = tmp_path / "tasks.db"
+    store = TaskStore(path, credentials=CREDENTIALS)
+    store.insert_task("t1", make_task_data("합천댐"))
+    store.close()
+
+    raw = sqlite3.connect(path).execute("SELECT task_data FROM tasks").fetchone()[0]
+    assert "secret" not in raw and "tester" not in raw
+
+    store = TaskStore(path, credentials=CREDENTIALS)
+    try:
+        (recovered,) = store.recover()
+        assert recovered["task_data"]["user_pw"] == "secret"
+        assert recovered["task_data"]["user_id"] == "tester"
+    finally:
+        store.close()
+
+
+def test_list_recent_keeps_unfinished_and_latest_finished(tmp_path):
+    store = TaskStore(tmp_path / "tasks.db")
+    try:
+        start = datetime(2025, 8, 5, 13, 0)
+        for idx in range(5):
+            store.insert_task(f"done{idx}", make_task_data("합천댐"), created_at=start + timedelta(minutes=idx))
+            store.update_status(f"done{idx}", "completed")
+        store.insert_task("queued", make_task_data("남강댐"), created_at=start)
+        store.flush()
+
+        tasks = store.list_recent(2)
+        assert [task["task_id"] for task in tasks] == ["queued", "done3", "done4"]
+        assert "task_data" not in tasks[0]
+    finally:
+        store.close()
@@ -0,0 +1,54 @@
+import asyncio
+
+import app as app_module
+from app import TaskTracker, apply_result_event, result_log_reader, RESULT_CONSUMER
+from result_log import ResultLog
+
+
+class LogQueue:
+    """결과 로그만 가진 TaskQueue 대역"""
+    def __init__(self):
+        self.result_log = ResultLog()
+
+    def get_results(self, consumer="default", timeout=None):
+        return self.result_log.read(consumer, timeout=timeout)
+
+
+def reset_tracker(monkeypatch):
+    monkeypatch.setattr(app_module, "task_storage", {})
+    monkeypatch.setattr(app_module, "status_counts", {})
+    monkeypatch.setattr(app_module, "result_waiters", {})
+
+
+def test_result_arriving_before_create_task_is_kept(monkeypatch):
+    reset_tracker(monkeypatch)
+
+    apply_result_event({'task_id': "t1", 'success': True, 'cached': True})
+    TaskTracker.create_task("t1", "낙동강", "합천댐")
+
+    task = TaskTracker.get_task("t1")
+    assert task["status"] == "completed"
+    assert task["stage"] == "done"
+    assert (task["water_system"], task["dam_name"]) == ("낙동강", "합천댐")
+    assert app_module.status_counts == {"queued": 0, "completed": 1}
+
+
+def test_reader_follows_its_own_cursor(monkeypatch):
+    reset_tracker(monkeypatch)
+    monkeypatch.setattr(app_module, "RESULT_POLL_SECONDS", 0.05)
+    task_queue = LogQueue()
+    task_queue.result_log.register(RESULT_CONSUMER)
+    TaskTracker.create_task("t1", "낙동강", "합천댐")
+
+    async def scenario():
+        reader = asyncio.create_task(result_log_reader(task_queue))
+        waiting = asyncio.create_task(TaskTracker.wait_for_result("t1", timeout=5))
+        await asyncio.sleep(0.1)
+        task_queue.result_log.append({'task_id': "t1", 'success': False, 'error': "boom"})
+        task = await waiting
+        reader.cancel()
+        return task
+
+    task = asyncio.run(scenario())
+    assert task["status"] == "failed" and task["error_message"] == "boom"
+    assert task_queue.result_log.stats()['consumers'][RESULT_CONSUMER]['lag'] == 0
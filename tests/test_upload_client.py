@@ -0,0 +1,98 @@
+import time
+
+import pytest
+import requests
+
+from upload_client import CircuitBreaker, CircuitOpenError, UploadClient
+
+
+RESET_SECONDS = 0.2
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker("widget", failure_threshold=3, reset_seconds=RESET_SECONDS)
+    for _ in range(2):
+        breaker.allow()
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.allow()
+    breaker.record_failure()
+
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError) as excinfo:
+        breaker.allow()
+    assert 0 < excinfo.value.retry_after <= RESET_SECONDS
+
+
+def test_half_open_allows_one_trial_and_closes_on_success():
+    breaker = CircuitBreaker("widget", failure_threshold=1, reset_seconds=RESET_SECONDS)
+    breaker.record_failure()
+    time.sleep(RESET_SECONDS)
+
+    breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()     # 시험 요청은 하나만
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.allow()
+
+
+def test_failed_trial_reopens_the_breaker():
+    breaker = CircuitBreaker("widget", failure_threshold=5, reset_seconds=RESET_SECONDS)
+    for _ in range(5):
+        breaker.record_failure()
+    time.sleep(RESET_SECONDS)
+    breaker.allow()
+    breaker.record_failure()
+
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+
+
+class Response:
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.text = ""
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code}", response=self)
+
+
+def make_client(monkeypatch, outcomes, **kwargs):
+    client = UploadClient(backoff_base=0, **kwargs)
+    sent = []
+
+    def post(url, **post_kwargs):
+        sent.append(url)
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return Response(outcome)
+
+    monkeypatch.setattr(client._http, "post", post)
+    return client, sent
+
+
+def test_post_retries_retryable_failures(monkeypatch):
+    client, sent = make_client(monkeypatch, [requests.ConnectionError("refused"), 503, 200])
+    assert client.post("http://widget/upload").status_code == 200
+    assert len(sent) == 3 and client.stats() == {"widget": "closed"}
+
+
+def test_post_does_not_retry_client_errors(monkeypatch):
+    client, sent = make_client(monkeypatch, [400, 200])
+    with pytest.raises(requests.HTTPError):
+        client.post("http://widget/upload")
+    assert len(sent) == 1
+
+
+def test_open_breaker_short_circuits_without_sending(monkeypatch):
+    client, sent = make_client(monkeypatch, [503, 503, 200], max_attempts=2, failure_threshold=2)
+    with pytest.raises(requests.HTTPError):
+        client.post("http://widget/upload")
+    with pytest.raises(CircuitOpenError):
+        client.post("http://widget/upload")
+    assert len(sent) == 2 and client.stats() == {"widget": "open"}
@@ -0,0 +1,67 @@
+import os
+import time
+
+import multi
+from cosfim_sim import SimulatedCosfimDriver
+
+SAMPLE_OPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                          "sample_opt", "낙동강-합천댐-0805-30.OPT")
+
+
+class RecordingForwarder:
+    calls = []
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def forward(self, success=True, **kwargs):
+        RecordingForwarder.calls.append(success)
+
+
+def run_one_task(tmp_path, monkeypatch, hanging_runs):
+    """처음 hanging_runs번의 COSFIM 실행이 연산 중 멈추는 작업 하나를 처리하고 (결과, 드라이버 목록) 반환"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(multi, "Forwarder", RecordingForwarder)
+    monkeypatch.setattr(multi, "WATCHDOG_INTERVAL", 0.05)
+    RecordingForwarder.calls = []
+    drivers = []
+
+    def driver_factory(*args, **kwargs):
+        hang = len(drivers) < hanging_runs
+        drivers.append(SimulatedCosfimDriver(*args, failures={"hang": 1.0} if hang else None, **kwargs))
+        return drivers[-1]
+
+    with open(SAMPLE_OPT, encoding="utf-8") as f:
+        opt_data = f.read()
+    task_queue = multi.TaskQueue(driver_factory=driver_factory, task_timeout=1)
+    task_queue.add_task({
+        'water_system_name': "낙동강", 'dam_name': "합천댐", 'dam_code': "2015110", 'template_id': "t",
+        'user_id': "u", 'user_pw': "p", 'opt_data': opt_data, 'api_end_point': "http://127.0.0.1:9/upload",
+        'session_id': "s1", 'widget_name': "w",
+    })
+    task_queue.start_worker()
+    try:
+        results, deadline = [], time.monotonic() + 10
+        while not results and time.monotonic() < deadline:
+            results = task_queue.get_results()
+            time.sleep(0.01)
+    finally:
+        task_queue.stop_worker()
+    (result,) = results
+    return result, drivers
+
+
+def test_stalled_run_is_killed_and_retried(tmp_path, monkeypatch):
+    result, drivers = run_one_task(tmp_path, monkeypatch, hanging_runs=1)
+
+    assert result['success']
+    assert len(drivers) == 2 and drivers[0].kill_count == 1
+    assert RecordingForwarder.calls == [True]
+
+
+def test_task_stalling_again_after_retry_fails(tmp_path, monkeypatch):
+    result, drivers = run_one_task(tmp_path, monkeypatch, hanging_runs=2)
+
+    assert not result['success'] and result['stalled']
+    assert [driver.kill_count for driver in drivers] == [1, 1]
+    assert RecordingForwarder.calls == [False]
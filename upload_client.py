@@ -0,0 +1,197 @@
+import time
+import random
+import logging
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import FORWARD_ATTEMPT_SECONDS, FORWARD_BREAKER_STATE, FORWARD_SHORT_CIRCUITED
+
+# 위젯 업로드 연결/응답 대기 시간 (초)
+CONNECT_TIMEOUT = 3
+READ_TIMEOUT = 30
+# 업로드 1건의 최대 시도 횟수와 재시도 대기 (지수 백오프 상한, 초)
+MAX_ATTEMPTS = 4
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 8.0
+# 연속 실패가 이 횟수에 닿으면 차단기를 열고 BREAKER_RESET_SECONDS 동안 바로 실패
+BREAKER_FAILURE_THRESHOLD = 5
+BREAKER_RESET_SECONDS = 30
+# 다시 시도할 만한 응답 코드 (그 밖의 4xx는 요청 자체의 문제라 재시도하지 않음)
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """차단기가 열려 있어 요청을 보내지 않음 (retry_after: 시험 요청이 허용될 때까지 남은 초)"""
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """호스트별 차단기
+
+    연속 실패가 failure_threshold에 닿으면 열려서(open) reset_seconds 동안
+    요청을 바로 실패시킨다. 그 뒤 요청 하나만 시험으로 보내고(half_open)
+    성공하면 닫고(closed) 실패하면 다시 연다.
+    """
+    CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+    STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+    def __init__(self, host, failure_threshold=BREAKER_FAILURE_THRESHOLD, reset_seconds=BREAKER_RESET_SECONDS):
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.logger = logging.getLogger("CircuitBreaker")
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+        FORWARD_BREAKER_STATE.set(0, host)
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state
+
+    def _set_state(self, state):
+        if state != self._state:
+            self.logger.warning(f"{self.host} 차단기 {self._state} -> {state}")
+            self._state = state
+            FORWARD_BREAKER_STATE.set(self.STATE_VALUES[state], self.host)
+
+    def allow(self):
+        """요청을 보내도 되면 반환, 아니면 CircuitOpenError"""
+        with self._lock:
+            if self._state == self.OPEN:
+                remaining = self._opened_at + self.reset_seconds - time.monotonic()
+                if remaining > 0:
+                    raise CircuitOpenError(f"{self.host} 업로드 차단 중 ({remaining:.0f}초 후 재시도)", remaining)
+                self._set_state(self.HALF_OPEN)
+            if self._state == self.HALF_OPEN:
+                if self._trial_running:
+                    raise CircuitOpenError(f"{self.host} 업로드 시험 요청 진행 중", self.reset_seconds)
+                self._trial_running = True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._trial_running = False
+            self._set_state(self.CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_running = False
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+                self._set_state(self.OPEN)
+
+
+class UploadClient:
+    """위젯 업로드용 공용 HTTP 클라이언트
+
+    keep-alive 커넥션 풀을 공유하는 세션으로 보내고, 연결/응답 대기 시간을
+    timeout으로 제한한다. 연결 실패, 시간 초과, RETRYABLE_STATUS 응답은
+    지수 백오프(full jitter)로 max_attempts까지 다시 보내고, 호스트별
+    CircuitBreaker가 열려 있으면 보내지 않고 CircuitOpenError를 낸다.
+    """
+    def __init__(self, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT), max_attempts=MAX_ATTEMPTS,
+                 backoff_base=BACKOFF_BASE, backoff_max=BACKOFF_MAX, pool_maxsize=8,
+                 failure_threshold=BREAKER_FAILURE_THRESHOLD, reset_seconds=BREAKER_RESET_SECONDS):
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.logger = logging.getLogger("UploadClient")
+
+        self._http = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize)
+        self._http.mount("http://", adapter)
+        self._http.mount("https://", adapter)
+        self._breakers = {}
+        self._breakers_lock = threading.Lock()
+
+    def breaker(self, url):
+        host = urlsplit(url).netloc
+        with self._breakers_lock:
+            if host not in self._breakers:
+                self._breakers[host] = CircuitBreaker(host, self.failure_threshold, self.reset_seconds)
+            return self._breakers[host]
+
+    def backoff(self, attempt):
+        """attempt번째 실패 후 대기 시간 (0 ~ min(backoff_max, backoff_base * 2^(attempt-1)) 균등 분포)"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1)))
+
+    def post(self, url, max_attempts=None, **kwargs):
+        """POST 후 2xx 응답 반환 (재시도를 다 써도 실패하면 마지막 예외, 재시도 불가 응답은 바로 HTTPError)
+
+        files의 내용은 재시도 때 다시 보내므로 파일 객체 대신 bytes로 넘겨야 한다.
+        max_attempts가 주어지면 self.max_attempts 대신 쓴다 (호출한 쪽이 따로 재시도하면 1).
+        """
+        max_attempts = max_attempts or self.max_attempts
+        breaker = self.breaker(url)
+        for attempt in range(1, max_attempts + 1):
+            try:
+                breaker.allow()
+            except CircuitOpenError:
+                FORWARD_SHORT_CIRCUITED.inc(breaker.host)
+                raise
+            started = time.perf_counter()
+            try:
+                response = self._http.post(url, timeout=self.timeout, **kwargs)
+            except requests.RequestException as e:
+                outcome = "timeout" if isinstance(e, requests.Timeout) else "connection_error"
+                FORWARD_ATTEMPT_SECONDS.observe(time.perf_counter() - started, breaker.host, outcome)
+                breaker.record_failure()
+                error = e
+            else:
+                FORWARD_ATTEMPT_SECONDS.observe(time.perf_counter() - started, breaker.host, str(response.status_code))
+                if response.status_code not in RETRYABLE_STATUS:
+                    # 2xx와 재시도해도 소용없는 4xx는 서버가 살아 있다는 뜻
+                    breaker.record_success()
+                    response.raise_for_status()
+                    return response
+                breaker.record_failure()
+                error = requests.HTTPError(f"서버 응답 {response.status_code}: {response.text[:200]}", response=response)
+
+            if attempt == max_attempts:
+                raise error
+            delay = self.backoff(attempt)
+            self.logger.warning(f"업로드 실패 ({attempt}/{max_attempts}): {error} - {delay:.1f}초 후 재시도")
+            time.sleep(delay)
+
+    def stats(self):
+        """호스트별 차단기 상태"""
+        with self._breakers_lock:
+            breakers = list(self._breakers.values())
+        return {breaker.host: breaker.state for breaker in breakers}
+
+    def close(self):
+        self._http.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_upload_client():
+    """프로세스 공용 업로드 클라이언트"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = UploadClient()
+        return _client
+
+
+def shutdown_upload_client():
+    global _client
+    with _client_lock:
+        client, _client = _client, None
+    if client is not None:
+        client.close()
@@ -0,0 +1,44 @@
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from opt_document import OptDocument
+
+SAMPLE_DIR = Path(__file__).resolve().parent.parent / "sample_opt"
+ITERATIONS = 20_000
+
+
+def legacy_parse(opt_data):
+    """기존 CosfimHandler.get_start_time/get_time_interval 방식 (줄 분할 2회)"""
+    cnt = 0
+    start_time_idx = None
+    for idx, line in enumerate(opt_data.split("\n")):
+        line_stripped = line.strip()
+        if line_stripped and line_stripped[:2] in ("19", "20"):
+            cnt += 1
+            if cnt == 2:
+                start_time = line.split(" ")[:5]
+                start_time_idx = idx
+                break
+    interval = opt_data.split("\n")[start_time_idx + 2].split(" ")[-1]
+    return start_time, interval
+
+
+for path in sorted(SAMPLE_DIR.glob("*.OPT")):
+    text = path.read_bytes().decode("utf-8")
+
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        doc = OptDocument.parse(text)
+    parse_us = (time.perf_counter() - start) / ITERATIONS * 1e6
+
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        legacy_parse(text)
+    legacy_us = (time.perf_counter() - start) / ITERATIONS * 1e6
+
+    assert doc.to_text().encode("utf-8") == path.read_bytes(), path.name
+    print(f"{path.name:<40} OptDocument={parse_us:6.1f}us  legacy(start/interval only)={legacy_us:6.1f}us  "
+          f"interval={doc.time_interval} rows={len(doc.parameters)}")
@@ -0,0 +1,55 @@
+import os
+import sys
+import time
+from datetime import datetime
+from io import StringIO
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from cosfim_sim import make_result_tsv
+from result_table import RESULT_COLUMNS, RESULT_FORMATS, parse_result_table, serialize_result, check_result_format
+
+
+def legacy_transform(table_data):
+    """벡터화 이전 _save_data 변환 (전체 열 파싱 + 행마다 apply)"""
+    df = pd.read_csv(StringIO(table_data), sep='\t', encoding='utf-8')
+    filtered_df = df[list(RESULT_COLUMNS)].copy()
+    filtered_df.rename(columns=RESULT_COLUMNS, inplace=True)
+    filtered_df["obsrdt"] = filtered_df["obsrdt"].apply(lambda x: str(x).replace(" ", "").replace(":", "").replace("-", ""))
+    return filtered_df
+
+
+# 10분 간격 결과 테이블로 변환(파싱 + 월일시분 정규화)과 CSV 직렬화 시간 비교
+for steps in (10_000, 100_000, 1_000_000):
+    tsv = make_result_tsv(datetime(2025, 8, 5, 13, 0), steps, interval_minutes=10)
+    timings = {}
+    outputs = {}
+    for name, transform in (("legacy", legacy_transform), ("vectorized", parse_result_table)):
+        start = time.perf_counter()
+        df = transform(tsv)
+        transform_sec = time.perf_counter() - start
+
+        start = time.perf_counter()
+        outputs[name] = df.to_csv(index=False).encode('utf-8-sig')
+        serialize_sec = time.perf_counter() - start
+        timings[name] = (transform_sec, serialize_sec, df.memory_usage(deep=True).sum())
+
+    # 위젯이 받는 CSV는 바뀌지 않아야 함
+    assert outputs["legacy"] == outputs["vectorized"]
+    for name, (transform_sec, serialize_sec, memory) in timings.items():
+        print(f"rows={steps:>8}  {name:<10}  transform={transform_sec * 1000:9.1f}ms  "
+              f"to_csv={serialize_sec * 1000:9.1f}ms  memory={memory / 1e6:7.1f}MB")
+
+# 결과 형식별 직렬화 시간과 크기 (pyarrow가 없으면 arrow/parquet는 건너뜀)
+df = parse_result_table(make_result_tsv(datetime(2025, 8, 5, 13, 0), 100_000, interval_minutes=10))
+for result_format in RESULT_FORMATS:
+    try:
+        check_result_format(result_format)
+    except ValueError as e:
+        print(f"format={result_format:<8}  skipped ({e})")
+        continue
+    start = time.perf_counter()
+    data = serialize_result(df, result_format)
+    print(f"format={result_format:<8}  serialize={(time.perf_counter() - start) * 1000:9.1f}ms  "
+          f"size={len(data) / 1e6:7.2f}MB")
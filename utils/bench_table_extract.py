@@ -0,0 +1,27 @@
+import os
+import sys
+import time
+from datetime import datetime
+from io import StringIO
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from cosfim_sim import make_result_tsv
+from table_extract import FakeGridProvider, GridTableReader
+
+# 가짜 그리드 제공자로 테이블 추출 + 파싱 시간 측정
+for steps in (1_000, 10_000, 100_000):
+    tsv = make_result_tsv(datetime(2025, 8, 5, 13, 0), steps, interval_minutes=10)
+    provider = FakeGridProvider.from_tsv(tsv)
+
+    start = time.perf_counter()
+    table_data = GridTableReader(provider).read()
+    extract_sec = time.perf_counter() - start
+
+    start = time.perf_counter()
+    df = pd.read_csv(StringIO(table_data), sep='\t', encoding='utf-8')
+    parse_sec = time.perf_counter() - start
+
+    assert len(df) == steps
+    print(f"rows={steps:>7}  extract={extract_sec * 1000:8.1f}ms  parse={parse_sec * 1000:8.1f}ms")
@@ -0,0 +1,249 @@
+"""모의 COSFIM 드라이버로 작업 큐 처리량/지연 측정
+
+  python utils/bench_throughput.py --mode manager --tasks 200 --time-scale 0.001
+  python utils/bench_throughput.py --mode app --tasks 50 --failure opt_error=0.05
+  python utils/bench_throughput.py --tasks 50 --failure hang=0.1 --task-timeout 3
+  python utils/bench_throughput.py --tasks 100 --workers 4
+  python utils/bench_throughput.py --mode agents --tasks 50 --agents 3
+  python utils/bench_throughput.py --tasks 50 --upload-delay 0.2 --delivery-concurrency 0
+  python utils/bench_throughput.py --mode app --tasks 50 --result-format csv.gz
+
+manager 모드는 MultiCosfimManager에 직접 작업을 넣고, app 모드는 app.py의
+/api/v1/cosfim/submit으로 제출한다. 포워딩/채팅 콜백은 로컬 스텁 서버로 보낸다.
+--workers가 2 이상이면 임시 폴더 아래 슬롯별 작업 폴더에서 모의 COSFIM을 병렬 실행한다.
+agents 모드는 app.py를 COSFIM 없이(WORKER_SLOTS=0) uvicorn으로 띄우고, 모의 드라이버를 쓰는
+worker_agent.WorkerAgent --agents개가 HTTP 임대 프로토콜로 작업을 받아 처리한다.
+--upload-delay는 스텁 서버의 업로드 응답 지연이고, --delivery-concurrency 0이면
+워커가 직접 포워딩한다 (기본은 DeliveryOutbox가 따로 전달).
+"""
+import os
+import sys
+import time
+import argparse
+import itertools
+import tempfile
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """포워딩 업로드와 채팅 콜백을 받아 200으로 응답 (업로드는 upload_delay초 뒤)"""
+    upload_delay = 0.0
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.path.startswith("/upload") and self.upload_delay:
+            time.sleep(self.upload_delay)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(b'{"ok": true}')
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def percentile(values, q):
+    values = sorted(values)
+    if not values:
+        return float("nan")
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def make_opt_variants(count):
+    """sample_opt 파일을 돌려 쓰되 방류 패턴 값을 바꿔 작업마다 다른 OPT 생성 (캐시/합치기 회피)"""
+    samples = []
+    for name in sorted(os.listdir(os.path.join(ROOT, "sample_opt"))):
+        if not name.endswith(".OPT") or "invalid" in name:
+            continue
+        water_system_name, dam_name = name.split("-")[:2]
+        with open(os.path.join(ROOT, "sample_opt", name), encoding="utf-8") as f:
+            samples.append((water_system_name, dam_name, f.read()))
+    variants = []
+    for i in range(count):
+        water_system_name, dam_name, text = samples[i % len(samples)]
+        head, sep, tail = text.rpartition("0.000")
+        variants.append((water_system_name, dam_name, f"{head}{i / 1000:.3f}{tail}" if sep else text))
+    return variants
+
+
+def run_manager(args, stub_url, driver_factory):
+    from multi import MultiCosfimManager
+
+    manager = MultiCosfimManager(max_tasks_per_session=args.session_max_tasks, driver_factory=driver_factory,
+                                 task_timeout=args.task_timeout, workers=args.workers,
+                                 workspace_root=args.workspace_root, workspace_template=None,
+                                 delivery_concurrency=args.delivery_concurrency)
+    submitted = {}
+    for water_system_name, dam_name, opt_data in make_opt_variants(args.tasks):
+        task_id = manager.add_dam_task(
+            water_system_name=water_system_name, dam_name=dam_name, dam_code="0000000",
+            template_id="bench", user_id="bench", user_pw="bench", opt_data=opt_data,
+            api_end_point=f"{stub_url}/upload", session_id="bench", widget_name="bench",
+            result_format=args.result_format,
+        )
+        submitted[task_id] = time.perf_counter()
+
+    started = time.perf_counter()
+    manager.start_processing()
+    latencies, failed = [], 0
+    while len(latencies) < len(submitted):
+        for result in manager.task_queue.get_results(consumer="bench"):
+            latencies.append(time.perf_counter() - submitted[result['task_id']])
+            failed += not result.get('success')
+        time.sleep(0.005)
+    elapsed = time.perf_counter() - started
+    manager.stop_processing()
+    return latencies, failed, elapsed
+
+
+def configure_app(args, stub_url, driver_factory):
+    import app as app_module
+    import multi
+
+    app_module.API_END_POINT = f"{stub_url}/upload"
+    app_module.TASK_DB_PATH = "bench_tasks.db"
+    app_module.RESULT_CACHE_DIR = "bench_result_cache"
+    app_module.SESSION_MAX_TASKS = args.session_max_tasks
+    app_module.TASK_TIMEOUT = args.task_timeout
+    app_module.WORKER_SLOTS = args.workers
+    app_module.WORKSPACE_ROOT = args.workspace_root
+    app_module.WORKSPACE_TEMPLATE = None
+    app_module.DELIVERY_CONCURRENCY = args.delivery_concurrency
+    app_module.MAX_QUEUE_SIZE = app_module.MAX_PENDING_PER_SESSION = None   # 입장 제어 없이 처리량만 측정
+    multi.load_driver_factory = lambda name=None: driver_factory
+    return app_module
+
+
+def submit_and_wait(args, post, task_store):
+    """post("/api/v1/cosfim/submit", ...)로 작업을 모두 제출하고 끝날 때까지 대기"""
+    from datetime import datetime
+
+    submitted = {}
+    started = time.perf_counter()
+    for water_system_name, dam_name, opt_data in make_opt_variants(args.tasks):
+        response = post("/api/v1/cosfim/submit", data={
+            "waterSystemName": water_system_name, "damName": dam_name, "damCode": "0000000",
+            "templateId": "bench", "widgetName": "bench", "sessionId": "bench",
+            "resultFormat": args.result_format,
+        }, files={"optData": ("opt.txt", opt_data.encode("utf-8"), "text/plain")})
+        response.raise_for_status()
+        submitted[response.json()["task_id"]] = datetime.now()
+
+    # 완료 시각은 작업 저장소 기록 기준 (결과 갱신 주기와 무관)
+    done = {}
+    while len(done) < len(submitted):
+        for task_id in submitted.keys() - done.keys():
+            task = task_store.get_task(task_id)
+            if task and task["status"] in ("completed", "failed"):
+                done[task_id] = task
+        time.sleep(0.05)
+    elapsed = time.perf_counter() - started
+
+    latencies = [(datetime.fromisoformat(task["completed_at"]) - submitted[task_id]).total_seconds()
+                 for task_id, task in done.items()]
+    failed = sum(task["status"] == "failed" for task in done.values())
+    return latencies, failed, elapsed
+
+
+def run_app(args, stub_url, driver_factory):
+    from fastapi.testclient import TestClient
+
+    app_module = configure_app(args, stub_url, driver_factory)
+    with TestClient(app_module.app) as client:
+        return submit_and_wait(args, client.post, app_module.task_store)
+
+
+def run_agents(args, stub_url, driver_factory):
+    import socket
+    import requests
+    import uvicorn
+    from worker_agent import LeaseClient, WorkerAgent
+
+    app_module = configure_app(args, stub_url, driver_factory)
+    app_module.WORKER_SLOTS = 0
+    app_module.AGENT_TOKEN = "bench"
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app_module.app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+
+    base_url = f"http://127.0.0.1:{port}"
+    agents = [WorkerAgent(LeaseClient(base_url, f"bench-agent-{i}", token="bench", lease_seconds=3), driver_factory,
+                          "bench", "bench", max_tasks_per_session=args.session_max_tasks, lease_wait=1)
+              for i in range(args.agents)]
+    threads = [threading.Thread(target=agent.run, daemon=True) for agent in agents]
+    for thread in threads:
+        thread.start()
+    try:
+        with requests.Session() as http:
+            return submit_and_wait(args, lambda path, **kwargs: http.post(base_url + path, **kwargs),
+                                   app_module.task_store)
+    finally:
+        for agent in agents:
+            agent.stop()
+        for thread in threads:
+            thread.join()
+        server.should_exit = True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=("manager", "app", "agents"), default="manager")
+    parser.add_argument("--tasks", type=int, default=100)
+    parser.add_argument("--time-scale", type=float, default=0.001,
+                        help="REALISTIC_LATENCIES에 곱할 배율 (1이면 실제 시간)")
+    parser.add_argument("--session-max-tasks", type=int, default=20)
+    parser.add_argument("--task-timeout", type=float, default=900,
+                        help="작업 1건 제한 시간(초) - hang 장애를 넣을 때는 짧게 (예: 3)")
+    parser.add_argument("--workers", type=int, default=1, help="동시에 실행할 모의 COSFIM 인스턴스 수")
+    parser.add_argument("--agents", type=int, default=2, help="agents 모드에서 띄울 원격 워커 수")
+    parser.add_argument("--failure", action="append", default=[], metavar="MODE=RATE",
+                        help="장애 확률 (예: opt_error=0.05, compute_timeout=0.01)")
+    parser.add_argument("--upload-delay", type=float, default=0.0, help="스텁 서버의 업로드 응답 지연 (초)")
+    parser.add_argument("--delivery-concurrency", type=int, default=4, help="결과 전달 스레드 수 (0이면 워커가 직접 포워딩)")
+    parser.add_argument("--result-format", default="csv", help="결과 형식 (csv, csv.gz, ndjson, arrow, parquet)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    StubHandler.upload_delay = args.upload_delay
+    stub, stub_url = start_stub_server()
+    os.environ["COSFIM_CALLBACK_URL"] = f"{stub_url}/callback"
+    os.chdir(tempfile.mkdtemp(prefix="cosfim_bench_"))   # work_* 디렉토리 격리
+    args.workspace_root = os.path.abspath("slots") if args.workers > 1 else None
+
+    from cosfim_sim import SimulatedCosfimDriver, REALISTIC_LATENCIES
+    failures = {mode: float(rate) for mode, rate in (item.split("=", 1) for item in args.failure)}
+    seeds = itertools.count(args.seed)
+
+    def driver_factory(*driver_args, **driver_kwargs):
+        # 재시작된 세션이 같은 장애 순서를 반복하지 않도록 인스턴스마다 다른 시드
+        return SimulatedCosfimDriver(*driver_args, latencies=REALISTIC_LATENCIES, failures=failures,
+                                     time_scale=args.time_scale, seed=next(seeds), **driver_kwargs)
+
+    runner = {"manager": run_manager, "app": run_app, "agents": run_agents}[args.mode]
+    latencies, failed, elapsed = runner(args, stub_url, driver_factory)
+    stub.shutdown()
+
+    workers = f"agents={args.agents}" if args.mode == "agents" else f"workers={args.workers}"
+    print(f"mode={args.mode} {workers} tasks={len(latencies)} failed={failed} elapsed={elapsed:.2f}s "
+          f"time_scale={args.time_scale}")
+    print(f"throughput {len(latencies) / elapsed * 3600:12.0f} tasks/hour")
+    for q in (0.50, 0.95, 0.99):
+        print(f"p{int(q * 100):<3} end-to-end {percentile(latencies, q) * 1000:10.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+import time
+import logging
+import threading
+
+
+class WaitTimeout(TimeoutError):
+    """조건 대기 시간 초과"""
+    def __init__(self, name, timeout):
+        super().__init__(f"대기 시간 초과: {name} ({timeout}초)")
+        self.name = name
+        self.timeout = timeout
+
+
+class WaitCancelled(Exception):
+    """작업 취소로 대기 중단"""
+    def __init__(self, name, reason=None):
+        super().__init__(f"작업 취소로 대기 중단: {name}" + (f" ({reason})" if reason else ""))
+        self.name = name
+        self.reason = reason
+
+
+class CancellationToken:
+    """작업 중단 요청 (사용자 취소 또는 워치독 시간 초과)
+
+    threading.Event처럼 is_set()/wait()을 제공하므로 wait_until(cancel=...)에
+    그대로 넘길 수 있다. 처음 cancel()한 사유(reason)만 남는다.
+    """
+    def __init__(self):
+        self._event = threading.Event()
+        self.reason = None
+
+    def cancel(self, reason):
+        if not self._event.is_set():
+            self.reason = reason
+            self._event.set()
+
+    def is_set(self):
+        return self._event.is_set()
+
+    def wait(self, timeout=None):
+        return self._event.wait(timeout)
+
+
+class WaitRecorder:
+    """대기 단계별 실제 소요 시간 기록"""
+    def __init__(self):
+        self.records = []
+        self._lock = threading.Lock()
+
+    def record(self, name, elapsed, ok):
+        with self._lock:
+            self.records.append((name, elapsed, ok))
+
+    def total(self):
+        """전체 대기 시간 합계(초)"""
+        with self._lock:
+            return sum(elapsed for _, elapsed, _ in self.records)
+
+    def summary(self):
+        """단계 이름별 (횟수, 누적 시간, 시간 초과 횟수)"""
+        result = {}
+        with self._lock:
+            for name, elapsed, ok in self.records:
+                count, total, timeouts = result.get(name, (0, 0.0, 0))
+                result[name] = (count + 1, total + elapsed, timeouts + (0 if ok else 1))
+        return result
+
+
+def wait_until(predicate, timeout=5.0, name="condition", interval=0.05, backoff=1.5,
+               max_interval=0.5, recorder=None, raise_on_timeout=True, cancel=None):
+    """predicate가 참이 될 때까지 짧은 백오프로 폴링
+
+    조건이 충족되면 실제 대기 시간(초)을 반환한다. 시간 초과 시
+    raise_on_timeout이면 WaitTimeout을 발생시키고, 아니면 None을 반환한다.
+    predicate에서 발생한 예외는 '아직 준비되지 않음'으로 간주한다.
+    cancel(CancellationToken 등)이 설정되면 바로 WaitCancelled를 발생시킨다.
+    """
+    start = time.monotonic()
+    deadline = start + timeout
+    delay = interval
+
+    while True:
+        try:
+            ok = bool(predicate())
+        except Exception:
+            ok = False
+
+        now = time.monotonic()
+        elapsed = now - start
+        if ok:
+            if recorder is not None:
+                recorder.record(name, elapsed, True)
+            return elapsed
+
+        if cancel is not None and cancel.is_set():
+            if recorder is not None:
+                recorder.record(name, elapsed, False)
+            raise WaitCancelled(name, getattr(cancel, "reason", None))
+
+        if now >= deadline:
+            if recorder is not None:
+                recorder.record(name, elapsed, False)
+            logging.getLogger("wait_engine").debug(f"대기 시간 초과: {name} ({elapsed:.2f}초)")
+            if raise_on_timeout:
+                raise WaitTimeout(name, timeout)
+            return None
+
+        if cancel is not None:
+            cancel.wait(min(delay, deadline - now))
+        else:
+            time.sleep(min(delay, deadline - now))
+        delay = min(delay * backoff, max_interval)
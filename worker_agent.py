@@ -0,0 +1,261 @@
+"""원격 COSFIM 워커 - API 노드의 작업을 임대해서 이 호스트의 COSFIM으로 처리
+
+  COSFIM_AGENT_TOKEN=... COSFIM_USER_ID=... COSFIM_USER_PW=... python worker_agent.py --server http://api-node:8000
+  python worker_agent.py --server http://127.0.0.1:8000 --token dev --user-id dev --driver sim --time-scale 0.01
+
+API 노드(app.py, WORKER_SLOTS=0이면 COSFIM 없이 리눅스에서도 실행 가능)의
+/api/v1/workers/lease로 작업을 받아 CosfimHandler로 처리하고, 결과 CSV를
+/api/v1/workers/leases/{lease_id}/complete로 올린다. 위젯 포워딩은 API 노드가 한다.
+처리하는 동안 임대 기간의 1/3마다(단계가 바뀌면 바로) heartbeat를 보내고,
+임대가 회수되었거나 작업이 취소되면 취소 토큰으로 처리를 멈춘다.
+채팅 콜백은 이 호스트의 COSFIM_CALLBACK_URL로 보낸다.
+API 노드는 COSFIM 계정을 넘겨주지 않으므로 이 호스트의 계정(--user-id/COSFIM_USER_ID,
+COSFIM_USER_PW)으로 로그인한다. API 노드에 AGENT_TOKEN이 설정되어 있어야 한다.
+"""
+import os
+import socket
+import logging
+import argparse
+import threading
+from functools import partial
+
+import requests
+
+from session_pool import CosfimSessionPool
+from wait_engine import CancellationToken
+from multi import CosfimHandler, load_driver_factory
+from result_table import DEFAULT_RESULT_FORMAT
+
+# 임대할 작업이 없을 때 API 노드에서 기다리는 시간 (초, long-poll)
+LEASE_WAIT_SECONDS = 30
+# API 노드 연결 실패 시 다시 시도할 때까지 대기 (초)
+RETRY_DELAY = 5
+# 요청별 응답 대기 시간 (초, long-poll은 대기 시간에 더함)
+REQUEST_TIMEOUT = 30
+
+
+class LeaseClient:
+    """API 노드의 임대 프로토콜 클라이언트 (lease → heartbeat → complete)"""
+    def __init__(self, server, agent_id, token=None, lease_seconds=None):
+        self.server = server.rstrip("/")
+        self.agent_id = agent_id
+        self.lease_seconds = lease_seconds      # None이면 API 노드 기본값 (multi.LEASE_SECONDS)
+        self.http = requests.Session()
+        if token:
+            self.http.headers["X-Agent-Token"] = token
+
+    def lease(self, wait=LEASE_WAIT_SECONDS):
+        """다음 작업 임대 (wait초 안에 없으면 None)"""
+        body = {"agent_id": self.agent_id}
+        if self.lease_seconds:
+            body["lease_seconds"] = self.lease_seconds
+        response = self.http.post(f"{self.server}/api/v1/workers/lease", params={"wait": wait},
+                                  json=body, timeout=wait + REQUEST_TIMEOUT)
+        if response.status_code == 204:
+            return None
+        response.raise_for_status()
+        return response.json()
+
+    def heartbeat(self, lease_id, stage=None):
+        """임대 연장 (임대가 회수되었으면 None, 취소 요청이면 cancel=True)"""
+        response = self.http.post(f"{self.server}/api/v1/workers/leases/{lease_id}/heartbeat",
+                                  json={"stage": stage}, timeout=REQUEST_TIMEOUT)
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        return response.json()
+
+    def complete(self, lease_id, success, csv_path=None, error=None, csv_data=None):
+        """처리 결과 업로드 (임대가 회수되어 반영되지 않았으면 False)
+
+        csv_data(bytes)가 주어지면 파일을 읽지 않고 그대로 올린다 (csv_path는 파일 이름으로만 씀).
+        """
+        data = {"success": "true" if success else "false"}
+        if error:
+            data["error"] = error
+        url = f"{self.server}/api/v1/workers/leases/{lease_id}/complete"
+        if csv_path and csv_data is None:
+            with open(csv_path, "rb") as csv_file:
+                csv_data = csv_file.read()
+        if csv_data is not None:
+            files = {"csvData": (os.path.basename(csv_path or "table_data.csv"), csv_data, "application/octet-stream")}
+            response = self.http.post(url, data=data, files=files, timeout=REQUEST_TIMEOUT)
+        else:
+            response = self.http.post(url, data=data, timeout=REQUEST_TIMEOUT)
+        if response.status_code == 404:
+            return False
+        response.raise_for_status()
+        return True
+
+
+class LeaseUploader:
+    """CosfimHandler의 forwarder 자리에 넣어 결과를 API 노드로 올림 (Forwarder.forward와 같은 인자)
+
+    한 임대의 결과는 한 번만 올린다 (성공 업로드 뒤 핸들러가 보내는 실패 알림은 무시).
+    """
+    def __init__(self, client, lease_id):
+        self.client = client
+        self.lease_id = lease_id
+        self.completed = False
+        self.logger = logging.getLogger("LeaseUploader")
+
+    def forward(self, success=True, data_path="table_data.csv", err_msg="", current_time=None, data=None):
+        if self.completed:
+            return
+        self.completed = True
+        if not self.client.complete(self.lease_id, success, csv_path=data_path if success else None,
+                                    error=err_msg or None, csv_data=data if success else None):
+            self.logger.warning(f"임대 {self.lease_id}가 회수되어 결과가 반영되지 않음")
+
+
+class WorkerAgent:
+    """작업 임대 → CosfimHandler 처리 → 결과 업로드를 반복하는 원격 워커
+
+    로그인된 COSFIM은 로컬 워커와 같이 CosfimSessionPool로 작업 간 재사용한다.
+    COSFIM 계정(user_id, user_pw)은 이 호스트의 설정을 쓴다 (임대 응답에 없음).
+    결과 CSV는 메모리에서 바로 올리고, archive면 이 호스트의 작업 폴더에도 비동기로 보관한다.
+    """
+    def __init__(self, client, driver_factory, user_id, user_pw, reuse_session=True, max_tasks_per_session=20,
+                 lease_wait=LEASE_WAIT_SECONDS, archive=True):
+        self.client = client
+        self.user_id = user_id
+        self.user_pw = user_pw
+        self.archive = archive
+        self.driver_factory = driver_factory
+        self.session_pool = CosfimSessionPool(driver_factory, max_tasks_per_session) if reuse_session else None
+        self.lease_wait = lease_wait
+        self.logger = logging.getLogger(f"WorkerAgent-{client.agent_id}")
+        self._stop = threading.Event()
+        self.processed = 0
+
+    def run(self):
+        """stop()까지 작업 처리"""
+        self.logger.info(f"원격 워커 시작 ({self.client.server})")
+        while not self._stop.is_set():
+            try:
+                lease = self.client.lease(wait=self.lease_wait)
+            except requests.RequestException as e:
+                self.logger.warning(f"임대 요청 실패: {e}")
+                self._stop.wait(RETRY_DELAY)
+                continue
+            if lease is not None:
+                self.process_lease(lease)
+        if self.session_pool:
+            self.session_pool.shutdown()
+        self.logger.info(f"원격 워커 종료 (처리 {self.processed}건)")
+
+    def stop(self):
+        self._stop.set()
+
+    def process_lease(self, lease):
+        """임대받은 작업 1건 처리 (결과/실패는 LeaseUploader가 API 노드로 올림)"""
+        self.logger.info(f"작업 임대: {lease['task_id']} ({lease['water_system_name']} {lease['dam_name']})")
+        cancel_token = CancellationToken()
+        uploader = LeaseUploader(self.client, lease['lease_id'])
+        stage = ["launching"]
+        wake, done = threading.Event(), threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat_loop, args=(lease, uploader, cancel_token, stage, wake, done),
+                                     daemon=True)
+        heartbeat.start()
+
+        def on_stage(task_stage):
+            stage[0] = task_stage
+            wake.set()
+
+        session = None
+        session_broken = False
+        try:
+            if self.session_pool:
+                session = self.session_pool.acquire(self.user_id, self.user_pw)
+            handler = CosfimHandler(
+                forwarder=uploader,
+                water_system_name=lease['water_system_name'],
+                dam_name=lease['dam_name'],
+                user_id=self.user_id,
+                user_pw=self.user_pw,
+                session_id=lease['session_id'],
+                opt_data=lease['opt_data'],
+                task_id=lease['task_id'],
+                session=session,
+                driver_factory=self.driver_factory,
+                stage_callback=on_stage,
+                cancel_token=cancel_token,
+                archive=self.archive,
+                result_format=lease.get('result_format') or DEFAULT_RESULT_FORMAT,
+            )
+            handler.process()
+            self.processed += 1
+        except Exception as e:
+            self.logger.error(f"작업 {lease['task_id']} 실패: {e}")
+            session_broken = not isinstance(e, ValueError)
+            try:
+                # 취소/중단처럼 핸들러가 올리지 않은 실패
+                uploader.forward(success=False, err_msg=str(e))
+            except requests.RequestException as upload_err:
+                self.logger.error(f"실패 결과 업로드 실패: {upload_err}")
+        finally:
+            done.set()
+            wake.set()
+            heartbeat.join()
+            if session is not None:
+                self.session_pool.release(session, broken=session_broken)
+
+    def _heartbeat_loop(self, lease, uploader, cancel_token, stage, wake, done):
+        """임대 기간의 1/3마다, 단계가 바뀌면 바로 heartbeat (회수/취소되면 취소 토큰 설정)"""
+        interval = lease['lease_seconds'] / 3
+        while True:
+            wake.wait(interval)
+            wake.clear()
+            if done.is_set() or uploader.completed:
+                return
+            try:
+                beat = self.client.heartbeat(lease['lease_id'], stage[0])
+            except requests.RequestException as e:
+                self.logger.warning(f"heartbeat 실패: {e}")
+                continue
+            if beat is None:
+                if uploader.completed:
+                    return      # 결과 업로드로 임대가 끝난 것
+                self.logger.warning(f"임대 {lease['lease_id']}가 회수됨 - 작업 중단")
+                cancel_token.cancel("lease_lost")
+                return
+            if beat['cancel'] and not cancel_token.is_set():
+                self.logger.info(f"작업 {lease['task_id']} 취소 요청 수신")
+                cancel_token.cancel("cancelled")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--server", required=True, help="API 노드 주소 (예: http://api-node:8000)")
+    parser.add_argument("--agent-id", default=f"{socket.gethostname()}-{os.getpid()}")
+    parser.add_argument("--token", default=os.environ.get("COSFIM_AGENT_TOKEN"), help="API 노드의 AGENT_TOKEN")
+    parser.add_argument("--user-id", default=os.environ.get("COSFIM_USER_ID"), help="COSFIM 계정 (비밀번호는 COSFIM_USER_PW)")
+    parser.add_argument("--driver", choices=("gui", "sim"), default=os.environ.get("COSFIM_DRIVER", "gui"))
+    parser.add_argument("--time-scale", type=float, default=1.0,
+                        help="sim 드라이버의 REALISTIC_LATENCIES 배율 (0이면 대기 없음)")
+    parser.add_argument("--session-max-tasks", type=int, default=20)
+    parser.add_argument("--lease-seconds", type=int, default=None, help="임대 기간 (기본: API 노드 설정)")
+    parser.add_argument("--no-archive", action="store_true", help="결과 CSV를 이 호스트에 보관하지 않음 (임시/읽기 전용 디스크)")
+    args = parser.parse_args()
+    user_pw = os.environ.get("COSFIM_USER_PW")
+    if not args.token:
+        parser.error("--token 또는 COSFIM_AGENT_TOKEN이 필요합니다")
+    if args.driver == "gui" and not (args.user_id and user_pw):
+        parser.error("COSFIM 계정(--user-id 또는 COSFIM_USER_ID, COSFIM_USER_PW)이 필요합니다")
+
+    driver_factory = load_driver_factory(args.driver)
+    if args.driver == "sim":
+        from cosfim_sim import REALISTIC_LATENCIES
+        driver_factory = partial(driver_factory, latencies=REALISTIC_LATENCIES, time_scale=args.time_scale)
+    agent = WorkerAgent(LeaseClient(args.server, args.agent_id, token=args.token, lease_seconds=args.lease_seconds), driver_factory,
+                        args.user_id, user_pw, max_tasks_per_session=args.session_max_tasks, archive=not args.no_archive)
+    try:
+        agent.run()
+    except KeyboardInterrupt:
+        # 로그인된 COSFIM을 남기지 않도록 세션 종료
+        if agent.session_pool:
+            agent.session_pool.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+import os
+import shutil
+import logging
+
+# COSFIM 원본 작업 폴더 (수계 파일과 OPT가 있는 곳)
+BASE_WORKSPACE_DIR = r"C:\COSFIM\WRKSPACE"
+# 슬롯별 작업 폴더를 만들 기본 위치 (원본 폴더 밖이어야 복사가 재귀하지 않음)
+SLOT_WORKSPACE_ROOT = r"C:\COSFIM\SLOTS"
+
+
+class CosfimWorkspace:
+    """작업 슬롯 하나가 쓰는 COSFIM 작업 폴더
+
+    template_dir가 주어지면 처음 prepare()할 때 원본 폴더의 수계 파일을
+    root로 복사해서 슬롯마다 독립된 사본을 쓴다. exclusive는 이 호스트에서
+    COSFIM 인스턴스가 하나뿐인지 여부이며, 드라이버는 exclusive일 때만
+    프로세스 이름으로 COSFIM을 정리한다 (아니면 자기 PID만).
+    """
+    def __init__(self, root, slot=0, template_dir=None, exclusive=True):
+        self.root = str(root)
+        self.slot = slot
+        self.template_dir = template_dir
+        self.exclusive = exclusive
+        self.logger = logging.getLogger(f"CosfimWorkspace-{slot}")
+        self._prepared = False
+
+    def prepare(self):
+        """작업 폴더 생성 (template_dir가 있으면 수계 파일 복사, 한 번만)"""
+        if self._prepared:
+            return
+        if self.template_dir and os.path.abspath(self.template_dir) != os.path.abspath(self.root):
+            shutil.copytree(self.template_dir, self.root, dirs_exist_ok=True)
+            self.logger.info(f"작업 폴더 복사: {self.template_dir} -> {self.root}")
+        else:
+            os.makedirs(self.root, exist_ok=True)
+        self._prepared = True
+
+    def opt_path(self, opt_name):
+        return os.path.join(self.root, f"{opt_name}.OPT")
+
+    def __repr__(self):
+        return f"CosfimWorkspace(slot={self.slot}, root={self.root!r})"
+
+
+def make_workspaces(slots, root, template_dir=BASE_WORKSPACE_DIR):
+    """슬롯 수만큼 root/slot_<n> 작업 폴더 생성 (원본 폴더 사본, 인스턴스끼리 OPT 경로가 겹치지 않음)"""
+    return [CosfimWorkspace(os.path.join(root, f"slot_{slot}"), slot=slot, template_dir=template_dir,
+                            exclusive=slots == 1)
+            for slot in range(slots)]